@@ -0,0 +1,428 @@
+"""Almacén de saldos con índice por cédula.
+
+`BalanceStore` carga `data_saldos.csv` una sola vez, construye un índice hash
+sobre la columna `Cedula` y solo vuelve a cargar el archivo cuando cambian su
+fecha de modificación y su contenido (la fecha se revisa como máximo una vez
+por `STAT_INTERVAL_S`). Las consultas son O(1) y no bloquean, por lo que pueden
+hacerse directamente desde código asíncrono.
+
+Para archivos que no caben cómodamente en memoria, `ingest_csv` convierte el CSV
+(por bloques, con memoria constante) en una base SQLite con la cédula como
+llave primaria, y `SQLiteBalanceStore` la consulta con lecturas mapeadas en
+memoria; el uso de memoria no depende del tamaño del archivo:
+
+    python -m react_agent.balances data_saldos.csv data_saldos.sqlite
+
+`get_balance_store` elige el almacén según la extensión de `saldos_csv_path`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from react_agent.instrumentation import timed
+
+SALDOS_CSV_PATH = "/home/jssaa/proyectos/react-agent/src/doc_pruebas/data_saldos.csv"
+
+# Columnas del CSV original (incluye el typo "Mondo desembolso")
+COLUMNAS = ["Saldo", "Producto", "fecha desembolso", "Mondo desembolso"]
+
+# Columnas que solo algunas versiones del archivo traen (ver `react_agent.rules`)
+COLUMNAS_OPCIONALES = ["Plan", "Inicio vigencia", "Fin vigencia"]
+
+# Nombre de cada columna del CSV en la tabla `saldos` (y en `BalanceRecord`)
+COLUMNAS_SQL = {
+    "Saldo": "saldo",
+    "Producto": "producto",
+    "fecha desembolso": "fecha_desembolso",
+    "Mondo desembolso": "monto_desembolso",
+    "Plan": "plan",
+    "Inicio vigencia": "inicio_vigencia",
+    "Fin vigencia": "fin_vigencia",
+}
+
+# Extensiones que `get_balance_store` abre con `SQLiteBalanceStore`
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+# Segundos mínimos entre dos revisiones (`os.stat`) del archivo de saldos
+STAT_INTERVAL_S = 1.0
+
+
+@dataclass(frozen=True)
+class BalanceRecord:
+    """Registro de saldo de una persona."""
+
+    cedula: str
+    saldo: Any
+    producto: Any
+    fecha_desembolso: Any
+    monto_desembolso: Any
+    plan: Any = None
+    inicio_vigencia: Any = None
+    fin_vigencia: Any = None
+
+
+def _file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class _ThrottledStat:
+    """Limita las revisiones del archivo (`os.stat`) de un almacén de saldos."""
+
+    stat_interval_s: float = STAT_INTERVAL_S
+    _checked: float = 0.0
+
+    def _due_for_check(self, loaded: bool) -> bool:
+        """Indica si toca revisar el archivo; antes de la primera carga siempre toca."""
+        now = time.monotonic()
+        if loaded and now - self._checked < self.stat_interval_s:
+            return False
+        self._checked = now
+        return True
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Índice y columnas de una misma carga; se reemplazan juntos en una asignación."""
+
+    index: Dict[str, int]
+    columns: Dict[str, List[Any]]
+
+
+class BalanceStore(_ThrottledStat):
+    """Índice en memoria de `data_saldos.csv` por número de cédula."""
+
+    def __init__(
+        self, csv_path: str = SALDOS_CSV_PATH, stat_interval_s: float = STAT_INTERVAL_S
+    ):
+        """Crea el índice vacío; el CSV se carga en la primera consulta."""
+        self.csv_path = csv_path
+        self.stat_interval_s = stat_interval_s
+        self._snapshot = _Snapshot(index={}, columns={})
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._digest: Optional[str] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    # -------------------------------
+    # Carga e invalidación
+    # -------------------------------
+    def _current_stamp(self) -> Tuple[int, int]:
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                "No se pudo encontrar el archivo de datos de saldos"
+            )
+        return stat.st_mtime_ns, stat.st_size
+
+    def needs_reload(self) -> bool:
+        """Indica si el archivo cambió desde la última carga (solo usa `stat`)."""
+        return self._stamp != self._current_stamp()
+
+    def load(self) -> None:
+        """Carga el CSV y reconstruye el índice si el contenido cambió."""
+        import pandas as pd
+
+        with self._lock:
+            stamp = self._current_stamp()
+            if stamp == self._stamp:
+                return
+            digest = _file_digest(self.csv_path)
+            if digest == self._digest:
+                # Cambió la fecha de modificación pero no el contenido
+                self._stamp = stamp
+                return
+
+            with timed("cpu", "saldos_load"):
+                df = pd.read_csv(self.csv_path, dtype={"Cedula": str})
+            cedulas = df["Cedula"].str.strip()
+            # Se conserva la primera fila de cada cédula, igual que `iloc[0]`
+            first = ~cedulas.duplicated(keep="first")
+            index = {cedula: pos for pos, cedula in enumerate(cedulas[first])}
+            presentes = COLUMNAS + [col for col in COLUMNAS_OPCIONALES if col in df]
+            columns = {col: df.loc[first, col].tolist() for col in presentes}
+
+            # Una sola asignación: las consultas en curso ven la carga anterior
+            # o la nueva completa, nunca el índice de una con las columnas de otra
+            self._snapshot = _Snapshot(index=index, columns=columns)
+            self._stamp, self._digest = stamp, digest
+            self.loads += 1
+
+    def _ensure_loaded(self) -> None:
+        if self._due_for_check(self._stamp is not None) and self.needs_reload():
+            self.load()
+
+    # -------------------------------
+    # Consultas
+    # -------------------------------
+    def _get(self, cedula: str) -> BalanceRecord:
+        key = str(cedula).strip()
+        snapshot = self._snapshot
+        pos = snapshot.index.get(key)
+        if pos is None:
+            raise ValueError(f"No se encontró información para la cédula {cedula}")
+        columns = snapshot.columns
+        return BalanceRecord(
+            cedula=key,
+            saldo=columns["Saldo"][pos],
+            producto=columns["Producto"][pos],
+            fecha_desembolso=columns["fecha desembolso"][pos],
+            monto_desembolso=columns["Mondo desembolso"][pos],
+            plan=columns["Plan"][pos] if "Plan" in columns else None,
+            inicio_vigencia=columns["Inicio vigencia"][pos]
+            if "Inicio vigencia" in columns
+            else None,
+            fin_vigencia=columns["Fin vigencia"][pos]
+            if "Fin vigencia" in columns
+            else None,
+        )
+
+    def lookup(self, cedula: str) -> BalanceRecord:
+        """Consulta el saldo de una cédula, cargando el archivo si hace falta.
+
+        Args:
+            cedula (str): Número de cédula
+
+        Returns:
+            BalanceRecord: Registro de saldo
+
+        Raises:
+            FileNotFoundError: Si no existe el archivo de saldos
+            ValueError: Si la cédula no está en el archivo
+        """
+        self._ensure_loaded()
+        return self._get(cedula)
+
+    async def alookup(self, cedula: str) -> BalanceRecord:
+        """Versión asíncrona de `lookup`.
+
+        Con el índice vigente responde en el mismo hilo del event loop; solo
+        delega a un hilo cuando hay que (re)cargar el archivo.
+        """
+        if self._due_for_check(self._stamp is not None) and self.needs_reload():
+            await asyncio.to_thread(self.load)
+        return self._get(cedula)
+
+    def __len__(self) -> int:
+        """Número de cédulas indexadas."""
+        return len(self._snapshot.index)
+
+
+# -------------------------------
+# Almacén en disco (SQLite)
+# -------------------------------
+def ingest_csv(csv_path: str, db_path: str, chunksize: int = 200_000) -> int:
+    """Convierte `data_saldos.csv` en una base SQLite indexada por cédula.
+
+    El CSV se lee por bloques de `chunksize` filas, así que la memoria no crece
+    con el tamaño del archivo. Como en `BalanceStore`, se conserva la primera
+    fila de cada cédula. La base se escribe en un archivo temporal y se
+    reemplaza de forma atómica, de modo que los lectores nunca ven una base a
+    medio escribir.
+
+    Args:
+        csv_path: Ruta del CSV de saldos
+        db_path: Ruta de la base SQLite a crear o reemplazar
+        chunksize: Filas por bloque de lectura
+
+    Returns:
+        int: Número de cédulas distintas ingeridas
+    """
+    import pandas as pd
+
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError("No se pudo encontrar el archivo de datos de saldos")
+    header = pd.read_csv(csv_path, nrows=0).columns
+    presentes = COLUMNAS + [col for col in COLUMNAS_OPCIONALES if col in header]
+    columnas_sql = [COLUMNAS_SQL[col] for col in presentes]
+
+    tmp_path = f"{db_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        # Sin tipo declarado cada valor conserva el tipo que tenía en pandas
+        conn.execute(
+            f"CREATE TABLE saldos (cedula TEXT PRIMARY KEY NOT NULL, {', '.join(columnas_sql)}) "
+            "WITHOUT ROWID"
+        )
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        insert = (
+            f"INSERT OR IGNORE INTO saldos (cedula, {', '.join(columnas_sql)}) "
+            f"VALUES ({', '.join('?' * (len(columnas_sql) + 1))})"
+        )
+        with timed("cpu", "saldos_ingest"):
+            for chunk in pd.read_csv(
+                csv_path, dtype={"Cedula": str}, chunksize=chunksize
+            ):
+                values = [chunk["Cedula"].str.strip().tolist()]
+                for col in presentes:
+                    serie = chunk[col]
+                    values.append(
+                        serie.astype(object).where(serie.notna(), None).tolist()
+                    )
+                conn.executemany(insert, zip(*values))
+        rows = conn.execute("SELECT COUNT(*) FROM saldos").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("source", os.path.abspath(csv_path)),
+                ("source_digest", _file_digest(csv_path)),
+                ("columns", json.dumps(columnas_sql)),
+                ("rows", str(rows)),
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return int(rows)
+
+
+class SQLiteBalanceStore(_ThrottledStat):
+    """Consulta de saldos sobre la base que produce `ingest_csv`.
+
+    Cada consulta es una búsqueda en el índice de la llave primaria (menos de
+    un milisegundo) sobre páginas mapeadas en memoria, así que no bloquea el
+    event loop. La conexión es de solo lectura y se vuelve a abrir cuando la
+    base se reemplaza con una nueva ingesta.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        mmap_size: int = 256 * 1024 * 1024,
+        stat_interval_s: float = STAT_INTERVAL_S,
+    ):
+        """Prepara el almacén; la conexión se abre en la primera consulta."""
+        self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.stat_interval_s = stat_interval_s
+        self._conn: Optional[sqlite3.Connection] = None
+        self._columns: Sequence[str] = ()
+        self._rows = 0
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _current_stamp(self) -> Tuple[int, int, int]:
+        try:
+            stat = os.stat(self.db_path)
+        except FileNotFoundError:
+            raise FileNotFoundError("No se pudo encontrar la base de datos de saldos")
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def needs_reload(self) -> bool:
+        """Indica si la base se reemplazó desde que se abrió (solo usa `stat`)."""
+        return self._stamp != self._current_stamp()
+
+    def load(self) -> None:
+        """Abre (o vuelve a abrir) la conexión de solo lectura."""
+        with self._lock:
+            stamp = self._current_stamp()
+            if stamp == self._stamp:
+                return
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            old, self._conn = self._conn, conn
+            self._columns = json.loads(meta["columns"])
+            self._rows = int(meta["rows"])
+            self._stamp = stamp
+            self.loads += 1
+            if old is not None:
+                old.close()
+
+    def _ensure_loaded(self) -> None:
+        if self._due_for_check(self._stamp is not None) and self.needs_reload():
+            self.load()
+
+    def _get(self, cedula: str) -> BalanceRecord:
+        key = str(cedula).strip()
+        with self._lock:
+            assert self._conn is not None
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._columns)} FROM saldos WHERE cedula = ?",
+                (key,),
+            ).fetchone()
+            columns = self._columns
+        if row is None:
+            raise ValueError(f"No se encontró información para la cédula {cedula}")
+        return BalanceRecord(cedula=key, **dict(zip(columns, row)))
+
+    def lookup(self, cedula: str) -> BalanceRecord:
+        """Consulta el saldo de una cédula (misma interfaz que `BalanceStore.lookup`)."""
+        self._ensure_loaded()
+        return self._get(cedula)
+
+    async def alookup(self, cedula: str) -> BalanceRecord:
+        """Versión asíncrona de `lookup`; responde en el mismo hilo del event loop."""
+        return self.lookup(cedula)
+
+    def __len__(self) -> int:
+        """Número de filas de la base."""
+        self._ensure_loaded()
+        return self._rows
+
+
+_stores: Dict[str, Union[BalanceStore, SQLiteBalanceStore]] = {}
+
+
+def get_balance_store(
+    csv_path: str = SALDOS_CSV_PATH,
+) -> Union[BalanceStore, SQLiteBalanceStore]:
+    """Devuelve el almacén compartido del proceso para `csv_path`.
+
+    Las rutas con extensión de SQLite (`SQLITE_SUFFIXES`) se consultan en disco
+    con `SQLiteBalanceStore`; cualquier otra se carga en memoria con `BalanceStore`.
+    """
+    store = _stores.get(csv_path)
+    if store is None:
+        if csv_path.lower().endswith(SQLITE_SUFFIXES):
+            store = _stores.setdefault(csv_path, SQLiteBalanceStore(csv_path))
+        else:
+            store = _stores.setdefault(csv_path, BalanceStore(csv_path))
+    return store
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de `python -m react_agent.balances`."""
+    parser = argparse.ArgumentParser(
+        description="Convierte data_saldos.csv en una base SQLite indexada por cédula."
+    )
+    parser.add_argument("csv_path", help="CSV de saldos")
+    parser.add_argument(
+        "db_path",
+        nargs="?",
+        help="Base SQLite de salida (por defecto junto al CSV, .sqlite)",
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=200_000, help="Filas por bloque"
+    )
+    args = parser.parse_args(argv)
+
+    db_path = args.db_path or os.path.splitext(args.csv_path)[0] + ".sqlite"
+    rows = ingest_csv(args.csv_path, db_path, chunksize=args.chunksize)
+    sys.stdout.write(f"{rows} cédulas -> {db_path}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Procesamiento por lotes de reclamaciones.
+
+Recorre un directorio de reclamaciones (una subcarpeta por reclamación con la
+cédula y el certificado de defunción en PDF) o un manifiesto JSONL/CSV, ejecuta
+`graph.ainvoke` con concurrencia acotada y un timeout por reclamación, y escribe
+una línea JSONL por reclamación a medida que termina.
+
+La ejecución es reanudable: las reclamaciones que ya tienen resultado en el
+archivo de salida se omiten. Por defecto se usa `durable_graph`, que guarda un
+checkpoint por paso en SQLite (`REACT_AGENT_CHECKPOINT_DB`) con la reclamación
+como `thread_id`; al reintentar una reclamación fallida (`--retry-errors`) se
+reanuda desde el último nodo completado en lugar de repetir las extracciones.
+
+Uso:
+    python -m react_agent.batch reclamaciones/ --output resultados.jsonl --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import math
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST = "Procesa la reclamación de Póliza Express."
+
+
+@dataclass(frozen=True)
+class Claim:
+    """Una reclamación con sus dos documentos."""
+
+    claim_id: str
+    cedula_pdf_path: str
+    defuncion_pdf_path: str
+
+
+@dataclass
+class ClaimResult:
+    """Resultado de una reclamación, tal como se escribe en el JSONL."""
+
+    claim_id: str
+    status: str
+    latency_s: float
+    answer: Optional[str] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchReport:
+    """Resumen de la ejecución del lote."""
+
+    total: int = 0
+    skipped: int = 0
+    ok: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    elapsed_s: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def processed(self) -> int:
+        """Reclamaciones ejecutadas en esta corrida."""
+        return self.ok + self.errors + self.timeouts
+
+    @property
+    def claims_per_minute(self) -> float:
+        """Rendimiento de la corrida en reclamaciones por minuto."""
+        return self.processed / self.elapsed_s * 60 if self.elapsed_s else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Percentil `q` (0-100) de la latencia por reclamación, en segundos."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> str:
+        """Devuelve el resumen legible de la corrida."""
+        return (
+            f"procesadas={self.processed} omitidas={self.skipped} ok={self.ok} "
+            f"errores={self.errors} timeouts={self.timeouts} "
+            f"rendimiento={self.claims_per_minute:.1f} reclamaciones/min "
+            f"p50={self.percentile(50):.2f}s p95={self.percentile(95):.2f}s"
+        )
+
+
+# -------------------------------
+# Descubrimiento de reclamaciones
+# -------------------------------
+def _find_pdf(folder: Path, keywords: Iterable[str]) -> Optional[Path]:
+    for pdf in sorted(folder.glob("*.pdf")) + sorted(folder.glob("*.PDF")):
+        name = pdf.name.lower()
+        if any(keyword in name for keyword in keywords):
+            return pdf
+    return None
+
+
+def claims_from_directory(root: str) -> List[Claim]:
+    """Construye las reclamaciones a partir de un directorio con una subcarpeta por reclamación.
+
+    En cada subcarpeta se busca un PDF cuyo nombre contenga "cedula" y otro que
+    contenga "defuncion". Las subcarpetas incompletas se omiten.
+    """
+    claims = []
+    for folder in sorted(p for p in Path(root).iterdir() if p.is_dir()):
+        cedula = _find_pdf(folder, ("cedula", "cédula"))
+        defuncion = _find_pdf(folder, ("defuncion", "defunción"))
+        if cedula and defuncion:
+            claims.append(Claim(folder.name, str(cedula), str(defuncion)))
+        else:
+            logger.warning("se omite %s: faltan documentos", folder)
+    return claims
+
+
+def claims_from_manifest(path: str) -> List[Claim]:
+    """Lee un manifiesto JSONL o CSV con `claim_id`, `cedula_pdf_path` y `defuncion_pdf_path`."""
+    base = Path(path).parent
+    with open(path, encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            rows: List[Dict[str, Any]] = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+    return [
+        Claim(
+            str(row["claim_id"]),
+            str(base / row["cedula_pdf_path"]),
+            str(base / row["defuncion_pdf_path"]),
+        )
+        for row in rows
+    ]
+
+
+def completed_claims(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """Devuelve los `claim_id` que ya tienen resultado en el archivo de salida."""
+    done: Set[str] = set()
+    if not Path(output_path).exists():
+        return done
+    with open(output_path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # línea truncada por una corrida interrumpida
+            if retry_errors and record.get("status") != "ok":
+                continue
+            done.add(str(record["claim_id"]))
+    return done
+
+
+# -------------------------------
+# Ejecución
+# -------------------------------
+def _answer_text(result: Any) -> str:
+    from react_agent.utils import get_message_text
+
+    return get_message_text(result["messages"][-1])
+
+
+async def _run_claim(
+    graph: Any, claim: Claim, configurable: Dict[str, Any], timeout: Optional[float]
+) -> ClaimResult:
+    config = {
+        "configurable": {
+            "priority": "batch",
+            # Cada agente, herramienta y llamada a modelo respeta el mismo plazo
+            "deadline": time.time() + timeout if timeout else 0.0,
+            **configurable,
+            "cedula_pdf_path": claim.cedula_pdf_path,
+            "defuncion_pdf_path": claim.defuncion_pdf_path,
+            "thread_id": claim.claim_id,
+        },
+        "run_name": f"claim-{claim.claim_id}",
+    }
+    start = time.perf_counter()
+    graph_input: Optional[Dict[str, Any]] = {"messages": [("user", DEFAULT_REQUEST)]}
+    try:
+        if getattr(graph, "checkpointer", None) is not None:
+            state = await graph.aget_state(config)
+            if state.next:
+                graph_input = None  # reanuda desde el último nodo completado
+            elif state.values.get("messages"):
+                # Terminó en una corrida anterior pero su resultado no quedó escrito
+                return ClaimResult(
+                    claim.claim_id, "ok", 0.0, _answer_text(state.values)
+                )
+        result = await asyncio.wait_for(graph.ainvoke(graph_input, config), timeout)
+        return ClaimResult(
+            claim.claim_id, "ok", time.perf_counter() - start, _answer_text(result)
+        )
+    except TimeoutError:
+        return ClaimResult(
+            claim.claim_id,
+            "timeout",
+            time.perf_counter() - start,
+            error=f"timeout tras {timeout}s",
+        )
+    except Exception as e:
+        return ClaimResult(
+            claim.claim_id,
+            "error",
+            time.perf_counter() - start,
+            error=f"{type(e).__name__}: {e}",
+        )
+
+
+async def run_batch(
+    claims: List[Claim],
+    output_path: str,
+    concurrency: int = 4,
+    timeout: Optional[float] = 300,
+    configurable: Optional[Dict[str, Any]] = None,
+    retry_errors: bool = False,
+    graph: Any = None,
+) -> BatchReport:
+    """Procesa las reclamaciones y escribe un resultado JSONL por cada una al terminar.
+
+    Args:
+        claims: Reclamaciones a procesar
+        output_path: Archivo JSONL de salida (se abre en modo append)
+        concurrency: Reclamaciones ejecutándose al mismo tiempo
+        timeout: Segundos máximos por reclamación (None sin límite)
+        configurable: Valores adicionales de `Configuration` para cada corrida
+        retry_errors: Volver a ejecutar las reclamaciones con error o timeout
+        graph: Grafo a ejecutar; por defecto `react_agent.graph.durable_graph`
+
+    Returns:
+        BatchReport: Resumen con rendimiento y latencias
+    """
+    if graph is None:
+        from react_agent.graph import durable_graph as graph
+
+    done = completed_claims(output_path, retry_errors)
+    pending = [claim for claim in claims if claim.claim_id not in done]
+    report = BatchReport(total=len(claims), skipped=len(claims) - len(pending))
+
+    queue: asyncio.Queue[Claim] = asyncio.Queue()
+    for claim in pending:
+        queue.put_nowait(claim)
+
+    start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        async def worker() -> None:
+            while True:
+                try:
+                    claim = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await _run_claim(graph, claim, configurable or {}, timeout)
+                output.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+                output.flush()
+                report.latencies.append(result.latency_s)
+                if result.status == "ok":
+                    report.ok += 1
+                elif result.status == "timeout":
+                    report.timeouts += 1
+                else:
+                    report.errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    report.elapsed_s = time.perf_counter() - start
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Procesa reclamaciones de Póliza Express por lotes."
+    )
+    parser.add_argument(
+        "source", help="Directorio de reclamaciones o manifiesto .jsonl/.csv"
+    )
+    parser.add_argument(
+        "--output", "-o", required=True, help="Archivo JSONL de resultados"
+    )
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument(
+        "--timeout", type=float, default=300, help="Segundos por reclamación"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["supervisor", "deterministic"],
+        default=None,
+        help="pipeline_mode",
+    )
+    parser.add_argument("--retry-errors", action="store_true")
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Ejecutar sin checkpoints (sin reanudación)",
+    )
+    parser.add_argument(
+        "--metrics", help="Archivo donde escribir el resumen JSON de métricas"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="[batch] %(message)s", level=logging.INFO)
+
+    if Path(args.source).is_dir():
+        claims = claims_from_directory(args.source)
+    else:
+        claims = claims_from_manifest(args.source)
+
+    configurable = {"pipeline_mode": args.mode} if args.mode else {}
+    graph = None
+    if args.no_checkpoint:
+        from react_agent.graph import graph
+    report = asyncio.run(
+        run_batch(
+            claims,
+            args.output,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            configurable=configurable,
+            retry_errors=args.retry_errors,
+            graph=graph,
+        )
+    )
+    sys.stderr.write(f"[batch] {report.summary()}\n")
+    if args.metrics:
+        from react_agent.instrumentation import get_metrics
+
+        Path(args.metrics).write_text(get_metrics().to_json(), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,32 @@
 # chat_utils.py
 
+import hashlib
 import os
+import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from google.oauth2 import service_account
-from langchain_google_vertexai import ChatVertexAI
-from langchain.schema import Document
-from vertexai.language_models import TextEmbeddingModel
-from google.cloud import aiplatform
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+# Las dependencias de Google (langchain_google_vertexai, vertexai, aiplatform)
+# tardan segundos en importarse: se cargan solo al crear el primer cliente.
+if TYPE_CHECKING:
+    from google.oauth2 import service_account
+    from langchain_core.language_models import BaseChatModel
+    from langchain_google_vertexai import ChatVertexAI
+
+_credentials_cache: Dict[str, "service_account.Credentials"] = {}
+
 
 # -------------------------------
 # Función para configurar credenciales de Google Cloud
 # -------------------------------
 def setup_google_credentials(credentials_path: str = "creds/credentials.json"):
-    """
-    Configura las credenciales de Google Cloud desde un archivo JSON.
-    
+    """Configura las credenciales de Google Cloud desde un archivo JSON.
+
     Args:
         credentials_path (str): Ruta al archivo de credenciales JSON
-    
+
     Returns:
         service_account.Credentials: Objeto de credenciales configurado
     """
@@ -29,37 +38,51 @@ def setup_google_credentials(credentials_path: str = "creds/credentials.json"):
         project_root = current_dir.parent
         # Construir la ruta completa al archivo de credenciales
         credentials_path = project_root / credentials_path
-    
+
     # Convertir a string si es un objeto Path
     credentials_path = str(credentials_path)
-    
+
+    # Las credenciales se cargan una sola vez por proceso
+    if credentials_path in _credentials_cache:
+        return _credentials_cache[credentials_path]
+
     # Debug: imprimir información útil
     print(f"[DEBUG] Buscando credenciales en: {credentials_path}")
-    print(f"[DEBUG] Directorio actual existe: {os.path.exists(os.path.dirname(credentials_path))}")
+    print(
+        f"[DEBUG] Directorio actual existe: {os.path.exists(os.path.dirname(credentials_path))}"
+    )
     print(f"[DEBUG] Archivo existe: {os.path.exists(credentials_path)}")
-    
+
     if not os.path.exists(credentials_path):
         # Listar archivos en el directorio para ayudar con debug
         parent_dir = os.path.dirname(credentials_path)
         if os.path.exists(parent_dir):
             files_in_dir = os.listdir(parent_dir)
             print(f"[DEBUG] Archivos en {parent_dir}: {files_in_dir}")
-        
+
         raise FileNotFoundError(
             f"Archivo de credenciales no encontrado en: {credentials_path}\n"
             f"Asegúrate de que el archivo credentials.json existe en la carpeta creds/"
         )
-    
+
     # Configurar la variable de entorno para las credenciales
-    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
-    
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_path
+
+    from google.oauth2 import service_account
+
     # Cargar las credenciales desde el archivo
     try:
-        credentials = service_account.Credentials.from_service_account_file(credentials_path)
+        credentials = service_account.Credentials.from_service_account_file(
+            credentials_path
+        )
         print(f"[DEBUG] Credenciales cargadas exitosamente desde: {credentials_path}")
+        _credentials_cache[credentials_path] = credentials
         return credentials
     except Exception as e:
-        raise RuntimeError(f"Error al cargar credenciales desde {credentials_path}: {e}")
+        raise RuntimeError(
+            f"Error al cargar credenciales desde {credentials_path}: {e}"
+        )
+
 
 # -------------------------------
 # Clase para configurar Vertex AI LLM
@@ -72,7 +95,7 @@ class VertexAILLM:
         temperature: float = 0,
         max_output_tokens: int = 4000,
         location: str = "global",
-        credentials_path: str = "creds/credentials.json"
+        credentials_path: str = "creds/credentials.json",
     ):
         self.model_name = model_name
         self.temperature = temperature
@@ -85,39 +108,250 @@ class VertexAILLM:
         self.credentials = setup_google_credentials(self.credentials_path)
 
         # Inicializa el modelo al crear la clase
+        from langchain_google_vertexai import ChatVertexAI
+
         self.llm = ChatVertexAI(
             model_name=self.model_name,
             temperature=self.temperature,
             max_output_tokens=self.max_output_tokens,
             project=self.project,
             location=self.location,
-            credentials=self.credentials
+            credentials=self.credentials,
+            # Las llamadas pasan por el planificador, que ya reintenta ante 429
+            max_retries=0,
         )
 
-    def get_model(self):
+    def get_model(self) -> "ChatVertexAI":
         """Devuelve la instancia del modelo configurado"""
         return self.llm
 
 
+# -------------------------------
+# Registro compartido de modelos de Vertex AI
+# -------------------------------
+_model_registry: Dict[Tuple[Any, ...], VertexAILLM] = {}
+_model_registry_lock = threading.Lock()
+_vertex_model_factory: Optional[Callable[..., "BaseChatModel"]] = None
+
+
+def set_vertex_model_factory(factory: Optional[Callable[..., "BaseChatModel"]]) -> None:
+    """Reemplaza los clientes de Vertex AI que devuelve `get_vertex_model`.
+
+    `factory(model_name)` devuelve el modelo a usar (p. ej. un modelo falso en
+    los benchmarks); None vuelve a los clientes reales.
+    """
+    global _vertex_model_factory
+    _vertex_model_factory = factory
+
+
+def get_vertex_model(
+    project: str,
+    model_name: str = "gemini-2.5-pro-preview-05-06",
+    temperature: float = 0,
+    max_output_tokens: int = 4000,
+    location: str = "global",
+    credentials_path: str = "creds/credentials.json",
+) -> "BaseChatModel":
+    """Devuelve un cliente de Vertex AI compartido por todo el proceso.
+
+    Cada combinación de parámetros se construye una sola vez (credenciales
+    incluidas) y se reutiliza en las llamadas siguientes, de modo que las
+    conexiones HTTP/gRPC del cliente también se reutilizan. El cliente es
+    seguro para uso concurrente con `ainvoke`.
+
+    Args:
+        project (str): Proyecto de GCP
+        model_name (str): Nombre del modelo
+        temperature (float): Temperatura de muestreo
+        max_output_tokens (int): Máximo de tokens de salida
+        location (str): Región de Vertex AI
+        credentials_path (str): Ruta al archivo de credenciales JSON
+
+    Returns:
+        BaseChatModel: Instancia del modelo configurado (un `ChatVertexAI`, salvo
+        que `set_vertex_model_factory` lo reemplace)
+    """
+    if _vertex_model_factory is not None:
+        return _vertex_model_factory(model_name)
+    key = (
+        project,
+        model_name,
+        temperature,
+        max_output_tokens,
+        location,
+        credentials_path,
+    )
+    llm = _model_registry.get(key)
+    if llm is None:
+        with _model_registry_lock:
+            llm = _model_registry.get(key)
+            if llm is None:
+                llm = VertexAILLM(
+                    project=project,
+                    model_name=model_name,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                    location=location,
+                    credentials_path=credentials_path,
+                )
+                _model_registry[key] = llm
+    return llm.get_model()
+
+
 # -------------------------------
 # Clase para cargar prompts desde archivos .txt
 # -------------------------------
 class PromptLoader:
     @staticmethod
     def load_txt_prompt(path: str) -> str:
-        """
-        Carga el contenido de un archivo .txt y lo retorna como string.
-        
+        """Carga el contenido de un archivo .txt y lo retorna como string.
+
         Args:
             path (str): Ruta al archivo .txt
-        
+
         Returns:
             str: Contenido del archivo
         """
         try:
-            with open(path, "r", encoding="utf-8") as file:
+            with open(path, encoding="utf-8") as file:
                 return file.read().strip()
         except FileNotFoundError:
             raise FileNotFoundError(f"El archivo '{path}' no fue encontrado.")
         except Exception as e:
             raise RuntimeError(f"Error al leer el archivo '{path}': {e}")
+
+
+# -------------------------------
+# Registro de prompts versionados
+# -------------------------------
+# Los prompts se guardan como `<nombre>.v<versión>.txt` y se distribuyen con el paquete
+PROMPTS_DIR = Path(__file__).parent / "prompt_templates"
+
+_PROMPT_FILE = re.compile(r"^(?P<name>[a-z0-9_]+)\.v(?P<version>\d+)\.txt$")
+# Una línea `@incluir <nombre>` se reemplaza por el texto de ese prompt
+_INCLUDE = re.compile(r"^@incluir (?P<name>[a-z0-9_]+)$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """Prompt cargado del registro, con su versión y el hash de su texto."""
+
+    name: str
+    version: int
+    text: str
+    digest: str
+    """Primeros 12 caracteres del sha256 del texto (con los `@incluir` resueltos)."""
+
+    @property
+    def key(self) -> str:
+        """Identificador estable del prompt, p. ej. `saldo_agent@v1:3f2a9c0d41be`."""
+        return f"{self.name}@v{self.version}:{self.digest}"
+
+
+class PromptRegistry(PromptLoader):
+    """Prompts versionados que se leen y se hashean una sola vez por proceso.
+
+    El texto de un prompt no cambia durante la vida del proceso, así que el
+    prefijo estático de cada llamada es idéntico byte a byte entre llamadas y
+    la caché de prompts del proveedor (Azure OpenAI, Vertex AI) puede reutilizarlo.
+    Por defecto se usa la versión más alta de cada prompt; `pins` (o
+    `REACT_AGENT_PROMPT_VERSIONS="saldo_agent=1,supervisor=2"`) fija otra.
+    """
+
+    def __init__(self, root: Path = PROMPTS_DIR, pins: Optional[Dict[str, int]] = None):
+        """Indexa las versiones de cada prompt disponibles en `root`."""
+        self.root = Path(root)
+        self.pins = dict(pins or {})
+        self._versions: Dict[str, List[int]] = {}
+        for path in sorted(self.root.glob("*.txt")):
+            match = _PROMPT_FILE.match(path.name)
+            if match:
+                self._versions.setdefault(match["name"], []).append(
+                    int(match["version"])
+                )
+        for versions in self._versions.values():
+            versions.sort()
+        self._prompts: Dict[Tuple[str, int], Prompt] = {}
+        self._lock = threading.RLock()
+
+    def names(self) -> List[str]:
+        """Nombres de los prompts disponibles."""
+        return sorted(self._versions)
+
+    def versions(self, name: str) -> List[int]:
+        """Versiones disponibles de `name`, de menor a mayor."""
+        if name not in self._versions:
+            raise KeyError(f"El prompt '{name}' no existe en {self.root}")
+        return list(self._versions[name])
+
+    def get(self, name: str, version: Optional[int] = None) -> Prompt:
+        """Devuelve el prompt `name` en la versión pedida, la fijada o la más reciente.
+
+        Args:
+            name (str): Nombre del prompt (p. ej. "saldo_agent")
+            version (int): Versión a usar; por defecto la fijada en `pins` o la más alta
+
+        Returns:
+            Prompt: Texto, versión y hash del prompt
+        """
+        available = self.versions(name)
+        if version is None:
+            version = self.pins.get(name, available[-1])
+        if version not in available:
+            raise KeyError(
+                f"El prompt '{name}' no tiene la versión {version} (hay {available})"
+            )
+        key = (name, version)
+        prompt = self._prompts.get(key)
+        if prompt is None:
+            with self._lock:
+                prompt = self._prompts.get(key)
+                if prompt is None:
+                    text = self.load_txt_prompt(
+                        str(self.root / f"{name}.v{version}.txt")
+                    )
+                    text = _INCLUDE.sub(lambda m: self.get(m["name"]).text, text)
+                    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+                    prompt = Prompt(name, version, text, digest)
+                    self._prompts[key] = prompt
+        return prompt
+
+    def text(self, name: str, version: Optional[int] = None) -> str:
+        """Atajo para `get(name, version).text`."""
+        return self.get(name, version).text
+
+    def loaded(self) -> Dict[str, str]:
+        """Prompts cargados hasta ahora y su `key` (para registrar con qué prompts corrió el proceso)."""
+        with self._lock:
+            return {
+                name: prompt.key for (name, _), prompt in sorted(self._prompts.items())
+            }
+
+
+_prompt_registry: Optional[PromptRegistry] = None
+_prompt_registry_lock = threading.Lock()
+
+
+def parse_prompt_pins(raw: str) -> Dict[str, int]:
+    """Lee las versiones fijadas de `nombre=versión,...` (p. ej. "supervisor=2,saldo_agent=1")."""
+    pins: Dict[str, int] = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, version = item.partition("=")
+        try:
+            pins[name.strip()] = int(version)
+        except ValueError:
+            raise ValueError(
+                f"REACT_AGENT_PROMPT_VERSIONS: entrada inválida {item!r}, se esperaba nombre=versión"
+            ) from None
+    return pins
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Devuelve el registro de prompts del proceso, con las versiones de `REACT_AGENT_PROMPT_VERSIONS`."""
+    global _prompt_registry
+    if _prompt_registry is None:
+        with _prompt_registry_lock:
+            if _prompt_registry is None:
+                pins = parse_prompt_pins(os.getenv("REACT_AGENT_PROMPT_VERSIONS", ""))
+                _prompt_registry = PromptRegistry(pins=pins)
+    return _prompt_registry
@@ -0,0 +1,486 @@
+"""Checkpointer durable en SQLite para el grafo.
+
+Sin checkpointer, si `saldo_agent` o el paso final del supervisor fallan, la
+reclamación completa se vuelve a ejecutar, incluidas las dos llamadas al modelo
+multimodal. `SQLiteCheckpointSaver` guarda el estado al terminar cada paso (y
+las escrituras de las tareas que sí terminaron dentro de un paso con fallos),
+de modo que una corrida fallida o interrumpida se reanuda desde el último nodo
+completado con `graph.ainvoke(None, config)` y el mismo `thread_id`.
+
+Para acotar el costo de escritura:
+
+- Solo se escriben los canales cuya versión cambió en el paso (`new_versions`);
+  el resto se reconstruye a partir de las versiones ya guardadas.
+- Los valores de los canales y las escrituras pendientes se guardan
+  direccionados por contenido (sha256 del valor serializado): un mismo blob
+  repetido entre versiones, escrituras o hilos se escribe una sola vez.
+- La metadata no guarda `writes` (una copia de las escrituras de cada paso que
+  LangGraph no vuelve a leer), salvo con `keep_metadata_writes=True`.
+- La serialización es intercambiable (`serde`, por defecto la de LangGraph).
+
+La ruta de la base se configura con la variable de entorno
+`REACT_AGENT_CHECKPOINT_DB` (por defecto `checkpoints.sqlite`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+CHECKPOINT_DB_PATH = "checkpoints.sqlite"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS checkpoints ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+    " parent_checkpoint_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL,"
+    " metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id))",
+    "CREATE TABLE IF NOT EXISTS channel_versions ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL,"
+    " version TEXT NOT NULL, digest TEXT,"
+    " PRIMARY KEY (thread_id, checkpoint_ns, channel, version))",
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    " digest TEXT PRIMARY KEY, type TEXT NOT NULL, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS writes ("
+    " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+    " task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL,"
+    " digest TEXT NOT NULL, task_path TEXT NOT NULL DEFAULT '',"
+    " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx))",
+)
+
+
+@dataclass
+class CheckpointStats:
+    """Costo acumulado de las escrituras de checkpoints."""
+
+    checkpoints: int = 0
+    writes: int = 0
+    blobs_written: int = 0
+    blobs_skipped: int = 0
+    bytes_written: int = 0
+    write_seconds: float = 0.0
+
+    @property
+    def mean_write_ms(self) -> float:
+        """Milisegundos promedio por escritura (checkpoint o escrituras de tarea)."""
+        total = self.checkpoints + self.writes
+        return 1e3 * self.write_seconds / total if total else 0.0
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """Checkpointer de LangGraph sobre SQLite con blobs deduplicados.
+
+    Usa una sola conexión en modo WAL protegida por un lock; las variantes
+    asíncronas ejecutan las consultas en un hilo para no bloquear el event
+    loop. La conexión se abre en el primer uso, no al construir el objeto.
+
+    Args:
+        path: Archivo de la base (`:memory:` para pruebas)
+        serde: Serializador de los checkpoints; por defecto el de LangGraph
+        keep_metadata_writes: Conservar `writes` en la metadata de cada checkpoint
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_DB_PATH,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        keep_metadata_writes: bool = False,
+    ):
+        """Prepara el checkpointer; la base en `path` se abre en el primer uso."""
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_metadata_writes = keep_metadata_writes
+        self.stats = CheckpointStats()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # -------------------------------
+    # Conexión
+    # -------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la conexión en el primer uso; se llama con `_lock` tomado."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    # -------------------------------
+    # Lectura
+    # -------------------------------
+    def _load_channel_values(
+        self,
+        conn: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        """Lee de `blobs` el valor de cada canal en la versión que indica el checkpoint."""
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT b.type, b.data FROM channel_versions v JOIN blobs b ON b.digest = v.digest"
+                " WHERE v.thread_id = ? AND v.checkpoint_ns = ? AND v.channel = ? AND v.version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None:
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _to_tuple(
+        self, conn: sqlite3.Connection, row: Tuple[Any, ...]
+    ) -> CheckpointTuple:
+        """Reconstruye el `CheckpointTuple` de una fila de `checkpoints` con sus canales y escrituras."""
+        (
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            parent_id,
+            type_,
+            data,
+            meta_type,
+            meta,
+        ) = row
+        checkpoint = self.serde.loads_typed((type_, data))
+        writes = conn.execute(
+            "SELECT w.task_id, w.channel, b.type, b.data FROM writes w JOIN blobs b ON b.digest = w.digest"
+            " WHERE w.thread_id = ? AND w.checkpoint_ns = ? AND w.checkpoint_id = ?"
+            " ORDER BY w.task_id, w.idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        sends = []
+        if parent_id:
+            sends = conn.execute(
+                "SELECT b.type, b.data FROM writes w JOIN blobs b ON b.digest = w.digest"
+                " WHERE w.thread_id = ? AND w.checkpoint_ns = ? AND w.checkpoint_id = ?"
+                " AND w.channel = ? ORDER BY w.task_path, w.task_id, w.idx",
+                (thread_id, checkpoint_ns, parent_id, TASKS),
+            ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=cast(
+                Checkpoint,
+                {
+                    **checkpoint,
+                    "channel_values": self._load_channel_values(
+                        conn, thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                    ),
+                    "pending_sends": [self.serde.loads_typed((t, d)) for t, d in sends],
+                },
+            ),
+            metadata=self.serde.loads_typed((meta_type, meta)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, d)))
+                for task_id, channel, t, d in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Devuelve el checkpoint pedido o, si no se indica `checkpoint_id`, el más reciente."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: Tuple[Any, ...] = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(query, params).fetchone()
+            return self._to_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Lista los checkpoints del más reciente al más antiguo."""
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT * FROM checkpoints{where} ORDER BY checkpoint_id DESC", params
+            ).fetchall()
+            results: List[CheckpointTuple] = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                item = self._to_tuple(conn, row)
+                if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                    continue
+                results.append(item)
+        yield from results
+
+    # -------------------------------
+    # Escritura
+    # -------------------------------
+    def _store_blob(self, conn: sqlite3.Connection, value: Any) -> str:
+        """Guarda `value` serializado una sola vez por contenido y devuelve su digest."""
+        type_, data = self.serde.dumps_typed(value)
+        digest = hashlib.sha256(type_.encode("utf-8") + b"\0" + data).hexdigest()
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)", (digest, type_, data)
+        ).rowcount
+        if inserted:
+            self.stats.blobs_written += 1
+            self.stats.bytes_written += len(data)
+        else:
+            self.stats.blobs_skipped += 1
+        return digest
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Guarda el checkpoint y solo los canales cuya versión cambió."""
+        start = time.perf_counter()
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)  # type: ignore[misc]
+        values: Dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        type_, data = self.serde.dumps_typed(c)
+        metadata = get_checkpoint_metadata(config, metadata)
+        if not self.keep_metadata_writes:
+            metadata = {k: v for k, v in metadata.items() if k != "writes"}  # type: ignore[assignment]
+        meta_type, meta = self.serde.dumps_typed(metadata)
+        with self._lock, self._connect() as conn:
+            for channel, version in new_versions.items():
+                digest = (
+                    self._store_blob(conn, values[channel])
+                    if channel in values
+                    else None
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO channel_versions VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), digest),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    data,
+                    meta_type,
+                    meta,
+                ),
+            )
+            self.stats.checkpoints += 1
+            self.stats.bytes_written += len(data) + len(meta)
+            self.stats.write_seconds += time.perf_counter() - start
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Guarda las escrituras de una tarea para no repetirla al reanudar."""
+        start = time.perf_counter()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Las escrituras especiales (error, interrupt...) reemplazan a las
+        # anteriores; las normales no se sobrescriben si ya existen.
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock, self._connect() as conn:
+            for idx, (channel, value) in enumerate(writes):
+                conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, idx),
+                        channel,
+                        self._store_blob(conn, value),
+                        task_path,
+                    ),
+                )
+            self.stats.writes += 1
+            self.stats.write_seconds += time.perf_counter() - start
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Elimina los checkpoints y escrituras del hilo y los blobs que quedan huérfanos."""
+        with self._lock, self._connect() as conn:
+            for table in ("checkpoints", "channel_versions", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            conn.execute(
+                "DELETE FROM blobs WHERE digest NOT IN"
+                " (SELECT digest FROM channel_versions WHERE digest IS NOT NULL"
+                " UNION SELECT digest FROM writes)"
+            )
+
+    def get_next_version(
+        self, current: Optional[str], channel: ChannelProtocol[Any, Any, Any]
+    ) -> str:
+        """Versiones ordenables como texto: contador con relleno y sufijo aleatorio."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -------------------------------
+    # Variantes asíncronas
+    # -------------------------------
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Versión asíncrona de `get_tuple`."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Versión asíncrona de `list`."""
+        items = await asyncio.to_thread(
+            lambda: [*self.list(config, filter=filter, before=before, limit=limit)]
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Versión asíncrona de `put`."""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Versión asíncrona de `put_writes`."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Versión asíncrona de `delete_thread`."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def checkpoint_stats(self) -> Dict[str, float]:
+        """Resumen del costo de escritura acumulado."""
+        return {
+            "checkpoints": self.stats.checkpoints,
+            "writes": self.stats.writes,
+            "blobs_written": self.stats.blobs_written,
+            "blobs_skipped": self.stats.blobs_skipped,
+            "bytes_written": self.stats.bytes_written,
+            "write_seconds": self.stats.write_seconds,
+            "mean_write_ms": self.stats.mean_write_ms,
+        }
+
+
+_checkpointer: Optional[SQLiteCheckpointSaver] = None
+
+
+def get_checkpointer() -> SQLiteCheckpointSaver:
+    """Devuelve el checkpointer compartido del proceso."""
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = SQLiteCheckpointSaver(
+            os.getenv("REACT_AGENT_CHECKPOINT_DB", CHECKPOINT_DB_PATH)
+        )
+    return _checkpointer
@@ -3,12 +3,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, fields
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
 from langchain_core.runnables import ensure_config
 from langgraph.config import get_config
 
 from react_agent import prompts
+from react_agent.balances import SALDOS_CSV_PATH
 
 
 @dataclass(kw_only=True)
@@ -24,13 +25,41 @@ class Configuration:
     )
 
     model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
-        default="anthropic/claude-3-5-sonnet-20240620",
+        default="azure_openai/gpt-4.1",
         metadata={
-            "description": "The name of the language model to use for the agent's main interactions. "
+            "description": "The default chat model for the supervisor, the specialist agents "
+            "and the deterministic summary (the 'default' tier). "
             "Should be in the form: provider/model-name."
         },
     )
 
+    fast_model: Annotated[str, {"__template_metadata__": {"kind": "llm"}}] = field(
+        default="azure_openai/gpt-4.1-mini",
+        metadata={
+            "description": "The small/fast chat model of the 'fast' tier, meant for routing-only "
+            "agents whose tools take no arguments (cedula, registraduría, defunción). "
+            "Should be in the form: provider/model-name."
+        },
+    )
+
+    agent_models: dict[str, str] = field(
+        default_factory=dict,
+        metadata={
+            "description": "Per-agent model selection: agent name ('supervisor', 'cedula_agent', "
+            "'registraduria_agent', 'defuncion_agent', 'saldo_agent') to a tier ('default' or "
+            "'fast') or to a provider/model-name, e.g. {'registraduria_agent': 'fast'}. "
+            "Agents not listed use 'model'."
+        },
+    )
+
+    extraction_model: str = field(
+        default="gemini-2.5-flash-preview-04-17",
+        metadata={
+            "description": "The Vertex AI multimodal model that reads the cédula and the death "
+            "certificate when the text layer is not enough."
+        },
+    )
+
     max_search_results: int = field(
         default=10,
         metadata={
@@ -38,6 +67,141 @@ class Configuration:
         },
     )
 
+    pipeline_mode: Literal["supervisor", "deterministic"] = field(
+        default="supervisor",
+        metadata={
+            "description": "How the claim steps are orchestrated. 'supervisor' lets the "
+            "supervisor LLM decide every handoff; 'deterministic' runs the fixed "
+            "cedula -> registraduría -> defunción -> saldo sequence with plain edges "
+            "and uses a single LLM call for the final summary."
+        },
+    )
+
+    priority: Literal["interactive", "batch"] = field(
+        default="interactive",
+        metadata={
+            "description": "Scheduling lane of the run's model calls. When a provider is "
+            "saturated, queued 'interactive' calls start before 'batch' ones. The batch "
+            "processor uses 'batch'; per-model limits come from REACT_AGENT_RATE_LIMITS."
+        },
+    )
+
+    deadline: float = field(
+        default=0.0,
+        metadata={
+            "description": "Absolute UNIX time (seconds) by which the run must finish. Every "
+            "agent node, tool and model call is bounded by the time left and fails with "
+            "DeadlineExceeded once it passes. 0 disables it; the batch processor sets it "
+            "from --timeout."
+        },
+    )
+
+    hedge_extractions: bool = field(
+        default=False,
+        metadata={
+            "description": "Send a second, identical multimodal extraction request when the "
+            "first one is slower than 'hedge_quantile' of the recent extraction latencies, "
+            "and keep whichever answers first."
+        },
+    )
+
+    hedge_quantile: float = field(
+        default=0.95,
+        metadata={
+            "description": "Latency quantile (0-1) after which a hedged extraction request is sent."
+        },
+    )
+
+    context_max_tokens: int = field(
+        default=0,
+        metadata={
+            "description": "Upper bound on the approximate number of history tokens each agent "
+            "sends to its model. Older messages beyond the budget are condensed into a "
+            "summary. 0 keeps the per-agent defaults from react_agent.context."
+        },
+    )
+
+    cedula_pdf_path: str = field(
+        default="/home/jssaa/proyectos/react-agent/src/doc_pruebas/Cedula_seb.pdf",
+        metadata={
+            "description": "Path to the claimant's identity document (cédula) PDF."
+        },
+    )
+
+    defuncion_pdf_path: str = field(
+        default="/home/jssaa/proyectos/react-agent/src/doc_pruebas/CER_DEFUNCION.pdf",
+        metadata={"description": "Path to the death certificate PDF."},
+    )
+
+    saldos_csv_path: str = field(
+        default=SALDOS_CSV_PATH,
+        metadata={
+            "description": "Path to the balances dataset queried by saldo_tool: the CSV, loaded "
+            "into memory, or a .sqlite file built with `python -m react_agent.balances`, "
+            "queried on disk."
+        },
+    )
+
+    memoized_tools: list[str] = field(
+        default_factory=list,
+        metadata={
+            "description": "Tools whose results are memoized by input hash, prompt version and "
+            "model name (e.g. ['cedula_tool', 'fecha_defuncion_tool', 'registraduria_tool']). "
+            "The backend is chosen with the TOOL_MEMO_* environment variables."
+        },
+    )
+
+    image_preparation: dict[str, dict[str, Any]] = field(
+        default_factory=dict,
+        metadata={
+            "description": "Per document type ('cedula', 'defuncion') overrides of the image "
+            "preparation profile sent to the multimodal model, e.g. "
+            "{'defuncion': {'dpi': 150, 'grayscale': True, 'max_bytes': 150000}}. "
+            "See react_agent.rendering.RenderSettings for the available fields."
+        },
+    )
+
+    text_fast_path: bool = field(
+        default=True,
+        metadata={
+            "description": "Try to read the cédula number and the date of death from the PDF "
+            "text layer before rasterizing and calling the multimodal model."
+        },
+    )
+
+    render_backend: Literal["thread", "process"] = field(
+        default="thread",
+        metadata={
+            "description": "Where the extraction tools rasterize and encode PDF pages. 'thread' "
+            "renders in a worker thread of this process; 'process' uses a warm pool of "
+            "processes sized to the available cores (REACT_AGENT_RENDER_WORKERS), returning "
+            "images through shared memory, so concurrent claims are not limited by the GIL."
+        },
+    )
+
+    max_pages_sent: int = field(
+        default=3,
+        metadata={
+            "description": "Maximum number of pages of one document sent to the multimodal "
+            "model. Pages are tried in classification order (text-layer keywords, then "
+            "non-blank scanned pages) and the search stops as soon as the field is found."
+        },
+    )
+
+    text_fast_path_min_confidence: float = field(
+        default=0.9,
+        metadata={
+            "description": "Minimum parser confidence (0-1) to accept a value read from the "
+            "text layer; below it the multimodal model is used."
+        },
+    )
+
+    def model_for(self, agent_name: str) -> str:
+        """Resolve the provider/model-name used by `agent_name`."""
+        choice = self.agent_models.get(agent_name, "default")
+        tiers = {"default": self.model, "fast": self.fast_model}
+        return tiers.get(choice, choice)
+
     @classmethod
     def from_context(cls) -> Configuration:
         """Create a Configuration instance from a RunnableConfig object."""
@@ -0,0 +1,243 @@
+"""Alcance y recorte del contexto que recibe cada agente.
+
+En lugar de pasar el historial completo en cada transferencia, cada agente tiene
+una `ContextPolicy` que define qué mensajes necesita y con qué presupuesto de
+tokens se envían al modelo. Lo que no cabe en el presupuesto se condensa en un
+resumen con los resultados ya obtenidos.
+
+Los datos que escriben las herramientas (cédula, fecha de defunción, saldo...)
+viajan como campos del estado; cada agente recibe los que su política pide en
+un mensaje corto en lugar de buscarlos en el historial.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+
+from react_agent.configuration import Configuration
+from react_agent.state import CLAIM_FIELDS, claim_fields
+from react_agent.utils import get_message_text
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    """Qué parte del historial recibe un agente y con qué presupuesto."""
+
+    sources: Tuple[str, ...] = ()
+    """Agentes o herramientas cuyos mensajes se incluyen; `("*",)` incluye todo."""
+
+    include_user: bool = True
+    """Incluir el último mensaje del usuario."""
+
+    max_tokens: int = 6000
+    """Presupuesto aproximado de tokens de historial por llamada al modelo."""
+
+    summarize: bool = True
+    """Condensar en un resumen los mensajes que quedan fuera del presupuesto."""
+
+    summary_chars: int = 300
+    """Caracteres máximos por resultado dentro del resumen."""
+
+    fields: Tuple[str, ...] = ()
+    """Campos de la reclamación (`state.CLAIM_FIELDS`) que recibe el agente."""
+
+
+CONTEXT_POLICIES: Dict[str, ContextPolicy] = {
+    # Los agentes de extracción no necesitan historial: sus herramientas leen
+    # los documentos directamente.
+    "cedula_agent": ContextPolicy(max_tokens=2000),
+    "registraduria_agent": ContextPolicy(max_tokens=2000),
+    "defuncion_agent": ContextPolicy(max_tokens=2000),
+    # El agente de saldo solo necesita la cédula y la fecha de defunción extraídas,
+    # que recibe como campos; no necesita los mensajes de los otros agentes.
+    "saldo_agent": ContextPolicy(max_tokens=2000, fields=("cedula", "fecha_defuncion")),
+    "supervisor": ContextPolicy(sources=("*",), fields=CLAIM_FIELDS),
+}
+
+
+def get_context_policy(agent_name: str) -> ContextPolicy:
+    """Devuelve la política del agente, con el presupuesto de `Configuration` si se definió."""
+    policy = CONTEXT_POLICIES.get(agent_name, ContextPolicy(sources=("*",)))
+    max_tokens = Configuration.from_context().context_max_tokens
+    if max_tokens:
+        policy = replace(policy, max_tokens=min(policy.max_tokens, max_tokens))
+    return policy
+
+
+def _source(message: AnyMessage) -> str:
+    return getattr(message, "name", None) or ""
+
+
+def scope_messages(
+    messages: Sequence[AnyMessage], policy: ContextPolicy
+) -> List[AnyMessage]:
+    """Selecciona los mensajes que el agente necesita según su política.
+
+    Siempre se incluye el último turno del supervisor (el mensaje que pide la
+    transferencia), ya que sus tool_calls deben quedar respondidos. Los mensajes
+    se referencian, no se copian.
+
+    Args:
+        messages: Historial completo
+        policy: Política de contexto del agente
+
+    Returns:
+        list: Mensajes seleccionados, en el orden original
+    """
+    if "*" in policy.sources:
+        return list(messages)
+
+    last_index = len(messages) - 1
+    last_human = -1
+    if policy.include_user:
+        for i in range(last_index, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                last_human = i
+                break
+
+    selected = []
+    for i, message in enumerate(messages):
+        if i == last_index or i == last_human:
+            selected.append(message)
+        elif policy.sources and _source(message) in policy.sources:
+            if isinstance(message, ToolMessage) or not getattr(
+                message, "tool_calls", None
+            ):
+                selected.append(message)
+    return selected
+
+
+def _units(messages: Sequence[AnyMessage]) -> List[List[AnyMessage]]:
+    """Agrupa cada AIMessage con tool_calls junto con sus ToolMessage de respuesta."""
+    units: List[List[AnyMessage]] = []
+    for message in messages:
+        if (
+            isinstance(message, ToolMessage)
+            and units
+            and (isinstance(units[-1][0], AIMessage) and units[-1][0].tool_calls)
+        ):
+            units[-1].append(message)
+        else:
+            units.append([message])
+    return units
+
+
+def _summary(messages: Sequence[AnyMessage], policy: ContextPolicy) -> HumanMessage:
+    lines = []
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            continue
+        text = get_message_text(message).strip()
+        if not text or text.startswith("Transferido a "):
+            continue
+        source = _source(message) or message.type
+        lines.append(f"- {source}: {text[: policy.summary_chars]}")
+    return HumanMessage(
+        content="Resumen del contexto anterior (resultados ya obtenidos):\n"
+        + "\n".join(lines)
+    )
+
+
+FIELD_LABELS: Dict[str, str] = {
+    "cedula": "Número de documento",
+    "estado_registraduria": "Estado en la registraduría",
+    "fecha_defuncion": "Fecha de defunción (fecha de siniestro)",
+    "saldo": "Información del producto",
+    "elegibilidad": "Evaluación de las reglas (motor de reglas)",
+}
+
+
+def describe_field(name: str, value: Any) -> str:
+    """Texto de un campo de la reclamación para incluirlo en un prompt."""
+    if value is None:
+        return "no disponible"
+    if name == "saldo":
+        return (
+            f"producto {value['producto']}, saldo {value['saldo']}, fecha de desembolso "
+            f"{value['fecha_desembolso']}, monto de desembolso {value['monto_desembolso']}"
+        )
+    if name == "elegibilidad":
+        return str(value["texto"])
+    return str(value)
+
+
+def fields_message(state: Any, policy: ContextPolicy) -> Optional[HumanMessage]:
+    """Mensaje con los campos de la reclamación que pide la política (None si no se conoce ninguno).
+
+    Es un `HumanMessage` y no un `SystemMessage`: Vertex Gemini y Anthropic
+    solo aceptan un mensaje de sistema, y debe ser el primero.
+    """
+    known = claim_fields(state)
+    if not any(name in known for name in policy.fields):
+        return None
+    lines = [
+        f"- {FIELD_LABELS[name]}: {describe_field(name, known.get(name))}"
+        for name in policy.fields
+    ]
+    return HumanMessage(
+        content="Datos de la reclamación ya obtenidos (no los busques en el historial):\n"
+        + "\n".join(lines)
+    )
+
+
+def trim_messages_to_budget(
+    messages: Sequence[AnyMessage], policy: ContextPolicy
+) -> List[AnyMessage]:
+    """Conserva los mensajes más recientes que caben en el presupuesto de tokens.
+
+    El recorte respeta los pares tool_call/ToolMessage para que el historial
+    enviado al modelo siga siendo válido. Si la política lo pide, lo recortado
+    se reemplaza por un resumen de los resultados ya obtenidos, que va como
+    `HumanMessage` al inicio de lo conservado (el único mensaje de sistema es el
+    prompt del agente).
+    """
+    if count_tokens_approximately(messages) <= policy.max_tokens:
+        return list(messages)
+
+    units = _units(messages)
+    kept: List[List[AnyMessage]] = []
+    used = 0
+    for unit in reversed(units):
+        cost = count_tokens_approximately(unit)
+        if kept and used + cost > policy.max_tokens:
+            break
+        kept.append(unit)
+        used += cost
+    kept.reverse()
+
+    dropped_count = len(units) - len(kept)
+    trimmed = [message for unit in kept for message in unit]
+    if policy.summarize and dropped_count:
+        dropped = [message for unit in units[:dropped_count] for message in unit]
+        trimmed.insert(0, _summary(dropped, policy))
+    return trimmed
+
+
+def make_pre_model_hook(agent_name: str) -> Callable[[Any], Dict[str, Any]]:
+    """Crea el `pre_model_hook` de `create_react_agent` para un agente.
+
+    El hook no modifica el estado: entrega al modelo, a través de
+    `llm_input_messages`, el historial acotado por la política del agente y al
+    final los campos de la reclamación que pide. `create_react_agent` antepone
+    el prompt estático del agente, que queda como único `SystemMessage`; como
+    los campos cambian de un turno a otro van al final, en un `HumanMessage`,
+    para no romper el prefijo que reutiliza la caché de prompts del proveedor.
+    """
+
+    def pre_model_hook(state: Any) -> Dict[str, Any]:
+        messages = state["messages"] if isinstance(state, dict) else state.messages
+        policy = get_context_policy(agent_name)
+        trimmed = trim_messages_to_budget(messages, policy)
+        known = fields_message(state, policy)
+        return {"llm_input_messages": [*trimmed, known] if known else trimmed}
+
+    return pre_model_hook
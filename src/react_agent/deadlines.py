@@ -0,0 +1,201 @@
+"""Plazos por reclamación y solicitudes de respaldo (hedging).
+
+Una sola llamada lenta a Vertex AI o Azure OpenAI detenía la reclamación
+completa sin límite de tiempo. `Configuration.deadline` lleva por la
+configuración del grafo el instante (UNIX, en segundos) en que la reclamación
+debe terminar, y cada nodo de agente, herramienta y llamada a modelo se acota
+con el tiempo restante (`with_deadline`), lanzando `DeadlineExceeded` al vencer.
+
+Para las extracciones, que son idempotentes, `hedged` lanza una segunda
+solicitud si la primera no respondió tras el percentil p95 de las latencias
+observadas, y se queda con la primera respuesta; así el p99 sigue al caso
+típico y no al peor atípico.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """El plazo de la reclamación venció antes de terminar la operación."""
+
+
+# -------------------------------
+# Plazos
+# -------------------------------
+def current_deadline() -> Optional[float]:
+    """Instante límite de la corrida actual, o None si no tiene plazo."""
+    from react_agent.configuration import Configuration
+
+    return Configuration.from_context().deadline or None
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """Segundos restantes hasta `deadline` (por defecto el de la corrida actual)."""
+    deadline = deadline if deadline is not None else current_deadline()
+    return None if deadline is None else deadline - time.time()
+
+
+async def with_deadline(awaitable: Awaitable[T], what: str) -> T:
+    """Espera `awaitable` como máximo el tiempo que le queda a la corrida.
+
+    Args:
+        awaitable: Operación a acotar
+        what: Nombre de la operación, para el mensaje de error
+
+    Raises:
+        DeadlineExceeded: Si el plazo vence antes de que termine
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"{what}: el plazo de la reclamación ya venció")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except TimeoutError as e:
+        if isinstance(e, DeadlineExceeded):
+            raise
+        raise DeadlineExceeded(
+            f"{what}: el plazo de la reclamación venció tras {left:.1f}s"
+        ) from e
+
+
+def deadline_bound(
+    what: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decora una función asíncrona para que respete el plazo de la corrida."""
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await with_deadline(func(*args, **kwargs), what)
+
+        return wrapper
+
+    return decorator
+
+
+# -------------------------------
+# Hedging
+# -------------------------------
+class LatencyTracker:
+    """Ventana de latencias recientes por llave, para calcular el retraso del respaldo."""
+
+    def __init__(self, window: int = 200):
+        """Crea el registro con una ventana de `window` latencias por llave."""
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.hedges: Dict[str, int] = {}
+        self.hedge_wins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, seconds: float) -> None:
+        """Registra la latencia de una llamada exitosa."""
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, key: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """Cuantil `q` (0-1) de las latencias de `key`, o None si hay pocas muestras."""
+        with self._lock:
+            values = sorted(self._latencies.get(key, ()))
+        if len(values) < min_samples:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Respaldos lanzados y ganados por llave, con el p95 actual."""
+        return {
+            key: {
+                "samples": len(values),
+                "p95_s": self.quantile(key, 0.95, min_samples=1) or 0.0,
+                "hedges": self.hedges.get(key, 0),
+                "hedge_wins": self.hedge_wins.get(key, 0),
+            }
+            for key, values in self._latencies.items()
+        }
+
+
+async def _observed(
+    fn: Callable[[], Awaitable[T]], key: str, tracker: LatencyTracker
+) -> T:
+    start = time.perf_counter()
+    result = await fn()
+    tracker.observe(key, time.perf_counter() - start)
+    return result
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[T]],
+    key: str,
+    quantile: float = 0.95,
+    min_samples: int = 20,
+    tracker: Optional[LatencyTracker] = None,
+) -> T:
+    """Ejecuta `fn` y, si tarda más que el cuantil observado, lanza una segunda solicitud.
+
+    Solo debe usarse con operaciones idempotentes. Se devuelve la primera
+    respuesta exitosa y se cancela la otra; si ambas fallan se propaga el
+    último error. Hasta tener `min_samples` latencias no se lanza respaldo.
+
+    Args:
+        fn: Fábrica de la corrutina (se llama una vez por solicitud)
+        key: Llave de las latencias (p. ej. el modelo y el tipo de documento)
+        quantile: Cuantil de latencia tras el cual se lanza el respaldo
+        min_samples: Muestras necesarias antes de empezar a respaldar
+        tracker: Registro de latencias; por defecto el del proceso
+
+    Returns:
+        El resultado de la primera solicitud que termine bien
+    """
+    tracker = tracker or get_latency_tracker()
+    delay = tracker.quantile(key, quantile, min_samples)
+    primary = asyncio.ensure_future(_observed(fn, key, tracker))
+    pending = {primary}
+    try:
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        backup = asyncio.ensure_future(_observed(fn, key, tracker))
+        pending.add(backup)
+        tracker.hedges[key] = tracker.hedges.get(key, 0) + 1
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        tracker.hedge_wins[key] = tracker.hedge_wins.get(key, 0) + 1
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Devuelve el registro de latencias compartido del proceso."""
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker()
+    return _tracker
@@ -3,31 +3,43 @@
 Works with a chat model with tool calling support.
 """
 
-from datetime import UTC, datetime
-from typing import Dict, List, Literal, cast
+from collections.abc import Hashable
 
-from langchain_core.messages import AIMessage
 from langgraph.graph import StateGraph
-from langgraph.prebuilt import ToolNode
 
+from react_agent.checkpoint import get_checkpointer
 from react_agent.configuration import Configuration
-from react_agent.state import  State, InputState
-from react_agent.utils import load_chat_model
-from react_agent.nodes import supervisor_agent, cedula_agent, registraduria_agent, defuncion_agent, saldo_agent
-
+from react_agent.instrumentation import instrument
+from react_agent.nodes import agent_node
+from react_agent.pipeline import pipeline_graph
+from react_agent.state import InputState, State
+from react_agent.tools import HANDOFF_TOOL_NAMES
 
 builder = StateGraph(State, input=InputState)
 
 
 # Define the two nodes we will cycle between
-builder.add_node("supervisor", supervisor_agent)
-builder.add_node("cedula_agent", cedula_agent)
-builder.add_node("registraduria_agent", registraduria_agent)
-builder.add_node("defuncion_agent", defuncion_agent)
-builder.add_node("saldo_agent", saldo_agent)
-
-def supervisor_routing(state: State) -> str:
-    """Determina a qué agente transferir según el tool_call del supervisor."""
+builder.add_node("supervisor", agent_node("supervisor"))
+builder.add_node("cedula_agent", agent_node("cedula_agent"))
+builder.add_node("registraduria_agent", agent_node("registraduria_agent"))
+builder.add_node("defuncion_agent", agent_node("defuncion_agent"))
+builder.add_node("saldo_agent", agent_node("saldo_agent"))
+builder.add_node("pipeline", pipeline_graph)
+
+
+def route_mode(state: State) -> str:
+    """Elige entre el supervisor y el modo determinista según `pipeline_mode`."""
+    if Configuration.from_context().pipeline_mode == "deterministic":
+        return "pipeline"
+    return "supervisor"
+
+
+def supervisor_routing(state: State) -> str | list[Hashable]:
+    """Determina a qué agentes transferir según los tool_calls del supervisor.
+
+    El supervisor puede pedir varias transferencias en el mismo turno; se
+    devuelven todos los destinos para que los agentes corran en paralelo.
+    """
     # Protección: verificar que existan mensajes
 
     if not state.messages:
@@ -38,27 +50,27 @@ def supervisor_routing(state: State) -> str:
     if not hasattr(last, "tool_calls") or not last.tool_calls:
         return "__end__"
 
-    tool_call = last.tool_calls[0]  # Solo se espera una herramienta por llamada
-    tool_name = tool_call.name
-
-    if tool_name == "transfer_to_cedula":
-        return "cedula_agent"
-    elif tool_name == "transfer_to_registraduria":
-        return "registraduria_agent"
-    elif tool_name == "transfer_to_defuncion":
-        return "defuncion_agent"
-    elif tool_name == "transfer_to_saldo":
-        return "saldo_agent"
-    else:
-        return "__end__"
+    destinos: list[Hashable] = [
+        tool_call["name"].removeprefix("transfer_to_")
+        for tool_call in last.tool_calls
+        if tool_call["name"] in HANDOFF_TOOL_NAMES
+    ]
+    return destinos or "__end__"
+
 
 # Set up the edges
-builder.add_edge("__start__",  "supervisor")
+builder.add_conditional_edges("__start__", route_mode, ["supervisor", "pipeline"])
+builder.add_edge("pipeline", "__end__")
 builder.add_conditional_edges("supervisor", supervisor_routing)
 builder.add_edge("cedula_agent", "supervisor")
 builder.add_edge("registraduria_agent", "supervisor")
 builder.add_edge("defuncion_agent", "supervisor")
 builder.add_edge("saldo_agent", "supervisor")
 
-# Compile the graph
-graph = builder.compile()
+# Compile the graph (with the per-node/tool/model metrics callback attached)
+graph = instrument(builder.compile())
+
+# Same graph with a durable SQLite checkpointer: a failed or interrupted claim
+# resumes from the last completed node when re-invoked with its thread_id.
+# `graph` stays without one because the LangGraph server provides its own.
+durable_graph = instrument(builder.compile(checkpointer=get_checkpointer()))
@@ -0,0 +1,595 @@
+"""Métricas de latencia, tokens y errores por nodo, herramienta y modelo.
+
+`InstrumentationHandler` es un callback de LangChain que se adjunta al grafo
+compilado (`instrument(graph)`) y registra, para cada nodo de `graph.py`
+(incluidos los nodos internos de cada agente), cada herramienta de `tools.py` y
+cada llamada a un modelo:
+
+- tiempo de pared y errores;
+- tiempo en cola: para un nodo, lo que esperó desde que terminó el paso
+  anterior del mismo grafo (o desde que arrancó el grafo) hasta empezar;
+- tokens de entrada y salida (modelos), y cuántos de entrada salieron de la
+  caché de prompts del proveedor; las llamadas a modelos se registran además
+  por agente (tipo `agent`, p. ej. `saldo_agent/agent`) para ver qué parte de
+  los tokens de cada uno reutiliza el prefijo estático;
+- bytes de la carga enviada y recibida.
+
+Las etapas de CPU (render y codificación de PDF) se miden con `timed`. Todo se
+acumula en un registro del proceso (`get_metrics()`) que se exporta en
+formato de texto de Prometheus o como resumen JSON, junto con las estadísticas
+que registran otros componentes con `register_collector` (memoización,
+caché de rasterización, planificador). El costo por evento es una
+lectura de reloj y una actualización de contadores bajo un lock, por lo que
+puede quedar activo en producción; `REACT_AGENT_METRICS=0` lo desactiva.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Estadísticas de un componente por nombre (p. ej. por herramienta o por llave)
+Collector = Callable[[], Dict[str, Dict[str, Any]]]
+
+BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+@dataclass
+class _Histogram:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    recent: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+@dataclass
+class SeriesMetrics:
+    """Métricas acumuladas de un nodo, herramienta, modelo o etapa."""
+
+    duration: _Histogram = field(default_factory=_Histogram)
+    queue: _Histogram = field(default_factory=_Histogram)
+    errors: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    tokens_cached: int = 0
+    payload_bytes_in: int = 0
+    payload_bytes_out: int = 0
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso, indexado por `(tipo, nombre)`."""
+
+    def __init__(self) -> None:
+        """Crea un registro vacío."""
+        self._series: Dict[Tuple[str, str], SeriesMetrics] = {}
+        self._collectors: Dict[str, Collector] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str) -> SeriesMetrics:
+        series = self._series.get((kind, name))
+        if series is None:
+            series = self._series.setdefault((kind, name), SeriesMetrics())
+        return series
+
+    def observe(
+        self,
+        kind: str,
+        name: str,
+        seconds: float,
+        *,
+        error: bool = False,
+        queue_seconds: Optional[float] = None,
+        tokens_in: int = 0,
+        tokens_out: int = 0,
+        tokens_cached: int = 0,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        """Registra una ejecución terminada."""
+        with self._lock:
+            series = self._get(kind, name)
+            series.duration.observe(seconds)
+            if queue_seconds is not None:
+                series.queue.observe(queue_seconds)
+            series.errors += int(error)
+            series.tokens_in += tokens_in
+            series.tokens_out += tokens_out
+            series.tokens_cached += tokens_cached
+            series.payload_bytes_in += bytes_in
+            series.payload_bytes_out += bytes_out
+
+    def observe_queue(self, kind: str, name: str, seconds: float) -> None:
+        """Registra una espera en cola medida fuera del callback (p. ej. un limitador)."""
+        with self._lock:
+            self._get(kind, name).queue.observe(seconds)
+
+    def reset(self) -> None:
+        """Elimina todas las métricas."""
+        with self._lock:
+            self._series.clear()
+
+    def register_collector(self, kind: str, collect: Collector) -> None:
+        """Exporta bajo el tipo `kind` las estadísticas que devuelve `collect` en cada lectura.
+
+        Los componentes con contadores propios (p. ej. la memoización) se
+        registran así en lugar de duplicarlos en el registro.
+        """
+        with self._lock:
+            self._collectors[kind] = collect
+
+    def collected(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Estadísticas actuales de los componentes registrados, por tipo y nombre."""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        return {kind: collect() for kind, collect in collectors}
+
+    # -------------------------------
+    # Exportación
+    # -------------------------------
+    def summary(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Resumen por tipo y nombre: llamadas, errores, latencias, cola, tokens y bytes.
+
+        `cached_ratio` es la fracción de los tokens de entrada que el proveedor
+        leyó de su caché de prompts.
+        """
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            for (kind, name), s in sorted(self._series.items()):
+                d = s.duration
+                out.setdefault(kind, {})[name] = {
+                    "calls": d.count,
+                    "errors": s.errors,
+                    "total_s": round(d.total, 6),
+                    "mean_s": round(d.total / d.count, 6) if d.count else 0.0,
+                    "p50_s": round(d.percentile(50), 6),
+                    "p95_s": round(d.percentile(95), 6),
+                    "max_s": round(d.max, 6),
+                    "queue_mean_s": round(s.queue.total / s.queue.count, 6)
+                    if s.queue.count
+                    else 0.0,
+                    "queue_p95_s": round(s.queue.percentile(95), 6),
+                    "tokens_in": s.tokens_in,
+                    "tokens_out": s.tokens_out,
+                    "tokens_cached": s.tokens_cached,
+                    "cached_ratio": round(s.tokens_cached / s.tokens_in, 4)
+                    if s.tokens_in
+                    else 0.0,
+                    "payload_bytes_in": s.payload_bytes_in,
+                    "payload_bytes_out": s.payload_bytes_out,
+                }
+        for kind, stats in self.collected().items():
+            out.setdefault(kind, {}).update(stats)
+        return out
+
+    def to_json(self) -> str:
+        """Resumen en JSON."""
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = "react_agent") -> str:
+        """Exporta las métricas en el formato de texto de Prometheus."""
+
+        def labels(kind: str, name: str, **extra: str) -> str:
+            pairs = {"kind": kind, "name": name, **extra}
+            body = ",".join(
+                '{}="{}"'.format(
+                    k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                )
+                for k, v in pairs.items()
+            )
+            return "{" + body + "}"
+
+        def histogram(
+            lines: List[str], metric: str, kind: str, name: str, h: _Histogram
+        ) -> None:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, h.buckets):
+                cumulative += count
+                lines.append(
+                    f"{metric}_bucket{labels(kind, name, le=str(bound))} {cumulative}"
+                )
+            lines.append(f"{metric}_bucket{labels(kind, name, le='+Inf')} {h.count}")
+            lines.append(f"{metric}_sum{labels(kind, name)} {h.total}")
+            lines.append(f"{metric}_count{labels(kind, name)} {h.count}")
+
+        with self._lock:
+            items = sorted(self._series.items())
+            duration = [f"# TYPE {prefix}_duration_seconds histogram"]
+            queue = [f"# TYPE {prefix}_queue_seconds histogram"]
+            errors = [f"# TYPE {prefix}_errors_total counter"]
+            tokens = [f"# TYPE {prefix}_tokens_total counter"]
+            payload = [f"# TYPE {prefix}_payload_bytes_total counter"]
+            components = [f"# TYPE {prefix}_component gauge"]
+            for (kind, name), s in items:
+                histogram(
+                    duration, f"{prefix}_duration_seconds", kind, name, s.duration
+                )
+                if s.queue.count:
+                    histogram(queue, f"{prefix}_queue_seconds", kind, name, s.queue)
+                errors.append(f"{prefix}_errors_total{labels(kind, name)} {s.errors}")
+                if s.tokens_in or s.tokens_out:
+                    tokens.append(
+                        f"{prefix}_tokens_total{labels(kind, name, direction='in')} {s.tokens_in}"
+                    )
+                    tokens.append(
+                        f"{prefix}_tokens_total{labels(kind, name, direction='out')} {s.tokens_out}"
+                    )
+                    tokens.append(
+                        f"{prefix}_tokens_total{labels(kind, name, direction='cached')} {s.tokens_cached}"
+                    )
+                if s.payload_bytes_in or s.payload_bytes_out:
+                    payload.append(
+                        f"{prefix}_payload_bytes_total{labels(kind, name, direction='in')} {s.payload_bytes_in}"
+                    )
+                    payload.append(
+                        f"{prefix}_payload_bytes_total{labels(kind, name, direction='out')} {s.payload_bytes_out}"
+                    )
+        for kind, stats in self.collected().items():
+            for name, values in sorted(stats.items()):
+                for stat, value in values.items():
+                    if isinstance(value, (int, float)):
+                        components.append(
+                            f"{prefix}_component{labels(kind, name, stat=stat)} {value}"
+                        )
+        return (
+            "\n".join(duration + queue + errors + tokens + payload + components) + "\n"
+        )
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Devuelve el registro de métricas compartido del proceso."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
+
+
+def metrics_enabled() -> bool:
+    """Indica si la instrumentación está activa (`REACT_AGENT_METRICS`, activa por defecto)."""
+    return os.getenv("REACT_AGENT_METRICS", "1") not in ("0", "false", "False")
+
+
+@contextmanager
+def timed(kind: str, name: str) -> Iterator[None]:
+    """Mide el bloque y lo registra como una ejecución de `(kind, name)`."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        if metrics_enabled():
+            get_metrics().observe(kind, name, time.perf_counter() - start, error=error)
+
+
+# -------------------------------
+# Callback de LangChain
+# -------------------------------
+def _node_path(metadata: Dict[str, Any]) -> str:
+    """`cedula_agent:<id>|agent:<id>` -> `cedula_agent/agent`."""
+    namespace = metadata.get("langgraph_checkpoint_ns") or metadata.get(
+        "langgraph_node", ""
+    )
+    return "/".join(part.split(":", 1)[0] for part in namespace.split("|") if part)
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    content = getattr(value, "content", None)
+    if content is not None:
+        return len(content) if isinstance(content, str) else len(str(content))
+    return len(str(value))
+
+
+def _is_control_flow(error: BaseException) -> bool:
+    # Las transferencias (`Command.PARENT`) y las interrupciones no son errores
+    from langgraph.errors import GraphBubbleUp
+
+    return isinstance(error, GraphBubbleUp)
+
+
+@dataclass
+class _Run:
+    kind: str
+    name: str
+    start: float
+    queue_seconds: Optional[float] = None
+    bytes_in: int = 0
+    agent: Optional[str] = None
+
+
+class InstrumentationHandler(BaseCallbackHandler):
+    """Callback que registra nodos, herramientas y modelos en un `MetricsRegistry`."""
+
+    run_inline = True
+    raise_error = False
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        """Crea el callback; por defecto escribe en el registro del proceso."""
+        self.registry = registry or get_metrics()
+        self._runs: Dict[UUID, _Run] = {}
+        self._chain_starts: Dict[UUID, float] = {}
+        self._last_step_end: Dict[UUID, float] = {}
+        self._node_paths: Dict[UUID, str] = {}
+        self._seen_tasks: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _finish(self, run_id: UUID, error: bool = False, **extra: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        seconds = time.perf_counter() - run.start
+        self.registry.observe(
+            run.kind,
+            run.name,
+            seconds,
+            error=error,
+            queue_seconds=run.queue_seconds,
+            bytes_in=run.bytes_in,
+            **extra,
+        )
+        if run.agent:
+            # La misma llamada al modelo, acumulada por el nodo que la hizo
+            self.registry.observe(
+                "agent", run.agent, seconds, error=error, bytes_in=run.bytes_in, **extra
+            )
+
+    # Nodos del grafo
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Abre la medición de un nodo del grafo y calcula su tiempo en cola."""
+        now = time.perf_counter()
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        with self._lock:
+            self._chain_starts[run_id] = now
+            if not node or kwargs.get("name") != node:
+                return
+            # Una tarea del grafo puede abrir varios runs con el mismo nombre (el
+            # nodo, el envoltorio del agente y su subgrafo): se cuenta una vez
+            namespace = metadata.get("langgraph_checkpoint_ns")
+            if namespace:
+                if namespace in self._seen_tasks:
+                    return
+                self._seen_tasks[namespace] = None
+                if len(self._seen_tasks) > 4096:
+                    self._seen_tasks.popitem(last=False)
+            path = _node_path(metadata)
+            self._node_paths[run_id] = path
+            queue_seconds = None
+            if parent_run_id is not None:
+                ready = self._last_step_end.get(
+                    parent_run_id, self._chain_starts.get(parent_run_id)
+                )
+                if ready is not None:
+                    queue_seconds = max(0.0, now - ready)
+            self._runs[run_id] = _Run("node", path, now, queue_seconds)
+
+    def _end_chain(
+        self, run_id: UUID, parent_run_id: Optional[UUID], error: bool
+    ) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._chain_starts.pop(run_id, None)
+            self._last_step_end.pop(run_id, None)
+            if (
+                self._node_paths.pop(run_id, None) is not None
+                and parent_run_id is not None
+            ):
+                self._last_step_end[parent_run_id] = now
+        self._finish(run_id, error=error)
+
+    def on_chain_end(
+        self,
+        outputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Cierra la medición del nodo."""
+        self._end_chain(run_id, parent_run_id, error=False)
+
+    def on_chain_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Cierra la medición del nodo; las señales de control de LangGraph no cuentan como error."""
+        self._end_chain(run_id, parent_run_id, error=not _is_control_flow(error))
+
+    # Herramientas
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Abre la medición de una herramienta con el tamaño de su entrada."""
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        with self._lock:
+            self._runs[run_id] = _Run(
+                "tool", name, time.perf_counter(), bytes_in=_size(input_str)
+            )
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Cierra la medición de la herramienta con el tamaño de su salida."""
+        self._finish(run_id, bytes_out=_size(output))
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Cierra la medición de la herramienta como error (salvo señales de control)."""
+        self._finish(run_id, error=not _is_control_flow(error))
+
+    # Modelos
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Abre la medición de una llamada a un modelo de chat y del agente que la hizo."""
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        name = (
+            metadata.get("ls_model_name")
+            or params.get("model_name")
+            or params.get("model")
+            or kwargs.get("name")
+            or "model"
+        )
+        size = sum(_size(m) for batch in messages for m in batch)
+        with self._lock:
+            self._runs[run_id] = _Run(
+                "model",
+                str(name),
+                time.perf_counter(),
+                bytes_in=size,
+                agent=_node_path(metadata),
+            )
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        """Abre la medición de una llamada a un modelo de texto."""
+        name = kwargs.get("name") or (serialized or {}).get("name") or "llm"
+        with self._lock:
+            self._runs[run_id] = _Run(
+                "model", name, time.perf_counter(), bytes_in=sum(map(len, prompts))
+            )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Cierra la medición del modelo con los tokens de entrada, salida y caché."""
+        tokens_in = tokens_out = tokens_cached = size = 0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                size += _size(message) if message is not None else len(generation.text)
+                usage = getattr(message, "usage_metadata", None) or {}
+                tokens_in += usage.get("input_tokens", 0)
+                tokens_out += usage.get("output_tokens", 0)
+                # Azure OpenAI (`cached_tokens`) y Vertex AI (`cached_content_token_count`)
+                # llegan normalizados como `cache_read`
+                tokens_cached += (usage.get("input_token_details") or {}).get(
+                    "cache_read", 0
+                )
+        if not tokens_in and not tokens_out:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            tokens_in = usage.get("prompt_tokens", 0)
+            tokens_out = usage.get("completion_tokens", 0)
+            tokens_cached = (usage.get("prompt_tokens_details") or {}).get(
+                "cached_tokens", 0
+            )
+        self._finish(
+            run_id,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            tokens_cached=tokens_cached,
+            bytes_out=size,
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        """Cierra la medición del modelo como error."""
+        self._finish(run_id, error=True)
+
+
+_handler: Optional[InstrumentationHandler] = None
+
+
+def get_instrumentation_handler() -> InstrumentationHandler:
+    """Devuelve el callback compartido del proceso, que escribe en `get_metrics()`."""
+    global _handler
+    if _handler is None:
+        registry = get_metrics()
+        with _metrics_lock:
+            if _handler is None:
+                _handler = InstrumentationHandler(registry)
+    return _handler
+
+
+def instrument(graph: Any, handler: Optional[InstrumentationHandler] = None) -> Any:
+    """Devuelve una copia del grafo compilado con el callback de métricas adjunto.
+
+    Se usa por defecto el callback compartido: si un grafo instrumentado se
+    ejecuta como subgrafo de otro, el callback no se duplica. Si
+    `REACT_AGENT_METRICS=0`, el grafo se devuelve sin cambios.
+    """
+    if not metrics_enabled():
+        return graph
+    return graph.with_config(callbacks=[handler or get_instrumentation_handler()])
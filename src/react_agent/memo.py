@@ -0,0 +1,290 @@
+"""Memoización de resultados de herramientas.
+
+Un mismo documento con el mismo prompt y el mismo modelo siempre produce la misma
+respuesta de `cedula_tool`, `fecha_defuncion_tool` o `registraduria_tool`. Esta
+capa guarda esos resultados con la llave (hash de la entrada, versión del prompt,
+nombre del modelo), con TTL y expulsión LRU, para que reprocesar una
+reclamación tras un fallo posterior no vuelva a pagar la llamada multimodal.
+
+Cada herramienta se activa por separado con `Configuration.memoized_tools`. El
+backend del proceso se elige con las variables de entorno `TOOL_MEMO_BACKEND`
+(`memory` o `sqlite`), `TOOL_MEMO_PATH`, `TOOL_MEMO_TTL_S` y
+`TOOL_MEMO_MAX_ENTRIES`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from react_agent.configuration import Configuration
+from react_agent.instrumentation import get_metrics
+
+
+def prompt_version(prompt: str) -> str:
+    """Versión corta de un prompt: los primeros 12 caracteres de su sha256."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def memo_key(
+    tool_name: str, input_hash: str, prompt_version: str, model_name: str
+) -> str:
+    """Construye la llave de memoización de una llamada a herramienta."""
+    raw = json.dumps([tool_name, input_hash, prompt_version, model_name])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+class InMemoryMemoBackend:
+    """Backend en memoria con TTL y expulsión LRU."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024):
+        """Crea una caché vacía de hasta `max_entries` entradas."""
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, Tuple[str, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Devuelve `(valor, latencia original)` o None si no existe o expiró."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, latency, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value, latency
+
+    def set(self, key: str, value: str, latency: float, ttl_s: float) -> None:
+        """Guarda un resultado junto con la latencia que tomó calcularlo."""
+        with self._lock:
+            self._data[key] = (value, latency, time.time() + ttl_s)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteMemoBackend:
+    """Backend persistente en SQLite con TTL y expulsión LRU.
+
+    Sobrevive a reinicios del proceso y puede compartirse entre procesos de la
+    misma máquina.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """Abre la base en `path` y crea la tabla si no existe."""
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS memo_last_access ON memo(last_access)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Devuelve `(valor, latencia original)` o None si no existe o expiró."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, latency, expires_at FROM memo WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] <= now:
+                conn.execute("DELETE FROM memo WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE memo SET last_access = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def set(self, key: str, value: str, latency: float, ttl_s: float) -> None:
+        """Guarda un resultado junto con la latencia que tomó calcularlo."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?)",
+                (key, value, latency, now + ttl_s, now),
+            )
+            conn.execute("DELETE FROM memo WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY last_access DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM memo")
+
+
+# -------------------------------
+# Capa de memoización
+# -------------------------------
+@dataclass
+class ToolMemoStats:
+    """Métricas de memoización de una herramienta."""
+
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Proporción de llamadas respondidas desde la memoización."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ToolMemo:
+    """Memoiza resultados de herramientas sobre un backend intercambiable."""
+
+    def __init__(self, backend: Any, ttl_s: float = 24 * 3600):
+        """Crea la memoización sobre `backend` con vigencia de `ttl_s` segundos."""
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self._stats: Dict[str, ToolMemoStats] = {}
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def aget_or_compute(
+        self,
+        tool_name: str,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """Devuelve el resultado memoizado o lo calcula y lo guarda.
+
+        Solo se guardan resultados exitosos: si `compute` lanza una excepción
+        esta se propaga sin memoizar nada, y un resultado que `cacheable`
+        rechaza (p. ej. "No se encontró el dato") se devuelve sin guardarlo,
+        para no repetir un fallo transitorio durante todo el TTL.
+
+        Args:
+            tool_name: Nombre de la herramienta (para las métricas)
+            key: Llave construida con `memo_key`
+            compute: Corrutina que calcula el resultado ante un fallo
+            cacheable: Indica si un resultado se puede guardar; por defecto todos
+
+        Returns:
+            str: Resultado de la herramienta
+        """
+        stats = self._stats.setdefault(tool_name, ToolMemoStats())
+        cached: Optional[Tuple[str, float]] = await self._call(self.backend.get, key)
+        if cached is not None:
+            value, latency = cached
+            stats.hits += 1
+            stats.saved_seconds += latency
+            return value
+
+        stats.misses += 1
+        start = time.perf_counter()
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            await self._call(
+                self.backend.set, key, value, time.perf_counter() - start, self.ttl_s
+            )
+        return value
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Devuelve aciertos, fallos, proporción de aciertos y segundos ahorrados por herramienta."""
+        return {
+            name: {
+                "hits": s.hits,
+                "misses": s.misses,
+                "hit_ratio": s.hit_ratio,
+                "saved_seconds": s.saved_seconds,
+            }
+            for name, s in self._stats.items()
+        }
+
+
+_tool_memo: Optional[ToolMemo] = None
+
+
+def get_tool_memo() -> ToolMemo:
+    """Devuelve la capa de memoización compartida del proceso."""
+    global _tool_memo
+    if _tool_memo is None:
+        max_entries = int(os.getenv("TOOL_MEMO_MAX_ENTRIES", "1024"))
+        if os.getenv("TOOL_MEMO_BACKEND", "memory") == "sqlite":
+            backend: Any = SQLiteMemoBackend(
+                os.getenv("TOOL_MEMO_PATH", "tool_memo.sqlite"), max_entries=max_entries
+            )
+        else:
+            backend = InMemoryMemoBackend(max_entries=max_entries)
+        _tool_memo = ToolMemo(
+            backend, ttl_s=float(os.getenv("TOOL_MEMO_TTL_S", str(24 * 3600)))
+        )
+    return _tool_memo
+
+
+async def memoized(
+    tool_name: str,
+    input_hash: Union[str, Callable[[], str]],
+    prompt: str,
+    model_name: str,
+    compute: Callable[[], Awaitable[str]],
+    cacheable: Optional[Callable[[str], bool]] = None,
+) -> str:
+    """Ejecuta `compute` pasando por la memoización si la herramienta la tiene activa.
+
+    Args:
+        tool_name: Nombre de la herramienta
+        input_hash: Hash de la entrada, o una función bloqueante que lo calcula
+            (por ejemplo, el sha256 del documento); solo se evalúa si la
+            memoización está activa
+        prompt: Prompt usado; su hash versiona la llave
+        model_name: Modelo usado
+        compute: Corrutina que produce el resultado
+        cacheable: Indica si un resultado se puede guardar (ver `ToolMemo.aget_or_compute`)
+
+    Returns:
+        str: Resultado de la herramienta
+    """
+    if tool_name not in Configuration.from_context().memoized_tools:
+        return await compute()
+    if callable(input_hash):
+        input_hash = await asyncio.to_thread(input_hash)
+    key = memo_key(tool_name, input_hash, prompt_version(prompt), model_name)
+    return await get_tool_memo().aget_or_compute(tool_name, key, compute, cacheable)
+
+
+get_metrics().register_collector("memo", lambda: get_tool_memo().stats())
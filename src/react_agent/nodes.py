@@ -1,150 +1,220 @@
+"""Agentes especializados y supervisor del proceso de reclamación.
+
+Los agentes se describen con su especificación (herramientas, prompt) y se
+construyen con `create_react_agent` la primera vez que se usan, no al importar
+el módulo; así el arranque del servidor y de cada worker no paga la creación
+de los clientes de los modelos. El modelo de cada agente se elige por corrida
+con `Configuration.model_for` (nivel `default` o `fast`, o un modelo explícito).
+Los prompts vienen del registro de prompts versionados (`prompt_templates/`).
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, TypedDict, cast
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
-from react_agent.chat_utils import  VertexAILLM, PromptLoader
-from langchain.chat_models import init_chat_model
-from langchain_core.tools import tool, InjectedToolCallId
-from langgraph.prebuilt import InjectedState
-from langgraph.types import Command
-from dotenv import load_dotenv
-from typing import Annotated
-import os
-from react_agent.state import State
-from react_agent.tools import  cedula_tool, registraduria_tool, fecha_defuncion_tool, transfer_to_cedula, transfer_to_registraduria, transfer_to_defuncion, saldo_tool, transfer_to_saldo
 
-load_dotenv()  # Esto carga las variables del archivo .env
+from react_agent.chat_utils import get_prompt_registry
+from react_agent.configuration import Configuration
+from react_agent.context import make_pre_model_hook
+from react_agent.deadlines import with_deadline
+from react_agent.scheduler import scheduled
+from react_agent.state import ClaimAgentState, claim_fields
+from react_agent.tools import (
+    cedula_tool,
+    elegibilidad_tool,
+    fecha_defuncion_tool,
+    registraduria_tool,
+    saldo_tool,
+    transfer_to_cedula,
+    transfer_to_defuncion,
+    transfer_to_registraduria,
+    transfer_to_saldo,
+)
+from react_agent.utils import load_chat_model
+
+# especificación de los agentes react
 
-project_id = os.getenv("PROJECT_ID")
 
-# Carga del modelo de GCP
-llm_gcp=VertexAILLM(project=project_id).get_model()
+class AgentSpec(TypedDict, total=False):
+    """Parámetros de `create_react_agent` que definen un agente."""
 
-#creación de los agentes react 
+    tools: List[BaseTool]
+    prompt: str
+    name: str
+    pre_model_hook: Callable[[Any], Dict[str, Any]]
+    version: Literal["v1", "v2"]
 
-cedula_agent = create_react_agent(
-    model="azure_openai:gpt-4.1",
+
+cedula_agent_spec = AgentSpec(
     tools=[cedula_tool],
-    prompt=(
-        "eres un experto que obtiene el número de documento de una persona.\n\n"
-        "INSTRUCTIONS:\n"
-        "- tu tarea es obtener el número de documento de la persona\n"
-        "- no lo hagas tú mismo, usa la herramienta cedula_tool\n"
-        "- si no tienes el número de documento, no lo hagas tú mismo, usa la herramienta cedula_tool\n"
-        "- no pidas información adicional, solo llama la herramienta cedula_tool\n"
-    ),
+    prompt=get_prompt_registry().text("cedula_agent"),
     name="cedula_agent",
+    pre_model_hook=make_pre_model_hook("cedula_agent"),
 )
 
-registraduria_agent = create_react_agent(
-    model="azure_openai:gpt-4.1",
+registraduria_agent_spec = AgentSpec(
     tools=[registraduria_tool],
-    prompt=(
-        "eres un experto que obtiene el estado de la persona en la registraduría.\n\n"
-        "INSTRUCTIONS:\n"
-        "- tu tarea es obtener el estado de la persona en la registraduría\n"
-        "- no lo hagas tú mismo, usa la herramienta registraduria_tool\n"
-        "- si no tienes el estado de la persona en la registraduría, no lo hagas tú mismo, usa la herramienta registraduria_tool\n"
-    ),
+    prompt=get_prompt_registry().text("registraduria_agent"),
     name="registraduria_agent",
+    pre_model_hook=make_pre_model_hook("registraduria_agent"),
 )
 
-defuncion_agent = create_react_agent(
-    model="azure_openai:gpt-4.1",
+defuncion_agent_spec = AgentSpec(
     tools=[fecha_defuncion_tool],
-    prompt=(
-        "eres un experto que obtiene la fecha de defunción de una persona.\n\n"
-        "INSTRUCTIONS:\n"
-        "- tu tarea es obtener la fecha de defunción de la persona\n"
-        "- no lo hagas tú mismo, usa la herramienta fecha_defuncion_tool\n"
-        "- si no tienes la fecha de defunción, no lo hagas tú mismo, usa la herramienta fecha_defuncion_tool\n"
-    ),
+    prompt=get_prompt_registry().text("defuncion_agent"),
     name="defuncion_agent",
+    pre_model_hook=make_pre_model_hook("defuncion_agent"),
 )
 
-saldo_agent = create_react_agent(
-    model="azure_openai:gpt-4.1",
-    tools=[saldo_tool],
-    prompt=(
-    """
-    Tu objetivo es determinar si una persona aplica o no a **Póliza Express** con base en los datos obtenidos mediante la herramienta `saldo_tool`.  
-
-    ### Paso 1: Obtener número de cédula
-    **ANTES de llamar saldo_tool**, debes buscar en el historial de conversación el número de cédula que fue extraído previamente por el cedula_agent. 
-    - Busca en los mensajes anteriores respuestas que contengan números de cédula (generalmente números de 8-10 dígitos).
-    - Una vez que identifiques el número de cédula, úsalo como parámetro para llamar `saldo_tool`.
-
-    ### Paso 2: Llamar herramienta
-    Debes consumir `saldo_tool(cedula="NUMERO_DE_CEDULA")` para obtener los siguientes datos:
-    - Tipo de producto (ej. TARJETA DE CRÉDITO, CRÉDITO, Móvil Consumo Fijo, Móvil Consumo Libranza)
-    - Saldo de la persona
-    - Fecha de desembolso (formato YYYY-MM-DD)
-    - Monto desembolsado
-
-    ### Reglas duras a evaluar:
-
-    **Regla 1:**  
-    ✔ Aplica si el tipo de producto es **TARJETA DE CRÉDITO**  
-    ✔ Y el **saldo es menor o igual a 200.000.000**
-
-    **Regla 2:**  
-    ✔ Aplica si el tipo de producto es **CRÉDITO**  
-    ✔ Y el plan es uno de los siguientes:  
-    - Móvil Consumo Fijo  
-    - Móvil Consumo Libranza  
-    - Móvil Vehículo Particular  
-    ✔ Y la diferencia entre la **fecha de siniestro y la fecha de desembolso es mayor a 60 días**  
-    ✔ Y el **monto desembolsado es menor a 50.000.000**
-
-    **Regla 3:**  
-    ✔ Aplica si el producto **no es TARJETA DE CRÉDITO ni uno de los planes válidos para crédito**  
-    ✔ Y la diferencia entre la **fecha de siniestro y la fecha de desembolso es mayor a 730 días (2 años)**  
-    ✔ Y el **saldo es menor a 50.000.000**
-
-    **En todos los casos se debe cumplir adicionalmente lo siguiente:**
-    - La **fecha de siniestro debe estar dentro de la vigencia del crédito** (inicio ≤ siniestro ≤ fin)
-
-    ### Instrucciones:
-    1. Revisa el historial de mensajes para encontrar el número de cédula extraído previamente.
-    2. Llama la herramienta `saldo_tool` con el número de cédula como parámetro.
-    3. Evalúa si se cumple alguna de las reglas anteriores **junto con los dos requisitos obligatorios comunes**.
-    4. Si **sí aplica**, genera una respuesta afirmando que aplica a Póliza Express, especificando **qué regla se cumplió y por qué**.
-    5. Si **no aplica**, indica que no cumple con las condiciones para aplicar y menciona **cuál fue la razón más relevante del descarte**.
-
-    ### Formato de salida:
-    - Siempre responde en un solo bloque.
-    - Empieza indicando si **Aplica a Póliza Express: Sí/No**
-    - Luego justifica brevemente en lenguaje claro y profesional.
-    """
-    ),
+saldo_agent_spec = AgentSpec(
+    tools=[saldo_tool, elegibilidad_tool],
+    prompt=get_prompt_registry().text("saldo_agent"),
     name="saldo_agent",
+    pre_model_hook=make_pre_model_hook("saldo_agent"),
 )
 
 # Creación del supervisor
 
-supervisor_agent = create_react_agent(
-    model="azure_openai:gpt-4.1",
-    tools=[transfer_to_cedula, transfer_to_registraduria, transfer_to_defuncion, transfer_to_saldo],
-    prompt=(
-        """Eres un supervisor que coordina tres agentes especializados. Tu tarea es siempre ejecutar, en este orden y sin excepciones, las siguientes acciones:
-
-        1. Obtener el número de documento del usuario usando la herramienta `cedula_tool`.
-        2. Verificar el estado de la persona en la registraduría usando `registraduria_agent`.
-        3. Obtener la fecha de defunción usando `defuncion_agent`.
-        4. Obtener el saldo de la persona usando `saldo_agent`.
-
-        ⚠️ Instrucciones clave (obligatorias):
-        - Siempre debes iniciar ejecutando la herramienta `cedula_tool`. No preguntes, no confirmes, no hagas razonamientos antes de usarla.
-        - No pidas ninguna información adicional al usuario. Toda la información requerida se obtiene únicamente con las herramientas.
-        - Está prohibido iniciar una conversación o solicitar datos al usuario en este paso. Usa directamente `cedula_tool`.
-
-        🔁 Repite siempre este flujo, sin desviarte ni invertir el orden de ejecución.
-
-        Tu rol no es dialogar ni decidir: es coordinar a los agentes y ejecutar cada paso secuencialmente.
-
-        solamente en el paso final, debes responder con la siguiente información:
-            - numero de documento
-            - estado de la persona en la registraduría
-            - fecha de defunción
-            - confirmar si aplica a Póliza Express y su justificación.
-        """
-    ),
-    name="supervisor"
-)
\ No newline at end of file
+supervisor_agent_spec = AgentSpec(
+    tools=[
+        transfer_to_cedula,
+        transfer_to_registraduria,
+        transfer_to_defuncion,
+        transfer_to_saldo,
+    ],
+    prompt=get_prompt_registry().text("supervisor"),
+    name="supervisor",
+    pre_model_hook=make_pre_model_hook("supervisor"),
+    # v1 ejecuta todas las transferencias de un turno en un solo ToolNode, que
+    # combina sus Send en un único Command al grafo padre (fan-out en paralelo).
+    version="v1",
+)
+
+
+AGENT_SPECS: Dict[str, AgentSpec] = {
+    spec["name"]: spec
+    for spec in (
+        supervisor_agent_spec,
+        cedula_agent_spec,
+        registraduria_agent_spec,
+        defuncion_agent_spec,
+        saldo_agent_spec,
+    )
+}
+
+# -------------------------------
+# Construcción perezosa de los agentes
+# -------------------------------
+_agents: Dict[Tuple[str, str], CompiledStateGraph] = {}
+_agents_lock = threading.Lock()
+_env_loaded = False
+_model_factory: Optional[Callable[[str, str], Any]] = None
+
+
+def _load_env() -> None:
+    """Carga las variables del archivo .env una sola vez, antes del primer agente."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _env_loaded = True
+
+
+def set_model_factory(factory: Optional[Callable[[str, str], Any]]) -> None:
+    """Reemplaza la carga del modelo con el que se construye cada agente.
+
+    `factory(nombre_agente, "proveedor/modelo")` devuelve el modelo a usar
+    (p. ej. modelos falsos en los benchmarks); None vuelve a `load_chat_model`.
+    Los agentes ya construidos se descartan.
+    """
+    global _model_factory
+    with _agents_lock:
+        _model_factory = factory
+        _agents.clear()
+
+
+def get_agent(name: str, model: Optional[str] = None) -> CompiledStateGraph:
+    """Devuelve el agente compilado `name` con `model`, construyéndolo en el primer uso.
+
+    Args:
+        name (str): Nombre del agente (p. ej. "cedula_agent" o "supervisor")
+        model (str): Modelo en formato "proveedor/modelo"; por defecto el que
+            asigna `Configuration.model_for(name)` con la configuración por defecto
+
+    Returns:
+        CompiledStateGraph: Agente creado con `create_react_agent`
+    """
+    if model is None:
+        model = Configuration().model_for(name)
+    key = (name, model)
+    agent = _agents.get(key)
+    if agent is None:
+        with _agents_lock:
+            agent = _agents.get(key)
+            if agent is None:
+                if _model_factory is not None:
+                    chat_model = _model_factory(name, model)
+                else:
+                    _load_env()
+                    # Los reintentos ante 429 los hace el planificador, no el SDK
+                    chat_model = load_chat_model(model, max_retries=0)
+                # Todas las llamadas del agente pasan por el planificador compartido
+                chat_model = scheduled(chat_model, model)
+                agent = cast(
+                    CompiledStateGraph,
+                    create_react_agent(
+                        model=chat_model,
+                        state_schema=ClaimAgentState,
+                        **AGENT_SPECS[name],
+                    ),
+                )
+                _agents[key] = agent
+    return agent
+
+
+def agent_node(name: str) -> RunnableLambda[Any, Dict[str, Any]]:
+    """Crea el nodo del grafo principal que ejecuta el agente `name`.
+
+    El agente se construye al ejecutar el nodo por primera vez con el modelo
+    que asigna `Configuration.model_for(name)` en esa corrida, y se invoca con
+    la configuración del nodo, por lo que sigue funcionando como subgrafo
+    (las transferencias con `Command.PARENT` llegan al grafo principal).
+    El agente recibe los mensajes y los campos de la reclamación ya conocidos, y
+    devuelve los que escribieron sus herramientas. La versión asíncrona se acota
+    con el plazo de la corrida.
+    """
+
+    def _input(state: Any) -> Dict[str, Any]:
+        messages = state["messages"] if isinstance(state, dict) else state.messages
+        return {"messages": messages, **claim_fields(state)}
+
+    def _agent() -> CompiledStateGraph:
+        return get_agent(name, Configuration.from_context().model_for(name))
+
+    def invoke(state: Any, config: RunnableConfig) -> Dict[str, Any]:
+        return _agent().invoke(_input(state), config)
+
+    async def ainvoke(state: Any, config: RunnableConfig) -> Dict[str, Any]:
+        return await with_deadline(_agent().ainvoke(_input(state), config), name)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=name)
+
+
+_AGENT_ATTRIBUTES = {
+    "supervisor_agent": "supervisor",
+    "cedula_agent": "cedula_agent",
+    "registraduria_agent": "registraduria_agent",
+    "defuncion_agent": "defuncion_agent",
+    "saldo_agent": "saldo_agent",
+}
+
+
+def __getattr__(attr: str) -> Any:
+    # Compatibilidad: `from react_agent.nodes import cedula_agent` construye el agente
+    if attr in _AGENT_ATTRIBUTES:
+        return get_agent(_AGENT_ATTRIBUTES[attr])
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
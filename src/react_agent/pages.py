@@ -0,0 +1,290 @@
+"""Recorrido perezoso de las páginas de un documento de la reclamación.
+
+Los expedientes reales son escaneos de varias páginas y la página con el dato
+cambia de un documento a otro; enviar todas las páginas al modelo multimodal
+multiplicaría los bytes y el costo. `DocumentPages` abre el documento una sola
+vez y encadena generadores:
+
+1. `candidates` clasifica las páginas de forma barata: primero las que tienen
+   en la capa de texto las palabras clave del tipo de documento (en cuanto
+   aparecen), luego las escaneadas cuya miniatura no está en blanco y por
+   último las de texto sin palabras clave.
+2. `render` rasteriza solo la página candidata que se va a enviar (pasando por
+   la caché de rasterización), en un hilo o en el pool de procesos de
+   `react_agent.render_pool`.
+
+Quien consume el generador se detiene apenas encuentra el campo, así que las
+páginas restantes ni se clasifican ni se renderizan. Cada documento deja un
+`PageReport` con sus páginas, las clasificadas, las renderizadas y las
+enviadas al modelo (`page_reports`, `page_stats`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, replace
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from react_agent.instrumentation import timed
+from react_agent.rendering import RenderSettings, get_raster_cache, render_page_base64
+from react_agent.text_extraction import normalize_text, parse_cedula
+
+if TYPE_CHECKING:
+    from react_agent.render_pool import RenderPool
+
+# Palabras clave (sin tildes, en mayúsculas) que ubican la página de cada documento
+PAGE_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "cedula": (
+        "CEDULA DE CIUDADANIA",
+        "IDENTIFICACION PERSONAL",
+        "NUIP",
+        "REPUBLICA DE COLOMBIA",
+    ),
+    "defuncion": ("FECHA DE LA DEFUNCION", "REGISTRO CIVIL DE DEFUNCION", "DEFUNCION"),
+}
+
+# Una página con menos caracteres que esto en la capa de texto se trata como escaneada
+MIN_TEXT_CHARS = 20
+
+# Resolución de la miniatura, nivel de gris por debajo del cual un píxel tiene tinta
+# (a esta resolución el texto se ve gris, no negro) y proporción mínima de píxeles
+# con tinta de una página no vacía
+THUMBNAIL_DPI = 12
+INK_LEVEL = 230
+MIN_INK_RATIO = 0.001
+
+
+def _valida_cedula(texto: str) -> bool:
+    return parse_cedula(texto) is not None
+
+
+# Fecha en formato AAAA-MM-DD, como la piden los prompts de extracción
+FECHA_RE = re.compile(r"(?:19|20)\d{2}-\d{2}-\d{2}")
+
+
+def _valida_fecha(texto: str) -> bool:
+    return FECHA_RE.search(texto) is not None
+
+
+# Indica si la respuesta del modelo contiene el campo buscado
+ANSWER_CHECKS: Dict[str, Callable[[str], bool]] = {
+    "cedula": _valida_cedula,
+    "defuncion": _valida_fecha,
+}
+
+
+@dataclass(frozen=True)
+class PageCandidate:
+    """Página que puede contener el campo buscado."""
+
+    index: int
+    text: str
+    reason: str
+    """`texto` (palabras clave), `miniatura` (escaneada no vacía) o `resto`."""
+
+
+@dataclass
+class PageReport:
+    """Páginas recorridas al extraer un campo de un documento."""
+
+    pdf_path: str
+    doc_type: str
+    page_count: int = 0
+    pages_classified: int = 0
+    pages_rendered: int = 0
+    pages_sent: int = 0
+    found_on: Optional[int] = None
+    """Página donde se encontró el campo (None si no se encontró)."""
+
+    source: Optional[str] = None
+    """`texto` si el valor salió de la capa de texto, `modelo` si del modelo multimodal."""
+
+
+def ink_ratio(page: Any, dpi: int = THUMBNAIL_DPI) -> float:
+    """Proporción de píxeles con tinta en una miniatura en escala de grises de la página."""
+    import fitz  # PyMuPDF
+
+    with timed("cpu", "page_thumbnail"):
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    samples = pix.samples
+    if not samples:
+        return 0.0
+    dark = len(samples) - len(samples.translate(None, bytes(range(INK_LEVEL))))
+    return dark / len(samples)
+
+
+class DocumentPages:
+    """Documento PDF abierto una vez, recorrido página a página bajo demanda.
+
+    PyMuPDF no admite usar un documento desde varios hilos a la vez:
+    `acandidates` y `arender` delegan cada paso a un hilo bajo un candado, y
+    `close` espera a que termine el paso en curso (p. ej. si el plazo de la
+    reclamación canceló la corrutina mientras el hilo renderizaba). Desde
+    código asíncrono se usa `aclose`, que espera ese candado en un hilo y no
+    bloquea el event loop.
+    """
+
+    def __init__(self, pdf_path: str, doc_type: str):
+        """Abre el PDF; las páginas se leen a medida que se piden."""
+        import fitz  # PyMuPDF
+
+        self.pdf_path = pdf_path
+        self.doc_type = doc_type
+        self._document = fitz.open(pdf_path)
+        self._lock = threading.Lock()
+        self.report = PageReport(
+            pdf_path, doc_type, page_count=self._document.page_count
+        )
+
+    def close(self) -> None:
+        """Cierra el documento y registra el reporte de páginas."""
+        with self._lock:
+            if self._document is None:
+                return
+            self._document.close()
+            self._document = None
+        record_report(self.report)
+
+    async def aclose(self) -> None:
+        """Versión asíncrona de `close`."""
+        await asyncio.to_thread(self.close)
+
+    def __enter__(self) -> DocumentPages:
+        """Devuelve el documento abierto."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Cierra el documento."""
+        self.close()
+
+    # -------------------------------
+    # Clasificación
+    # -------------------------------
+    def _score(self, text: str) -> int:
+        normalized = normalize_text(text)
+        return sum(
+            keyword in normalized for keyword in PAGE_KEYWORDS.get(self.doc_type, ())
+        )
+
+    def candidates(self) -> Generator[PageCandidate, None, None]:
+        """Genera las páginas candidatas en orden de probabilidad, clasificándolas al vuelo."""
+        scanned: List[int] = []
+        unmatched: List[PageCandidate] = []
+        for index in range(self.report.page_count):
+            with timed("cpu", "pdf_text"):
+                text = self._document[index].get_text()
+            self.report.pages_classified += 1
+            if len(text.strip()) < MIN_TEXT_CHARS:
+                scanned.append(index)
+            elif self._score(text):
+                yield PageCandidate(index, text, "texto")
+            else:
+                unmatched.append(PageCandidate(index, text, "resto"))
+
+        for index in scanned:
+            if ink_ratio(self._document[index]) >= MIN_INK_RATIO:
+                yield PageCandidate(index, "", "miniatura")
+        yield from unmatched
+
+    def render(
+        self, index: int, settings: RenderSettings, pool: Optional[RenderPool] = None
+    ) -> str:
+        """Rasteriza la página `index` (con caché), en este proceso o en `pool`."""
+
+        def render_open_page(path: str, page_settings: RenderSettings) -> str:
+            self.report.pages_rendered += 1
+            if pool is not None:
+                return pool.render(path, page_settings)
+            return render_page_base64(self._document[page_settings.page], page_settings)
+
+        with self._lock:
+            return get_raster_cache().get_or_render(
+                self.pdf_path, replace(settings, page=index), render=render_open_page
+            )
+
+    # -------------------------------
+    # Versiones asíncronas
+    # -------------------------------
+    async def acandidates(self) -> AsyncGenerator[PageCandidate, None]:
+        """Versión asíncrona de `candidates`; cada página se clasifica en un hilo."""
+        pages = self.candidates()
+
+        def step() -> Optional[PageCandidate]:
+            with self._lock:
+                return next(pages, None) if self._document is not None else None
+
+        def close_pages() -> None:
+            with self._lock:
+                pages.close()
+
+        try:
+            while True:
+                candidate = await asyncio.to_thread(step)
+                if candidate is None:
+                    return
+                yield candidate
+        finally:
+            await asyncio.to_thread(close_pages)
+
+    async def arender(
+        self, index: int, settings: RenderSettings, pool: Optional[RenderPool] = None
+    ) -> str:
+        """Versión asíncrona de `render`."""
+        return await asyncio.to_thread(self.render, index, settings, pool)
+
+
+# -------------------------------
+# Reportes
+# -------------------------------
+_reports: Deque[PageReport] = deque(maxlen=256)
+_totals: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def record_report(report: PageReport) -> None:
+    """Guarda el reporte de un documento y lo suma a los totales de su tipo."""
+    with _lock:
+        _reports.append(report)
+        totals = _totals.setdefault(
+            report.doc_type,
+            {
+                "documents": 0,
+                "pages": 0,
+                "classified": 0,
+                "rendered": 0,
+                "sent": 0,
+                "found": 0,
+            },
+        )
+        totals["documents"] += 1
+        totals["pages"] += report.page_count
+        totals["classified"] += report.pages_classified
+        totals["rendered"] += report.pages_rendered
+        totals["sent"] += report.pages_sent
+        totals["found"] += report.found_on is not None
+
+
+def page_reports() -> List[Dict[str, Any]]:
+    """Devuelve los reportes de los documentos recorridos más recientemente."""
+    with _lock:
+        return [asdict(report) for report in _reports]
+
+
+def page_stats() -> Dict[str, Dict[str, int]]:
+    """Devuelve, por tipo de documento, las páginas totales, clasificadas, renderizadas y enviadas."""
+    with _lock:
+        return {doc_type: dict(totals) for doc_type, totals in _totals.items()}
@@ -0,0 +1,157 @@
+"""Modo determinista del proceso de reclamación.
+
+El supervisor siempre ejecuta los mismos cuatro pasos, así que este grafo los
+conecta con aristas fijas y llama a las funciones de las herramientas
+directamente, ejecutando en paralelo los pasos que no dependen entre sí. Las
+reglas de Póliza Express se evalúan con el motor de reglas determinista y el
+único llamado a un LLM es el resumen final, que redacta la justificación.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import Any, Dict
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.graph import StateGraph
+
+from react_agent import prompts
+from react_agent.configuration import Configuration
+from react_agent.context import ContextPolicy, fields_message
+from react_agent.instrumentation import instrument
+from react_agent.scheduler import scheduled
+from react_agent.state import CLAIM_FIELDS, InputState, State
+from react_agent.tools import (
+    buscar_saldo,
+    cedula_valida,
+    consultar_registraduria,
+    evaluar_elegibilidad,
+    fecha_valida,
+    obtener_cedula,
+    obtener_fecha_defuncion,
+)
+from react_agent.utils import load_chat_model
+
+# El resumen recibe todos los campos de la reclamación
+SUMMARY_POLICY = ContextPolicy(fields=CLAIM_FIELDS)
+
+
+@cache
+def _load_summary_model(model: str) -> BaseChatModel:
+    # Los reintentos ante 429 los hace el planificador, no el SDK
+    return scheduled(load_chat_model(model, max_retries=0), model)
+
+
+def _summary_model() -> BaseChatModel:
+    """Modelo del resumen final: el que `Configuration` asigna al supervisor."""
+    return _load_summary_model(Configuration.from_context().model_for("supervisor"))
+
+
+async def paso_cedula(state: State) -> Dict[str, Any]:
+    """Extrae el número de cédula; si la extracción falla no se escribe el campo."""
+    texto = await obtener_cedula()
+    cedula = cedula_valida(texto)
+    return {
+        "cedula": cedula,
+        "messages": [
+            AIMessage(
+                content=f"Número de documento: {cedula or texto.strip()}",
+                name="cedula_agent",
+            )
+        ],
+    }
+
+
+async def paso_registraduria(state: State) -> Dict[str, Any]:
+    """Consulta el estado de la persona en la registraduría."""
+    estado = await consultar_registraduria()
+    return {
+        "estado_registraduria": estado,
+        "messages": [
+            AIMessage(
+                content=f"Estado en la registraduría: {estado}",
+                name="registraduria_agent",
+            )
+        ],
+    }
+
+
+async def paso_defuncion(state: State) -> Dict[str, Any]:
+    """Extrae la fecha de defunción; si la extracción falla no se escribe el campo."""
+    texto = await obtener_fecha_defuncion()
+    fecha = fecha_valida(texto)
+    return {
+        "fecha_defuncion": fecha,
+        "messages": [
+            AIMessage(
+                content=f"Fecha de defunción: {fecha or texto.strip()}",
+                name="defuncion_agent",
+            )
+        ],
+    }
+
+
+async def paso_saldo(state: State) -> Dict[str, Any]:
+    """Consulta el saldo con la cédula extraída en el primer paso."""
+    texto, saldo = await buscar_saldo(state.cedula or "")
+    return {
+        "saldo": saldo,
+        "messages": [AIMessage(content=texto, name="saldo_agent")],
+    }
+
+
+async def paso_elegibilidad(state: State) -> Dict[str, Any]:
+    """Evalúa las reglas de Póliza Express con la cédula y la fecha de defunción."""
+    texto, elegibilidad = await evaluar_elegibilidad(
+        state.cedula or "", state.fecha_defuncion or ""
+    )
+    return {
+        "elegibilidad": elegibilidad,
+        "messages": [AIMessage(content=texto, name="saldo_agent")],
+    }
+
+
+async def resumen(state: State) -> Dict[str, Any]:
+    """Genera la respuesta final con un único llamado al LLM.
+
+    Las instrucciones son un prefijo estático (reutilizable por la caché de
+    prompts del proveedor); los datos de la reclamación van al final, en un
+    mensaje de usuario aparte.
+    """
+    datos = fields_message(state, SUMMARY_POLICY)
+    pedido = [m for m in state.messages if isinstance(m, HumanMessage)][-1:] or [
+        HumanMessage(content="Genera el resumen de la reclamación.")
+    ]
+    response = await _summary_model().ainvoke(
+        [
+            SystemMessage(content=prompts.PIPELINE_SUMMARY_PROMPT),
+            *pedido,
+            *filter(None, [datos]),
+        ]
+    )
+    response.name = "supervisor"
+    return {"messages": [response]}
+
+
+builder = StateGraph(State, input=InputState)
+
+builder.add_node(paso_cedula)
+builder.add_node(paso_registraduria)
+builder.add_node(paso_defuncion)
+builder.add_node(paso_saldo)
+builder.add_node(paso_elegibilidad)
+builder.add_node(resumen)
+
+# Cédula, registraduría y defunción son independientes y corren en paralelo;
+# el saldo arranca en cuanto se conoce la cédula, las reglas se evalúan con el
+# saldo y la fecha de defunción, y el resumen espera a todos.
+builder.add_edge("__start__", "paso_cedula")
+builder.add_edge("__start__", "paso_registraduria")
+builder.add_edge("__start__", "paso_defuncion")
+builder.add_edge("paso_cedula", "paso_saldo")
+builder.add_edge(["paso_defuncion", "paso_saldo"], "paso_elegibilidad")
+builder.add_edge(["paso_registraduria", "paso_elegibilidad"], "resumen")
+builder.add_edge("resumen", "__end__")
+
+pipeline_graph = instrument(builder.compile())
@@ -1,5 +1,15 @@
 """Default prompts used by the agent."""
 
+from react_agent.chat_utils import get_prompt_registry
+
 SYSTEM_PROMPT = """You are a helpful AI assistant.
 
 System time: {system_time}"""
+
+# Los prompts largos (agentes, extracción, reglas y resumen) viven en
+# `prompt_templates/` y se cargan una sola vez con el registro de `chat_utils`.
+REGLAS_POLIZA_EXPRESS = get_prompt_registry().text("reglas_poliza_express")
+
+# Instrucciones estáticas del resumen del modo determinista; los datos de la
+# reclamación se envían en un mensaje aparte, después de este prefijo.
+PIPELINE_SUMMARY_PROMPT = get_prompt_registry().text("resumen_pipeline")
@@ -0,0 +1,244 @@
+"""Render de PDF en un pool de procesos con memoria compartida.
+
+El render de PyMuPDF y la codificación JPEG son trabajo de CPU; con
+`asyncio.to_thread` todas las reclamaciones concurrentes compiten por el GIL y
+el proceso no pasa de un núcleo. Con `render_backend="process"` las
+herramientas de extracción renderizan en un `RenderPool`:
+
+- Los procesos se crean con `spawn` (seguro con los hilos del proceso
+  principal) y arrancan en caliente: al iniciar importan PyMuPDF y PIL y se
+  conectan al segmento de memoria compartida.
+- Los píxeles nunca salen del proceso que renderiza. La imagen codificada se
+  escribe en una ranura de un segmento de `multiprocessing.shared_memory` que
+  crea el proceso principal; por la cola del pool solo viajan la ruta, los
+  parámetros de render y la longitud del resultado.
+- Cada proceso mantiene abiertos los últimos documentos que renderizó.
+
+El tamaño del pool es el número de núcleos disponibles, o
+`REACT_AGENT_RENDER_WORKERS`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import base64
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from react_agent.instrumentation import timed
+from react_agent.rendering import RenderSettings, render_page_bytes
+
+# Bytes por ranura; una página JPEG preparada ocupa unos cientos de KB
+SLOT_BYTES = 4 * 1024 * 1024
+
+# Documentos abiertos que conserva cada proceso
+MAX_OPEN_DOCUMENTS = 8
+
+
+def available_cpus() -> int:
+    """Núcleos que el proceso puede usar (respeta la afinidad de CPU si existe)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+# -------------------------------
+# Proceso de render
+# -------------------------------
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_documents: OrderedDict[Tuple[str, int, int], Any] = OrderedDict()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)  # type: ignore[call-arg]
+    # Antes de 3.13 conectarse también registra el segmento en el resource
+    # tracker, que lo borraría (o avisaría de una fuga) al terminar el proceso
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _init_worker(shm_name: str) -> None:
+    """Arranque en caliente: importa PyMuPDF y PIL y se conecta a la memoria compartida."""
+    global _worker_shm
+    import fitz  # noqa: F401  # PyMuPDF
+
+    try:
+        import PIL.Image  # noqa: F401
+    except ImportError:
+        pass
+    _worker_shm = _attach(shm_name)
+
+
+def _open_document(pdf_path: str) -> Any:
+    import fitz  # PyMuPDF
+
+    stat = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+    document = _worker_documents.get(key)
+    if document is None:
+        document = fitz.open(pdf_path)
+        _worker_documents[key] = document
+        while len(_worker_documents) > MAX_OPEN_DOCUMENTS:
+            _, old = _worker_documents.popitem(last=False)
+            old.close()
+    _worker_documents.move_to_end(key)
+    return document
+
+
+def _render_into_slot(
+    pdf_path: str, settings: RenderSettings, slot: int, slot_bytes: int
+) -> Tuple[int, Optional[bytes]]:
+    """Renderiza en el proceso del pool y escribe la imagen en la ranura `slot`.
+
+    Returns:
+        La longitud de la imagen y, solo si no cupo en la ranura, sus bytes
+    """
+    data = render_page_bytes(_open_document(pdf_path)[settings.page], settings)
+    buf = _worker_shm.buf if _worker_shm is not None else None
+    if buf is None or len(data) > slot_bytes:
+        return len(data), data
+    offset = slot * slot_bytes
+    buf[offset : offset + len(data)] = data
+    return len(data), None
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+# -------------------------------
+# Pool
+# -------------------------------
+class RenderPool:
+    """Pool de procesos de render con ranuras de memoria compartida para los resultados."""
+
+    def __init__(self, workers: Optional[int] = None, slot_bytes: int = SLOT_BYTES):
+        """Arranca los procesos de render y reserva la memoria compartida."""
+        self.workers = workers or available_cpus()
+        self.slot_bytes = slot_bytes
+        # Dos ranuras por proceso: una en render y otra lista para la siguiente página
+        self.slots = 2 * self.workers
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self.slots * slot_bytes
+        )
+        self._free: queue.SimpleQueue[int] = queue.SimpleQueue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._shm.name,),
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        self.renders = 0
+        self.shared_bytes = 0
+        self.pickled_bytes = 0
+
+    def warm_up(self) -> None:
+        """Arranca todos los procesos del pool antes de la primera página."""
+        for future in [self._executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def render(self, pdf_path: str, settings: RenderSettings) -> str:
+        """Renderiza una página en el pool y la devuelve en base64.
+
+        Tiene la misma firma que `render_pdf_page_base64`, así que sirve como
+        función de render de `RasterCache.get_or_render`. Bloquea hasta que
+        haya una ranura libre y el render termine (sin retener el GIL).
+        """
+        slot = self._free.get()
+        try:
+            with timed("cpu", "pdf_render_pool"):
+                length, data = self._executor.submit(
+                    _render_into_slot, pdf_path, settings, slot, self.slot_bytes
+                ).result()
+            if data is None:
+                buf = self._shm.buf
+                if buf is None:
+                    raise RuntimeError("El pool de render está cerrado")
+                offset = slot * self.slot_bytes
+                view = buf[offset : offset + length]
+                try:
+                    encoded = base64.b64encode(view).decode("ascii")
+                finally:
+                    view.release()
+            else:
+                encoded = base64.b64encode(data).decode("ascii")
+        finally:
+            self._free.put(slot)
+        with self._lock:
+            self.renders += 1
+            if data is None:
+                self.shared_bytes += length
+            else:
+                self.pickled_bytes += length
+        return encoded
+
+    async def arender(self, pdf_path: str, settings: RenderSettings) -> str:
+        """Versión asíncrona de `render`; el hilo solo espera al proceso del pool."""
+        return await asyncio.to_thread(self.render, pdf_path, settings)
+
+    def stats(self) -> Dict[str, int]:
+        """Procesos, renders y bytes transferidos por memoria compartida y por pickle."""
+        return {
+            "workers": self.workers,
+            "renders": self.renders,
+            "shared_bytes": self.shared_bytes,
+            "pickled_bytes": self.pickled_bytes,
+        }
+
+    def close(self) -> None:
+        """Detiene los procesos y libera el segmento de memoria compartida."""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> RenderPool:
+        """Devuelve el pool ya iniciado."""
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        """Detiene los procesos y libera la memoria compartida."""
+        self.close()
+
+
+_pool: Optional[RenderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """Devuelve el pool de render compartido del proceso, creándolo en caliente.
+
+    Se configura con `REACT_AGENT_RENDER_WORKERS` (por defecto, los núcleos
+    disponibles) y se cierra al terminar el intérprete.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = int(os.getenv("REACT_AGENT_RENDER_WORKERS", "0")) or None
+                pool = RenderPool(workers=workers)
+                pool.warm_up()
+                atexit.register(pool.close)
+                _pool = pool
+    return _pool
@@ -0,0 +1,460 @@
+"""Rasterización de documentos PDF para las herramientas multimodales.
+
+Incluye una caché direccionada por contenido: la llave es el hash del PDF más
+los parámetros de render, de modo que un mismo documento procesado de nuevo
+(reintentos, turnos posteriores) no vuelve a pasar por el render de PyMuPDF ni
+por la codificación JPEG.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, cast
+
+from react_agent.instrumentation import get_metrics, timed
+
+
+@dataclass(frozen=True)
+class RenderSettings:
+    """Parámetros de preparación de imagen; todos forman parte de la llave de la caché."""
+
+    page: int = 0
+    """Índice de la página a renderizar."""
+
+    image_format: str = "JPEG"
+    """Formato de la imagen codificada."""
+
+    dpi: Optional[int] = None
+    """Resolución de render; None usa la de `get_pixmap()` por defecto (72 dpi)."""
+
+    grayscale: bool = False
+    """Renderizar en escala de grises (un tercio de los bytes por píxel)."""
+
+    clip: Optional[Tuple[float, float, float, float]] = None
+    """Región de interés relativa a la página `(x0, y0, x1, y1)` con valores entre 0 y 1."""
+
+    anchor: Optional[str] = None
+    """Texto que ubica la región de interés en la capa de texto del PDF."""
+
+    anchor_band: Tuple[float, float] = (0.02, 0.08)
+    """Alto relativo a incluir por encima y por debajo del texto ancla."""
+
+    quality: int = 85
+    """Calidad JPEG inicial."""
+
+    min_quality: int = 40
+    """Calidad JPEG mínima al ajustar al presupuesto de bytes."""
+
+    quality_step: int = 10
+    """Paso de reducción de la calidad JPEG."""
+
+    max_bytes: Optional[int] = None
+    """Presupuesto de bytes de la imagen codificada (antes de base64)."""
+
+    def cache_key(self) -> str:
+        """Devuelve la representación estable de los parámetros."""
+        key = f"p{self.page}-{self.image_format.lower()}"
+        if self == RenderSettings(page=self.page, image_format=self.image_format):
+            return key
+        digest = hashlib.sha256(repr(self).encode("utf-8")).hexdigest()[:16]
+        return f"{key}-{digest}"
+
+
+# Perfiles de preparación por tipo de documento
+IMAGE_PROFILES: Dict[str, RenderSettings] = {
+    "cedula": RenderSettings(dpi=110, quality=80, max_bytes=300_000),
+    # Del certificado solo interesa el bloque "Fecha de la defunción"; si el PDF
+    # no tiene capa de texto se envía la página completa.
+    "defuncion": RenderSettings(
+        dpi=110,
+        grayscale=True,
+        anchor="Fecha de la defunción",
+        quality=80,
+        max_bytes=200_000,
+    ),
+}
+
+MIN_DPI = 50
+
+
+def image_settings(
+    doc_type: str, overrides: Optional[Dict[str, Any]] = None
+) -> RenderSettings:
+    """Devuelve el perfil de preparación de un tipo de documento con ajustes opcionales.
+
+    Args:
+        doc_type (str): Tipo de documento (`cedula`, `defuncion`)
+        overrides (dict, optional): Campos de `RenderSettings` a reemplazar
+
+    Returns:
+        RenderSettings: Parámetros de preparación
+    """
+    settings = IMAGE_PROFILES.get(doc_type, RenderSettings())
+    if overrides:
+        overrides = {
+            k: tuple(v) if isinstance(v, list) else v for k, v in overrides.items()
+        }
+        settings = replace(settings, **overrides)
+    return settings
+
+
+def _clip_rect(page: Any, settings: RenderSettings) -> Any:
+    """Calcula la región de interés en coordenadas de la página, o None para la página completa."""
+    width, height = page.rect.width, page.rect.height
+    if settings.anchor:
+        hits = page.search_for(settings.anchor)
+        if hits:
+            above, below = settings.anchor_band
+            anchor = hits[0]
+            return page.rect & (
+                0,
+                anchor.y0 - above * height,
+                width,
+                anchor.y1 + below * height,
+            )
+    if settings.clip:
+        x0, y0, x1, y1 = settings.clip
+        return (x0 * width, y0 * height, x1 * width, y1 * height)
+    return None
+
+
+def _encode_within_budget(pix: Any, settings: RenderSettings) -> bytes:
+    """Codifica el pixmap bajando la calidad JPEG hasta cumplir el presupuesto."""
+    if settings.image_format.upper() != "JPEG":
+        return cast(bytes, pix.tobytes(settings.image_format.lower()))
+    quality = settings.quality
+    data = pix.tobytes("jpeg", jpg_quality=quality)
+    while (
+        settings.max_bytes is not None
+        and len(data) > settings.max_bytes
+        and quality - settings.quality_step >= settings.min_quality
+    ):
+        quality -= settings.quality_step
+        data = pix.tobytes("jpeg", jpg_quality=quality)
+    return cast(bytes, data)
+
+
+def render_page_bytes(page: Any, settings: RenderSettings) -> bytes:
+    """Renderiza una página ya abierta de PyMuPDF y devuelve la imagen codificada.
+
+    La imagen se codifica directamente desde el pixmap de PyMuPDF, sin pasar por
+    PIL. Si con la calidad mínima sigue sin caber en `max_bytes`, se vuelve a
+    renderizar a menor resolución.
+
+    Args:
+        page: Página de PyMuPDF (`fitz.Page`)
+        settings (RenderSettings): Parámetros de preparación (`page` se ignora)
+
+    Returns:
+        bytes: Imagen en `settings.image_format`
+    """
+    import fitz  # PyMuPDF
+
+    clip = _clip_rect(page, settings)
+    colorspace = fitz.csGRAY if settings.grayscale else fitz.csRGB
+    dpi = settings.dpi
+    while True:
+        with timed("cpu", "pdf_render"):
+            pix = page.get_pixmap(
+                dpi=dpi, colorspace=colorspace, clip=clip, alpha=False
+            )
+        with timed("cpu", "image_encode"):
+            data = _encode_within_budget(pix, settings)
+        current_dpi = dpi or 72
+        if (
+            settings.max_bytes is None
+            or len(data) <= settings.max_bytes
+            or current_dpi <= MIN_DPI
+        ):
+            break
+        dpi = max(MIN_DPI, int(current_dpi * (settings.max_bytes / len(data)) ** 0.5))
+    return data
+
+
+def render_page_base64(page: Any, settings: RenderSettings) -> str:
+    """Renderiza una página ya abierta y la devuelve codificada en base64 (ver `render_page_bytes`)."""
+    import base64
+
+    data = render_page_bytes(page, settings)
+    with timed("cpu", "base64_encode"):
+        return base64.b64encode(data).decode("ascii")
+
+
+def render_pdf_page_base64(pdf_path: str, settings: RenderSettings) -> str:
+    """Abre el PDF y renderiza la página `settings.page` (ver `render_page_base64`).
+
+    Args:
+        pdf_path (str): Ruta al archivo PDF
+        settings (RenderSettings): Parámetros de preparación
+
+    Returns:
+        str: Imagen codificada en base64
+    """
+    import fitz  # PyMuPDF
+
+    pdf_document = fitz.open(pdf_path)
+    try:
+        return render_page_base64(pdf_document[settings.page], settings)
+    finally:
+        pdf_document.close()
+
+
+class RasterCache:
+    """Caché de imágenes rasterizadas con un nivel en memoria y uno opcional en disco.
+
+    El nivel en memoria es un LRU acotado por número de entradas. El nivel en
+    disco guarda el base64 ya codificado y, al superar `disk_max_bytes`, elimina
+    los archivos usados hace más tiempo. El directorio se recorre una sola vez
+    al crear la caché; después el orden de uso y el tamaño total se llevan en
+    memoria, así que escribir una entrada no vuelve a listar el directorio.
+    Los hashes de documentos se guardan en otro LRU de hasta `max_digests`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        max_digests: int = 1024,
+    ):
+        """Crea la caché en memoria y, si se indica `disk_dir`, la de disco."""
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.max_digests = max_digests
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._digests: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+        # Archivos del nivel en disco (llave -> bytes), del usado hace más tiempo al más reciente
+        self._disk_entries: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_scan()
+
+    # -------------------------------
+    # Llaves
+    # -------------------------------
+    def document_digest(self, pdf_path: str) -> str:
+        """Calcula el sha256 del documento, reutilizándolo mientras no cambie."""
+        stat = os.stat(pdf_path)
+        stamp = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(stamp)
+            if digest is not None:
+                self._digests.move_to_end(stamp)
+                return digest
+        hasher = hashlib.sha256()
+        with open(pdf_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        with self._lock:
+            self._digests[stamp] = digest
+            while len(self._digests) > self.max_digests:
+                self._digests.popitem(last=False)
+        return digest
+
+    def key_for(self, pdf_path: str, settings: RenderSettings) -> str:
+        """Construye la llave: hash del contenido más parámetros de render."""
+        return f"{self.document_digest(pdf_path)}-{settings.cache_key()}"
+
+    # -------------------------------
+    # Nivel en memoria
+    # -------------------------------
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return value
+
+    def _memory_put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    # -------------------------------
+    # Nivel en disco
+    # -------------------------------
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f"{key}.b64"
+
+    def _disk_scan(self) -> None:
+        """Registra los archivos que ya están en disco, del más antiguo al más reciente."""
+        assert self.disk_dir is not None
+        entries = []
+        for path in self.disk_dir.glob("*.b64"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        with self._lock:
+            for _, key, size in entries:
+                self._disk_entries[key] = size
+            self._disk_bytes = sum(self._disk_entries.values())
+        self._disk_evict()
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            value = path.read_text(encoding="ascii")
+        except FileNotFoundError:
+            # Otro proceso pudo expulsarlo
+            with self._lock:
+                self._disk_bytes -= self._disk_entries.pop(key, 0)
+            return None
+        # Actualiza la fecha de acceso para que la expulsión siga siendo LRU al reiniciar
+        os.utime(path)
+        with self._lock:
+            if key in self._disk_entries:
+                self._disk_entries.move_to_end(key)
+            else:
+                self._disk_entries[key] = len(value)
+                self._disk_bytes += len(value)
+        return value
+
+    def _disk_put(self, key: str, value: str) -> None:
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(value, encoding="ascii")
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += len(value) - self._disk_entries.pop(key, 0)
+            self._disk_entries[key] = len(value)
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """Elimina los archivos usados hace más tiempo hasta volver a `disk_max_bytes`."""
+        victims = []
+        with self._lock:
+            while self._disk_bytes > self.disk_max_bytes and self._disk_entries:
+                key, size = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= size
+                self.evictions += 1
+                victims.append(key)
+        for key in victims:
+            self._disk_path(key).unlink(missing_ok=True)
+
+    # -------------------------------
+    # API pública
+    # -------------------------------
+    def get_or_render(
+        self,
+        pdf_path: str,
+        settings: RenderSettings,
+        render: Callable[[str, RenderSettings], str] = render_pdf_page_base64,
+    ) -> str:
+        """Devuelve la imagen en base64, renderizándola solo si no está en caché.
+
+        Args:
+            pdf_path (str): Ruta al archivo PDF
+            settings (RenderSettings): Parámetros de render
+            render: Función que renderiza el documento ante un fallo de caché
+
+        Returns:
+            str: Imagen codificada en base64
+        """
+        key = self.key_for(pdf_path, settings)
+
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+
+        value = self._disk_get(key)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._memory_put(key, value)
+            return value
+
+        start = time.perf_counter()
+        value = render(pdf_path, settings)
+        with self._lock:
+            self.misses += 1
+            self.render_seconds += time.perf_counter() - start
+        self._memory_put(key, value)
+        self._disk_put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Vacía el nivel en memoria (el nivel en disco se conserva)."""
+        with self._lock:
+            self._memory.clear()
+            self._digests.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché.
+
+        `saved_seconds` estima el tiempo de CPU ahorrado multiplicando los
+        aciertos por el tiempo promedio de render observado en los fallos.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            avg_render = self.render_seconds / self.misses if self.misses else 0.0
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "render_seconds": self.render_seconds,
+                "saved_seconds": hits * avg_render,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_raster_cache: Optional[RasterCache] = None
+
+
+def get_raster_cache() -> RasterCache:
+    """Devuelve la caché compartida del proceso.
+
+    Se configura con las variables de entorno `RASTER_CACHE_MAX_ENTRIES`,
+    `RASTER_CACHE_DIR` (activa el nivel en disco) y `RASTER_CACHE_DISK_MAX_BYTES`.
+    """
+    global _raster_cache
+    if _raster_cache is None:
+        _raster_cache = RasterCache(
+            max_entries=int(os.getenv("RASTER_CACHE_MAX_ENTRIES", "64")),
+            disk_dir=os.getenv("RASTER_CACHE_DIR") or None,
+            disk_max_bytes=int(
+                os.getenv("RASTER_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024))
+            ),
+        )
+    return _raster_cache
+
+
+def document_digest(pdf_path: str) -> str:
+    """Devuelve el sha256 del documento (memorizado mientras no cambie el archivo)."""
+    return get_raster_cache().document_digest(pdf_path)
+
+
+get_metrics().register_collector(
+    "raster_cache", lambda: {"shared": get_raster_cache().stats()}
+)
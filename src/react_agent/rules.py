@@ -0,0 +1,391 @@
+"""Motor de reglas de Póliza Express.
+
+Evalúa de forma determinista las reglas que antes se le pedían al LLM en el
+prompt de `saldo_agent` (ver `prompts.REGLAS_POLIZA_EXPRESS`):
+
+- Regla 1: TARJETA DE CRÉDITO con saldo menor o igual a 200.000.000.
+- Regla 2: CRÉDITO de un plan válido, más de 60 días entre desembolso y
+  siniestro y monto desembolsado menor a 50.000.000.
+- Regla 3: cualquier otro producto, más de 730 días entre desembolso y
+  siniestro y saldo menor a 50.000.000.
+- En todos los casos la fecha de siniestro debe estar dentro de la vigencia.
+
+`evaluate_claim` evalúa una reclamación en Python puro (microsegundos) y
+`score_batch` evalúa un DataFrame completo con operaciones vectorizadas de
+pandas/NumPy. Ambas devuelven exactamente el mismo resultado; el LLM solo
+redacta la justificación.
+
+Las columnas `Plan`, `Inicio vigencia` y `Fin vigencia` son opcionales: sin
+plan, un CRÉDITO se evalúa con la Regla 3, y sin vigencia se considera que el
+siniestro está dentro de ella (queda marcado como no verificado).
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from react_agent.text_extraction import normalize_text
+
+SALDO_MAX_TARJETA = 200_000_000
+MONTO_MAX_CREDITO = 50_000_000
+SALDO_MAX_OTROS = 50_000_000
+DIAS_MIN_CREDITO = 60
+DIAS_MIN_OTROS = 730
+
+PLANES_CREDITO = frozenset(
+    {"MOVIL CONSUMO FIJO", "MOVIL CONSUMO LIBRANZA", "MOVIL VEHICULO PARTICULAR"}
+)
+
+# Columnas de `data_saldos.csv` (incluye el typo "Mondo desembolso")
+COL_SALDO = "Saldo"
+COL_PRODUCTO = "Producto"
+COL_FECHA_DESEMBOLSO = "fecha desembolso"
+COL_MONTO_DESEMBOLSO = "Mondo desembolso"
+COL_PLAN = "Plan"
+COL_INICIO_VIGENCIA = "Inicio vigencia"
+COL_FIN_VIGENCIA = "Fin vigencia"
+COL_FECHA_SINIESTRO = "Fecha siniestro"
+
+FORMATOS_FECHA = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y")
+
+MOTIVOS = {
+    "regla_1": "Regla 1: tarjeta de crédito con saldo menor o igual a 200.000.000",
+    "regla_2": "Regla 2: crédito de plan válido, más de 60 días desde el desembolso "
+    "y monto desembolsado menor a 50.000.000",
+    "regla_3": "Regla 3: más de 730 días desde el desembolso y saldo menor a 50.000.000",
+    "sin_siniestro": "No hay una fecha de siniestro válida",
+    "fuera_vigencia": "La fecha de siniestro está fuera de la vigencia del crédito",
+    "datos_incompletos": "Faltan datos del producto para evaluar las reglas",
+    "saldo_tarjeta": "El saldo de la tarjeta de crédito supera 200.000.000",
+    "dias_credito": "Han pasado 60 días o menos entre el desembolso y el siniestro",
+    "monto_credito": "El monto desembolsado es mayor o igual a 50.000.000",
+    "dias_otros": "Han pasado 730 días o menos entre el desembolso y el siniestro",
+    "saldo_otros": "El saldo es mayor o igual a 50.000.000",
+}
+
+
+@dataclass(frozen=True)
+class Elegibilidad:
+    """Resultado de evaluar las reglas de Póliza Express para una reclamación."""
+
+    aplica: bool
+    regla: Optional[int]
+    motivo: str
+    dias_desde_desembolso: Optional[int] = None
+    vigencia_verificada: bool = False
+
+    def texto(self) -> str:
+        """Resumen en una línea para entregar al LLM o al usuario."""
+        respuesta = "Sí" if self.aplica else "No"
+        detalle = MOTIVOS[self.motivo]
+        if self.dias_desde_desembolso is not None:
+            detalle += (
+                f" (días entre desembolso y siniestro: {self.dias_desde_desembolso})"
+            )
+        if not self.vigencia_verificada:
+            detalle += "; vigencia no disponible en los datos"
+        return f"Aplica a Póliza Express: {respuesta}. {detalle}."
+
+
+# -------------------------------
+# Normalización de valores
+# -------------------------------
+_MILES = re.compile(r"-?\d{1,3}(?:[.,]\d{3})+")
+
+
+def parse_monto(value: Any) -> float:
+    """Convierte un saldo o monto a float (acepta `1.500.000`, `$1,500,000`, `1500000.0`).
+
+    Devuelve NaN si el valor no se puede interpretar.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if value is None:
+        return math.nan
+    texto = re.sub(r"[^\d,.\-]", "", str(value))
+    if _MILES.fullmatch(texto):
+        texto = re.sub(r"[.,]", "", texto)
+    try:
+        return float(texto.replace(",", "."))
+    except ValueError:
+        return math.nan
+
+
+def parse_fecha(value: Any) -> Optional[date]:
+    """Convierte una fecha `DD/MM/AAAA`, `AAAA-MM-DD` o `DD-MM-AAAA` a `date`."""
+    if isinstance(value, datetime):
+        return None if value != value else value.date()  # NaT
+    if isinstance(value, date):
+        return value
+    if value is None:
+        return None
+    texto = str(value).strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def categoria_producto(producto: Any, plan: Any = None) -> str:
+    """Clasifica el producto en `tarjeta`, `credito_plan` (Regla 2) u `otro` (Regla 3)."""
+    nombre = " ".join(normalize_text(str(producto or "")).split())
+    if nombre == "TARJETA DE CREDITO":
+        return "tarjeta"
+    # El plan puede venir en su propia columna o directamente como producto
+    nombre_plan = " ".join(normalize_text(str(plan or "")).split())
+    if nombre in PLANES_CREDITO or (
+        nombre == "CREDITO" and nombre_plan in PLANES_CREDITO
+    ):
+        return "credito_plan"
+    return "otro"
+
+
+def _es_nan(x: float) -> bool:
+    return x != x
+
+
+# -------------------------------
+# Evaluación de una reclamación
+# -------------------------------
+def evaluate_claim(
+    producto: Any,
+    saldo: Any,
+    fecha_desembolso: Any,
+    monto_desembolso: Any,
+    fecha_siniestro: Any,
+    plan: Any = None,
+    inicio_vigencia: Any = None,
+    fin_vigencia: Any = None,
+) -> Elegibilidad:
+    """Evalúa las reglas de Póliza Express para una reclamación.
+
+    Args:
+        producto: Tipo de producto (p. ej. "TARJETA DE CRÉDITO", "CRÉDITO")
+        saldo: Saldo actual del producto
+        fecha_desembolso: Fecha de desembolso
+        monto_desembolso: Monto desembolsado
+        fecha_siniestro: Fecha de defunción (`AAAA-MM-DD`)
+        plan: Plan del crédito, si se conoce
+        inicio_vigencia: Inicio de la vigencia, si se conoce
+        fin_vigencia: Fin de la vigencia, si se conoce
+
+    Returns:
+        Elegibilidad: Si aplica, la regla cumplida y el motivo
+    """
+    siniestro = parse_fecha(fecha_siniestro)
+    inicio = parse_fecha(inicio_vigencia)
+    fin = parse_fecha(fin_vigencia)
+    verificada = inicio is not None or fin is not None
+    desembolso = parse_fecha(fecha_desembolso)
+    dias = (siniestro - desembolso).days if siniestro and desembolso else None
+
+    def resultado(motivo: str, regla: Optional[int] = None) -> Elegibilidad:
+        return Elegibilidad(regla is not None, regla, motivo, dias, verificada)
+
+    if siniestro is None:
+        return resultado("sin_siniestro")
+    if (inicio and siniestro < inicio) or (fin and siniestro > fin):
+        return resultado("fuera_vigencia")
+
+    categoria = categoria_producto(producto, plan)
+    valor_saldo = parse_monto(saldo)
+    if categoria == "tarjeta":
+        if _es_nan(valor_saldo):
+            return resultado("datos_incompletos")
+        if valor_saldo <= SALDO_MAX_TARJETA:
+            return resultado("regla_1", 1)
+        return resultado("saldo_tarjeta")
+
+    if categoria == "credito_plan":
+        monto = parse_monto(monto_desembolso)
+        if dias is None or _es_nan(monto):
+            return resultado("datos_incompletos")
+        if dias <= DIAS_MIN_CREDITO:
+            return resultado("dias_credito")
+        if monto >= MONTO_MAX_CREDITO:
+            return resultado("monto_credito")
+        return resultado("regla_2", 2)
+
+    if dias is None or _es_nan(valor_saldo):
+        return resultado("datos_incompletos")
+    if dias <= DIAS_MIN_OTROS:
+        return resultado("dias_otros")
+    if valor_saldo >= SALDO_MAX_OTROS:
+        return resultado("saldo_otros")
+    return resultado("regla_3", 3)
+
+
+def evaluate_record(record: Any, fecha_siniestro: Any) -> Elegibilidad:
+    """Evalúa un `balances.BalanceRecord` con la fecha de siniestro dada."""
+    return evaluate_claim(
+        record.producto,
+        record.saldo,
+        record.fecha_desembolso,
+        record.monto_desembolso,
+        fecha_siniestro,
+        plan=record.plan,
+        inicio_vigencia=record.inicio_vigencia,
+        fin_vigencia=record.fin_vigencia,
+    )
+
+
+# -------------------------------
+# Evaluación vectorizada
+# -------------------------------
+def _montos(serie: Any) -> Any:
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    texto = serie.astype(str).str.replace(r"[^\d,.\-]", "", regex=True)
+    miles = texto.str.fullmatch(_MILES.pattern)
+    texto = texto.where(~miles, texto.str.replace(r"[.,]", "", regex=True))
+    return pd.to_numeric(texto.str.replace(",", ".", regex=False), errors="coerce")
+
+
+def _fechas(serie: Any) -> Any:
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.normalize()
+    resultado = np.full(len(serie), np.datetime64("NaT"), dtype="datetime64[ns]")
+    # Las fechas se repiten mucho: se interpreta cada valor distinto una sola vez
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos):
+        texto = pd.Series(unicos, dtype=object).astype(str).str.strip()
+        fechas = pd.to_datetime(texto, format=FORMATOS_FECHA[0], errors="coerce")
+        for formato in FORMATOS_FECHA[1:]:
+            faltantes = fechas.isna()
+            if not faltantes.any():
+                break
+            fechas[faltantes] = pd.to_datetime(
+                texto[faltantes], format=formato, errors="coerce"
+            )
+        validos = codigos >= 0
+        resultado[validos] = fechas.to_numpy(dtype="datetime64[ns]")[codigos[validos]]
+    return pd.Series(resultado, index=serie.index)
+
+
+def score_batch(df: Any, fecha_siniestro: Any = None) -> Any:
+    """Evalúa las reglas para todas las filas de un DataFrame a la vez.
+
+    Args:
+        df: Filas con las columnas de `data_saldos.csv` (y opcionalmente `Plan`,
+            `Inicio vigencia`, `Fin vigencia` y `Fecha siniestro`)
+        fecha_siniestro: Fecha de siniestro común a todas las filas; si es None
+            se usa la columna `Fecha siniestro` de cada fila
+
+    Returns:
+        DataFrame con el mismo índice y las columnas `aplica`, `regla`,
+        `motivo`, `dias_desde_desembolso` y `vigencia_verificada`
+    """
+    import numpy as np
+    import pandas as pd
+
+    def fechas(nombre: str) -> Any:
+        if nombre in df:
+            return _fechas(df[nombre])
+        return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+
+    if fecha_siniestro is None:
+        siniestro = fechas(COL_FECHA_SINIESTRO)
+    else:
+        valor = parse_fecha(fecha_siniestro)
+        siniestro = pd.Series(pd.Timestamp(valor) if valor else pd.NaT, index=df.index)
+
+    inicio = fechas(COL_INICIO_VIGENCIA)
+    fin = fechas(COL_FIN_VIGENCIA)
+    dias = (siniestro - _fechas(df[COL_FECHA_DESEMBOLSO])).dt.days.to_numpy(dtype=float)
+    saldo = _montos(df[COL_SALDO]).to_numpy(dtype=float)
+    monto = _montos(df[COL_MONTO_DESEMBOLSO]).to_numpy(dtype=float)
+
+    # Pocas combinaciones distintas de producto/plan: se clasifican una sola vez
+    claves = df[COL_PRODUCTO].astype(str)
+    if COL_PLAN in df:
+        claves = claves + "|" + df[COL_PLAN].astype(str)
+    codigos, unicos = pd.factorize(claves)
+    categorias = [categoria_producto(*clave.split("|", 1)) for clave in unicos]
+    categoria = np.array(categorias + ["otro"], dtype=object)[codigos]
+    tarjeta = categoria == "tarjeta"
+    credito = categoria == "credito_plan"
+    otro = categoria == "otro"
+
+    sin_siniestro = siniestro.isna().to_numpy()
+    fuera = (
+        (inicio.notna() & (siniestro < inicio)) | (fin.notna() & (siniestro > fin))
+    ).to_numpy()
+    sin_dias = np.isnan(dias)
+
+    condiciones = [
+        sin_siniestro,
+        fuera,
+        tarjeta & np.isnan(saldo),
+        tarjeta & (saldo <= SALDO_MAX_TARJETA),
+        tarjeta,
+        credito & (sin_dias | np.isnan(monto)),
+        credito & (dias <= DIAS_MIN_CREDITO),
+        credito & (monto >= MONTO_MAX_CREDITO),
+        credito,
+        otro & (sin_dias | np.isnan(saldo)),
+        otro & (dias <= DIAS_MIN_OTROS),
+        otro & (saldo >= SALDO_MAX_OTROS),
+    ]
+    motivos = [
+        "sin_siniestro",
+        "fuera_vigencia",
+        "datos_incompletos",
+        "regla_1",
+        "saldo_tarjeta",
+        "datos_incompletos",
+        "dias_credito",
+        "monto_credito",
+        "regla_2",
+        "datos_incompletos",
+        "dias_otros",
+        "saldo_otros",
+    ]
+    motivo = np.select(condiciones, motivos, default="regla_3")
+    regla = np.select(
+        [motivo == "regla_1", motivo == "regla_2", motivo == "regla_3"],
+        [1, 2, 3],
+        default=0,
+    )
+
+    return pd.DataFrame(
+        {
+            "aplica": regla > 0,
+            "regla": pd.Series(
+                np.where(regla > 0, regla, np.nan), index=df.index
+            ).astype("Int64"),
+            "motivo": motivo,
+            "dias_desde_desembolso": pd.Series(dias, index=df.index).astype("Int64"),
+            "vigencia_verificada": (inicio.notna() | fin.notna()).to_numpy(),
+        },
+        index=df.index,
+    )
+
+
+def score_csv(csv_path: str, fecha_siniestro: Any = None) -> Any:
+    """Lee un CSV de saldos (o de reclamaciones) y lo evalúa con `score_batch`."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, dtype={"Cedula": str})
+    return df.join(score_batch(df, fecha_siniestro))
+
+
+def resumen_lote(resultados: Any) -> Dict[str, Any]:
+    """Conteo de reclamaciones por regla y por motivo de descarte."""
+    return {
+        "total": int(len(resultados)),
+        "aplican": int(resultados["aplica"].sum()),
+        "por_motivo": {
+            k: int(v) for k, v in resultados["motivo"].value_counts().items()
+        },
+    }
@@ -0,0 +1,602 @@
+"""Planificador compartido de llamadas a los modelos.
+
+Con muchas reclamaciones concurrentes, Azure OpenAI y Vertex AI responden con
+errores de cuota (429) y cada agente reintentaba por su cuenta. Todas las
+llamadas a modelos pasan por este planificador, que por cada llave
+`proveedor/modelo` aplica:
+
+- Cubetas de tokens (token buckets) de solicitudes por minuto y tokens por
+  minuto; los tokens se estiman antes de la llamada y se corrigen con el uso
+  real que reporta el modelo.
+- Concurrencia adaptativa AIMD: el límite de llamadas en vuelo crece de a uno
+  por ventana mientras todo va bien, se reduce a la mitad ante un 429 y un 10 %
+  si la latencia supera el objetivo.
+- Carriles de prioridad: las reclamaciones interactivas pasan antes que las de
+  lote en la cola de espera (`Configuration.priority`).
+- Reintentos ante 429 con espera exponencial (o la que indique el proveedor).
+
+Los límites se configuran con la variable de entorno `REACT_AGENT_RATE_LIMITS`
+(JSON por llave o por proveedor), por ejemplo
+`{"azure_openai/gpt-4.1": {"rpm": 500, "tpm": 150000, "max_concurrency": 32}}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field, fields
+from functools import cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from react_agent.deadlines import DeadlineExceeded, remaining, with_deadline
+from react_agent.instrumentation import get_metrics, metrics_enabled
+
+T = TypeVar("T")
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Tokens de salida que se reservan por llamada antes de conocer el uso real
+DEFAULT_OUTPUT_TOKENS = 512
+
+# Tokens que cobra Gemini por cada imagen
+IMAGE_TOKENS = 258
+
+
+@dataclass
+class ModelLimits:
+    """Límites de una llave `proveedor/modelo` (None = sin límite)."""
+
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+    max_concurrency: int = 16
+    min_concurrency: int = 1
+    initial_concurrency: Optional[int] = None
+    latency_target_s: Optional[float] = None
+    max_retries: int = 4
+    retry_base_s: float = 1.0
+
+
+DEFAULT_LIMITS = ModelLimits()
+
+
+@cache
+def _rate_limit_error_types() -> Tuple[Type[BaseException], ...]:
+    """Clases de error de cuota de los SDK instalados (se importan en el primer error)."""
+    types: List[Type[BaseException]] = []
+    try:
+        from openai import RateLimitError
+
+        types.append(RateLimitError)
+    except ImportError:
+        pass
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+
+        types.extend((ResourceExhausted, TooManyRequests))
+    except ImportError:
+        pass
+    return tuple(types)
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Reconoce los errores de cuota de OpenAI/Azure (429) y Vertex AI (ResourceExhausted).
+
+    Solo por el tipo de la excepción o su código de estado, nunca por el texto
+    del mensaje (que puede contener "429" en un id, un monto o una cédula).
+    """
+    if getattr(exc, "status_code", None) == 429 or getattr(exc, "code", None) == 429:
+        return True
+    return isinstance(exc, _rate_limit_error_types())
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Segundos de espera que sugiere el proveedor (cabecera Retry-After), si los hay."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# -------------------------------
+# Cubeta de tokens
+# -------------------------------
+class TokenBucket:
+    """Cubeta de tokens que se rellena a `rate_per_min` por minuto hasta `capacity`.
+
+    Admite deuda: si el uso real supera lo reservado, la cubeta queda negativa
+    y las siguientes llamadas esperan a que se pague.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None):
+        """Crea el balde lleno, con `rate_per_min` unidades por minuto."""
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_consume(self, amount: float) -> float:
+        """Consume `amount` si hay saldo y devuelve 0; si no, los segundos a esperar."""
+        with self._lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Corrige la reserva con el uso real (positivo consume, negativo devuelve)."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+    async def acquire(self, amount: float) -> float:
+        """Espera hasta poder consumir `amount`; devuelve los segundos esperados."""
+        waited = 0.0
+        while (wait := self.try_consume(amount)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def acquire_sync(self, amount: float) -> float:
+        """Versión bloqueante de `acquire` para las llamadas síncronas."""
+        waited = 0.0
+        while (wait := self.try_consume(amount)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+
+# -------------------------------
+# Concurrencia adaptativa con prioridades
+# -------------------------------
+class AIMDLimiter:
+    """Límite de llamadas en vuelo con aumento aditivo y disminución multiplicativa.
+
+    Las llamadas que no caben esperan en una cola ordenada por prioridad (menor
+    valor primero) y por orden de llegada.
+    """
+
+    def __init__(self, limits: ModelLimits):
+        """Crea el carril con la concurrencia inicial de `limits`."""
+        self.limits = limits
+        self.limit = float(limits.initial_concurrency or limits.max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+
+    def _can_start(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self, priority: int = 0) -> None:
+        """Espera un cupo; las prioridades menores salen primero de la cola."""
+        if self._can_start() and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # el cupo se asignó justo antes de cancelar
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self) -> None:
+        """Devuelve el cupo y despierta a los siguientes en la cola."""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._can_start():
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def on_success(self, latency_s: float) -> None:
+        """Ajusta el límite tras una llamada exitosa."""
+        target = self.limits.latency_target_s
+        if target is not None and latency_s > target:
+            self.limit = max(self.limits.min_concurrency, self.limit * 0.9)
+        else:
+            self.limit = min(
+                self.limits.max_concurrency, self.limit + 1.0 / max(1.0, self.limit)
+            )
+        self._wake()
+
+    def on_throttle(self) -> None:
+        """Reduce el límite a la mitad ante un 429."""
+        self.throttled += 1
+        self.limit = max(self.limits.min_concurrency, self.limit * 0.5)
+
+    @property
+    def queued(self) -> int:
+        """Número de llamadas esperando un cupo."""
+        return len(self._waiters)
+
+
+# -------------------------------
+# Planificador
+# -------------------------------
+@dataclass
+class _Lane:
+    limits: ModelLimits
+    limiter: AIMDLimiter
+    requests: Optional[TokenBucket]
+    tokens: Optional[TokenBucket]
+    calls: int = 0
+    retries: int = 0
+    wait_s: float = 0.0
+    waits: List[float] = field(default_factory=list)
+
+
+class Scheduler:
+    """Aplica límites de cuota, concurrencia AIMD y prioridades por llave de modelo."""
+
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None):
+        """Crea el planificador; las llaves sin límites propios usan los por defecto."""
+        self.limits = limits or {}
+        self._lanes: Dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+
+    def limits_for(self, key: str) -> ModelLimits:
+        """Límites de la llave exacta, de su proveedor o los por defecto."""
+        return (
+            self.limits.get(key)
+            or self.limits.get(key.split("/", 1)[0])
+            or DEFAULT_LIMITS
+        )
+
+    def _lane(self, key: str) -> _Lane:
+        lane = self._lanes.get(key)
+        if lane is None:
+            with self._lock:
+                lane = self._lanes.get(key)
+                if lane is None:
+                    limits = self.limits_for(key)
+                    lane = _Lane(
+                        limits=limits,
+                        limiter=AIMDLimiter(limits),
+                        requests=TokenBucket(limits.rpm) if limits.rpm else None,
+                        tokens=TokenBucket(limits.tpm) if limits.tpm else None,
+                    )
+                    self._lanes[key] = lane
+        return lane
+
+    @asynccontextmanager
+    async def slot(
+        self, key: str, tokens: float = 0, priority: int = 0
+    ) -> AsyncIterator[Callable[[float], None]]:
+        """Reserva un cupo para una llamada a `key`.
+
+        Entrega una función para informar los tokens reales usados. Un 429 dentro
+        del bloque reduce la concurrencia; cualquier otro error solo libera el cupo.
+        """
+        lane = self._lane(key)
+        start = time.perf_counter()
+        await lane.limiter.acquire(priority)
+        try:
+            if lane.requests:
+                await lane.requests.acquire(1)
+            if lane.tokens and tokens:
+                await lane.tokens.acquire(tokens)
+            waited = time.perf_counter() - start
+            lane.calls += 1
+            lane.wait_s += waited
+            _observe_wait(key, waited)
+
+            def report_usage(actual: float) -> None:
+                if lane.tokens and actual:
+                    lane.tokens.adjust(actual - tokens)
+
+            call_start = time.perf_counter()
+            try:
+                yield report_usage
+            except BaseException as e:
+                if isinstance(e, Exception) and is_rate_limit_error(e):
+                    lane.limiter.on_throttle()
+                raise
+            lane.limiter.on_success(time.perf_counter() - call_start)
+        finally:
+            lane.limiter.release()
+
+    async def call(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        tokens: float = 0,
+        priority: int = 0,
+        usage: Optional[Callable[[T], float]] = None,
+    ) -> T:
+        """Ejecuta `fn` dentro de un cupo de `key`, reintentando ante errores 429.
+
+        La espera del cupo y la llamada se acotan con el plazo de la corrida
+        (`Configuration.deadline`), y no se reintenta si la espera del 429
+        excede el tiempo restante.
+
+        Args:
+            key: Llave `proveedor/modelo`
+            fn: Fábrica de la corrutina que hace la llamada (se vuelve a llamar en cada intento)
+            tokens: Tokens estimados de la llamada (entrada + salida)
+            priority: 0 interactivo, 1 lote
+            usage: Extrae del resultado los tokens realmente usados
+
+        Returns:
+            El resultado de `fn`
+        """
+        lane = self._lane(key)
+
+        async def attempt_call() -> T:
+            async with self.slot(key, tokens, priority) as report_usage:
+                result = await fn()
+                if usage is not None:
+                    report_usage(usage(result))
+                return result
+
+        for attempt in range(lane.limits.max_retries + 1):
+            try:
+                return await with_deadline(attempt_call(), key)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == lane.limits.max_retries:
+                    raise
+                lane.retries += 1
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = (
+                        lane.limits.retry_base_s * 2**attempt * (0.5 + random.random())
+                    )
+                left = remaining()
+                if left is not None and delay >= left:
+                    raise DeadlineExceeded(
+                        f"{key}: el reintento excede el plazo de la reclamación"
+                    ) from e
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def call_sync(self, key: str, fn: Callable[[], T], tokens: float = 0) -> T:
+        """Ejecuta una llamada síncrona respetando solo las cubetas de `key`.
+
+        La concurrencia adaptativa y las prioridades se aplican a las llamadas
+        asíncronas, que son las que usa el grafo.
+        """
+        lane = self._lane(key)
+        if lane.requests:
+            lane.requests.acquire_sync(1)
+        if lane.tokens and tokens:
+            lane.tokens.acquire_sync(tokens)
+        lane.calls += 1
+        return fn()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Estado por llave: límite actual, en vuelo, en cola, 429 y espera media."""
+        return {
+            key: {
+                "limit": lane.limiter.limit,
+                "in_flight": lane.limiter.in_flight,
+                "queued": lane.limiter.queued,
+                "throttled": lane.limiter.throttled,
+                "retries": lane.retries,
+                "calls": lane.calls,
+                "mean_wait_s": lane.wait_s / lane.calls if lane.calls else 0.0,
+            }
+            for key, lane in self._lanes.items()
+        }
+
+
+def _observe_wait(key: str, seconds: float) -> None:
+    if metrics_enabled():
+        get_metrics().observe_queue("scheduler", key, seconds)
+
+
+def estimate_tokens(
+    text: str, images: int = 0, output_tokens: int = DEFAULT_OUTPUT_TOKENS
+) -> float:
+    """Estimación de tokens de una llamada (≈ 4 caracteres por token) para las cubetas."""
+    return len(text) / 4 + images * IMAGE_TOKENS + output_tokens
+
+
+def parse_limits(raw: str) -> Dict[str, ModelLimits]:
+    """Lee los límites de un JSON `{llave: {rpm, tpm, max_concurrency, ...}}`."""
+    names = {f.name for f in fields(ModelLimits)}
+    return {
+        key: ModelLimits(**{k: v for k, v in values.items() if k in names})
+        for key, values in json.loads(raw).items()
+    }
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Devuelve el planificador compartido del proceso."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler(
+                    parse_limits(os.getenv("REACT_AGENT_RATE_LIMITS") or "{}")
+                )
+    return _scheduler
+
+
+def set_scheduler(scheduler: Optional[Scheduler]) -> None:
+    """Reemplaza el planificador del proceso (None lo vuelve a crear desde el entorno)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+get_metrics().register_collector("scheduler_lane", lambda: get_scheduler().stats())
+
+
+def current_priority() -> int:
+    """Prioridad de la corrida actual según `Configuration.priority`."""
+    from react_agent.configuration import Configuration
+
+    return PRIORITIES.get(Configuration.from_context().priority, 0)
+
+
+# -------------------------------
+# Modelo de chat planificado
+# -------------------------------
+def _usage_tokens(result: ChatResult) -> float:
+    total = 0
+    for generation in result.generations:
+        usage = getattr(generation.message, "usage_metadata", None) or {}
+        total += usage.get("total_tokens", 0)
+    return total
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Envuelve un modelo de chat para que cada llamada pase por el planificador.
+
+    Conserva las herramientas enlazadas, el streaming y los parámetros de
+    trazas del modelo envuelto.
+    """
+
+    inner: BaseChatModel
+    key: str
+    output_tokens: int = DEFAULT_OUTPUT_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return self.inner._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return dict(self.inner._identifying_params)
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any) -> Any:
+        return self.inner._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        """Enlaza las herramientas sin saltarse el planificador."""
+        # El modelo envuelto traduce las herramientas a su formato; se enlazan
+        # esos mismos argumentos a este modelo para no saltarse el planificador.
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(bound, "kwargs", {}))
+
+    def _should_stream(
+        self, *, async_api: bool, run_manager: Any = None, **kwargs: Any
+    ) -> bool:
+        return self.inner._should_stream(
+            async_api=async_api, run_manager=run_manager, **kwargs
+        )
+
+    def _estimate(self, messages: List[BaseMessage]) -> float:
+        return count_tokens_approximately(messages) + self.output_tokens
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return get_scheduler().call_sync(
+            self.key,
+            lambda: self.inner._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ),
+            tokens=self._estimate(messages),
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await get_scheduler().call(
+            self.key,
+            lambda: self.inner._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ),
+            tokens=self._estimate(messages),
+            priority=current_priority(),
+            usage=_usage_tokens,
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        get_scheduler().call_sync(
+            self.key, lambda: None, tokens=self._estimate(messages)
+        )
+        yield from self.inner._stream(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Sin reintentos: una respuesta parcial ya se entregó al consumidor
+        async with get_scheduler().slot(
+            self.key, self._estimate(messages), current_priority()
+        ) as report_usage:
+            used = 0
+            async for chunk in self.inner._astream(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            ):
+                usage = getattr(chunk.message, "usage_metadata", None) or {}
+                used += usage.get("total_tokens", 0)
+                yield chunk
+            report_usage(used)
+
+
+def scheduled(model: BaseChatModel, key: str) -> ScheduledChatModel:
+    """Envuelve `model` para que sus llamadas pasen por el planificador con la llave `key`."""
+    return ScheduledChatModel(inner=model, key=key)
@@ -0,0 +1,265 @@
+"""Búsqueda web con cliente reutilizado, caché con TTL y consultas concurrentes.
+
+`tools.search` creaba un cliente de Tavily en cada llamada y solo podía hacer
+una consulta a la vez. `SearchClient`:
+
+- Reutiliza el cliente del backend (uno por `max_results`).
+- Guarda los resultados en una caché con TTL y expulsión LRU, con la llave
+  (consulta normalizada, `max_results`); los errores no se guardan.
+- Ejecuta varias consultas en paralelo (`search_many`) y comparte una sola
+  llamada entre las consultas idénticas que están en vuelo al mismo tiempo.
+- Pasa cada llamada al backend por el planificador compartido
+  (`react_agent.scheduler`), que limita la concurrencia, reintenta ante 429 y
+  respeta el plazo de la corrida.
+
+El cliente del proceso se configura con `REACT_AGENT_SEARCH_BACKEND` (`tavily`
+o `fake`, un backend local sin red para pruebas y desarrollo),
+`REACT_AGENT_SEARCH_TTL_S` y `REACT_AGENT_SEARCH_MAX_ENTRIES`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+from react_agent.scheduler import current_priority, get_scheduler
+
+SearchResult = Dict[str, Any]
+
+
+def normalize_query(query: str) -> str:
+    """Normaliza una consulta para la caché: NFKC, minúsculas y espacios colapsados."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+class TavilyBackend:
+    """Búsqueda con Tavily; conserva un cliente `TavilySearch` por `max_results`."""
+
+    key = "tavily/search"
+
+    def __init__(self) -> None:
+        """Crea el backend; los clientes de Tavily se crean al primer uso."""
+        self._clients: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, max_results: int) -> Any:
+        client = self._clients.get(max_results)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(max_results)
+                if client is None:
+                    from langchain_tavily import TavilySearch  # type: ignore[import-untyped]
+
+                    client = TavilySearch(max_results=max_results)
+                    self._clients[max_results] = client
+        return client
+
+    async def asearch(self, query: str, max_results: int) -> SearchResult:
+        """Ejecuta la consulta en Tavily."""
+        return cast(
+            SearchResult, await self._client(max_results).ainvoke({"query": query})
+        )
+
+
+class FakeSearchBackend:
+    """Backend local sin red: devuelve resultados deterministas tras `latency_s` segundos.
+
+    `results` fija la respuesta de consultas puntuales (por consulta tal como
+    llega al backend); las demás reciben resultados sintéticos. Lleva la
+    cuenta de las consultas recibidas en `queries`.
+    """
+
+    key = "fake/search"
+
+    def __init__(
+        self, results: Optional[Dict[str, SearchResult]] = None, latency_s: float = 0.0
+    ):
+        """Crea el backend con respuestas fijas por consulta."""
+        self.results = dict(results or {})
+        self.latency_s = latency_s
+        self.queries: List[str] = []
+
+    async def asearch(self, query: str, max_results: int) -> SearchResult:
+        """Devuelve el resultado fijado para `query` o uno sintético."""
+        self.queries.append(query)
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        if query in self.results:
+            return self.results[query]
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Resultado {i + 1} de '{query}'",
+                    "url": f"https://example.com/{i + 1}?q={query.replace(' ', '+')}",
+                    "content": f"Contenido de prueba {i + 1} para '{query}'.",
+                }
+                for i in range(max_results)
+            ],
+        }
+
+
+# -------------------------------
+# Cliente
+# -------------------------------
+class SearchClient:
+    """Búsquedas con caché con TTL, deduplicación de consultas en vuelo y concurrencia."""
+
+    def __init__(self, backend: Any, ttl_s: float = 300.0, max_entries: int = 1024):
+        """Crea el cliente sobre `backend` con caché de `max_entries` consultas."""
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._cache: OrderedDict[Tuple[str, int], Tuple[float, SearchResult]] = (
+            OrderedDict()
+        )
+        self._in_flight: Dict[Tuple[str, int], asyncio.Task[SearchResult]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.backend_calls = 0
+
+    def _cached(self, key: Tuple[str, int]) -> Optional[SearchResult]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return result
+
+    def _store(self, key: Tuple[str, int], result: SearchResult) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.ttl_s, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    async def _fetch(self, key: Tuple[str, int], query: str) -> SearchResult:
+        try:
+            self.backend_calls += 1
+            result = cast(
+                SearchResult,
+                await get_scheduler().call(
+                    self.backend.key,
+                    lambda: self.backend.asearch(query, key[1]),
+                    priority=current_priority(),
+                ),
+            )
+            self._store(key, result)
+            return result
+        finally:
+            if self._in_flight.get(key) is asyncio.current_task():
+                del self._in_flight[key]
+
+    async def search(self, query: str, max_results: int = 10) -> SearchResult:
+        """Busca `query`, desde la caché si hay un resultado vigente.
+
+        Si la misma consulta (normalizada) ya está en vuelo, espera esa llamada
+        en lugar de hacer otra. Cancelar a quien espera no cancela la llamada
+        compartida.
+
+        Args:
+            query: Texto de búsqueda
+            max_results: Número máximo de resultados
+
+        Returns:
+            dict: Respuesta del backend (con la lista `results`)
+        """
+        key = (normalize_query(query), max_results)
+        cached = self._cached(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.deduplicated += 1
+        else:
+            self.misses += 1
+            task = loop.create_task(self._fetch(key, query.strip()))
+            self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        max_results: int = 10,
+        return_exceptions: bool = False,
+    ) -> List[Any]:
+        """Ejecuta varias consultas en paralelo, en el orden recibido.
+
+        Args:
+            queries: Textos de búsqueda; los repetidos se consultan una sola vez
+            max_results: Número máximo de resultados por consulta
+            return_exceptions: Devolver el error de una consulta en su posición
+                en lugar de propagarlo
+
+        Returns:
+            list: Una respuesta (o error) por consulta
+        """
+        return await asyncio.gather(
+            *(self.search(query, max_results) for query in queries),
+            return_exceptions=return_exceptions,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Aciertos y fallos de la caché, consultas deduplicadas y llamadas al backend."""
+        with self._lock:
+            entries = len(self._cache)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "backend_calls": self.backend_calls,
+            "entries": entries,
+        }
+
+    def clear(self) -> None:
+        """Vacía la caché de resultados."""
+        with self._lock:
+            self._cache.clear()
+
+
+_client: Optional[SearchClient] = None
+_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    """Devuelve el cliente de búsqueda compartido del proceso."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if os.getenv("REACT_AGENT_SEARCH_BACKEND", "tavily") == "fake":
+                    backend: Any = FakeSearchBackend()
+                else:
+                    backend = TavilyBackend()
+                _client = SearchClient(
+                    backend,
+                    ttl_s=float(os.getenv("REACT_AGENT_SEARCH_TTL_S", "300")),
+                    max_entries=int(
+                        os.getenv("REACT_AGENT_SEARCH_MAX_ENTRIES", "1024")
+                    ),
+                )
+    return _client
+
+
+def set_search_client(client: Optional[SearchClient]) -> None:
+    """Reemplaza el cliente del proceso (None lo vuelve a crear desde el entorno)."""
+    global _client
+    _client = client
@@ -3,12 +3,60 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import Any, Dict, Optional, Sequence
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 from langgraph.managed import IsLastStep
-from typing_extensions import Annotated
+from langgraph.prebuilt.chat_agent_executor import AgentState
+from typing_extensions import Annotated, TypedDict
+
+
+class RegistroSaldo(TypedDict):
+    """Producto y saldo de la persona, tal como los entrega `saldo_tool`."""
+
+    cedula: str
+    producto: Any
+    saldo: Any
+    fecha_desembolso: Any
+    monto_desembolso: Any
+
+
+class Veredicto(TypedDict):
+    """Resultado del motor de reglas de Póliza Express, tal como lo entrega `elegibilidad_tool`."""
+
+    aplica: bool
+    regla: Optional[int]
+    motivo: str
+    texto: str
+
+
+def keep_known(current: Any, new: Any) -> Any:
+    """Reductor de los campos de la reclamación: conserva el último valor conocido.
+
+    Las ramas paralelas devuelven todos los campos de su estado; las que no
+    obtuvieron un campo lo traen en None y no deben borrar el de otra rama.
+    """
+    return current if new is None else new
+
+
+# Campos de la reclamación que escriben las herramientas, en orden de obtención
+CLAIM_FIELDS = (
+    "cedula",
+    "estado_registraduria",
+    "fecha_defuncion",
+    "saldo",
+    "elegibilidad",
+)
+
+
+def claim_fields(state: Any) -> Dict[str, Any]:
+    """Devuelve los campos de la reclamación ya conocidos en `state` (dict o dataclass)."""
+    if isinstance(state, dict):
+        values = {name: state.get(name) for name in CLAIM_FIELDS}
+    else:
+        values = {name: getattr(state, name, None) for name in CLAIM_FIELDS}
+    return {name: value for name, value in values.items() if value is not None}
 
 
 @dataclass
@@ -21,7 +69,7 @@ class InputState:
     messages: Annotated[Sequence[AnyMessage], add_messages] = field(
         default_factory=list
     )
- 
+
     """
     Messages tracking the primary execution state of the agent.
 
@@ -54,8 +102,29 @@ class State(InputState):
     It is set to 'True' when the step count reaches recursion_limit - 1.
     """
 
-    # Additional attributes can be added here as needed.
-    # Common examples include:
-    # retrieved_documents: List[Document] = field(default_factory=list)
-    # extracted_entities: Dict[str, Any] = field(default_factory=dict)
-    # api_connections: Dict[str, Any] = field(default_factory=dict)
+    # Campos de la reclamación: las herramientas los escriben con `Command` y los
+    # agentes los reciben ya extraídos, sin volver a leer el historial.
+    cedula: Annotated[Optional[str], keep_known] = None
+    """Número de cédula normalizado (solo dígitos)."""
+
+    estado_registraduria: Annotated[Optional[str], keep_known] = None
+    """Estado de la persona en la registraduría."""
+
+    fecha_defuncion: Annotated[Optional[str], keep_known] = None
+    """Fecha de defunción (fecha de siniestro) en formato AAAA-MM-DD."""
+
+    saldo: Annotated[Optional[RegistroSaldo], keep_known] = None
+    """Producto y saldo de la persona."""
+
+    elegibilidad: Annotated[Optional[Veredicto], keep_known] = None
+    """Veredicto de Póliza Express del motor de reglas."""
+
+
+class ClaimAgentState(AgentState, total=False):
+    """Estado de los agentes react: los mensajes más los campos de la reclamación."""
+
+    cedula: Annotated[Optional[str], keep_known]
+    estado_registraduria: Annotated[Optional[str], keep_known]
+    fecha_defuncion: Annotated[Optional[str], keep_known]
+    saldo: Annotated[Optional[RegistroSaldo], keep_known]
+    elegibilidad: Annotated[Optional[Veredicto], keep_known]
@@ -0,0 +1,208 @@
+"""Streaming incremental de los resultados de una reclamación.
+
+La cédula, el estado en la registraduría y la fecha de defunción se conocen
+varios segundos antes del resumen final. Cada herramienta publica su resultado
+con `emit_partial` en el modo de stream `custom` de LangGraph en cuanto
+termina (las funciones de `tools.py` se decoran con `publica`), tanto en el
+modo supervisor como en el determinista, así que:
+
+- Desde el servidor de LangGraph basta con pedir `stream_mode=["custom",
+  "messages"]`: los eventos `resultado_parcial` llegan por `custom` y el
+  resumen final token a token por `messages`.
+- Desde Python, `stream_claim` entrega un generador asíncrono de eventos
+  tipados: primero los `resultado_parcial`, luego los `resumen_token` del
+  resumen final y por último un `resumen_final` con el texto completo.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Literal,
+    Optional,
+    Tuple,
+    TypedDict,
+    Union,
+)
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+Campo = Literal[
+    "cedula", "estado_registraduria", "fecha_defuncion", "saldo", "elegibilidad"
+]
+
+# Nodos cuyo modelo redacta la respuesta final (grafo supervisor y modo determinista)
+SUMMARY_NODES = ("supervisor", "resumen")
+
+
+class _Event(TypedDict, total=False):
+    elapsed_s: float
+    """Segundos desde el inicio de la corrida (solo en los eventos de `stream_claim`)."""
+
+
+class PartialResult(_Event):
+    """Dato de la reclamación disponible antes del resumen final."""
+
+    type: Literal["resultado_parcial"]
+    campo: Campo
+    valor: str
+    texto: str
+
+
+class SummaryToken(_Event):
+    """Fragmento del resumen final a medida que el modelo lo genera."""
+
+    type: Literal["resumen_token"]
+    texto: str
+
+
+class FinalSummary(_Event):
+    """Texto completo de la respuesta final."""
+
+    type: Literal["resumen_final"]
+    texto: str
+
+
+StreamEvent = Union[PartialResult, SummaryToken, FinalSummary]
+
+
+# -------------------------------
+# Publicación desde las herramientas
+# -------------------------------
+def _valor_tipado(campo: Campo, texto: str) -> str:
+    """Extrae el valor del texto de la herramienta (dígitos de la cédula, fecha ISO)."""
+    if campo == "cedula":
+        digitos = re.sub(r"\D", "", texto)
+        return digitos if 6 <= len(digitos) <= 12 else texto.strip()
+    if campo == "fecha_defuncion":
+        fecha = re.search(r"\d{4}-\d{2}-\d{2}", texto)
+        return fecha.group(0) if fecha else texto.strip()
+    return texto.strip()
+
+
+def partial_result(campo: Campo, texto: str) -> PartialResult:
+    """Construye el evento `resultado_parcial` de un campo."""
+    return {
+        "type": "resultado_parcial",
+        "campo": campo,
+        "valor": _valor_tipado(campo, texto),
+        "texto": texto,
+    }
+
+
+def emit_partial(campo: Campo, texto: str) -> None:
+    """Publica el resultado de una herramienta en el stream `custom` del grafo.
+
+    Fuera de una ejecución del grafo (p. ej. al llamar la herramienta
+    directamente en una prueba) no hace nada.
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(partial_result(campo, texto))
+
+
+def publica(
+    campo: Campo, texto: Optional[Callable[[Any], str]] = None
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Decora una función asíncrona de consulta para publicar su resultado como `campo`.
+
+    Si la función no devuelve el texto directamente (p. ej. devuelve el texto
+    y el registro estructurado), `texto` lo obtiene a partir del resultado.
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            resultado = await func(*args, **kwargs)
+            emit_partial(campo, resultado if texto is None else texto(resultado))
+            return resultado
+
+        return wrapper
+
+    return decorator
+
+
+# -------------------------------
+# Consumo
+# -------------------------------
+def _is_summary_chunk(namespace: Tuple[str, ...], metadata: Dict[str, Any]) -> bool:
+    root = (
+        namespace[0].split(":", 1)[0]
+        if namespace
+        else metadata.get("langgraph_node", "")
+    )
+    return root in SUMMARY_NODES or metadata.get("langgraph_node") in SUMMARY_NODES
+
+
+def _chunk_text(message: Any) -> str:
+    if not isinstance(message, (AIMessage, AIMessageChunk)):
+        return ""
+    if message.tool_calls or getattr(message, "tool_call_chunks", None):
+        return ""  # turno del supervisor que transfiere a otro agente
+    return message.content if isinstance(message.content, str) else ""
+
+
+async def stream_claim(
+    graph_input: Optional[Dict[str, Any]] = None,
+    config: Optional[RunnableConfig] = None,
+    graph: Any = None,
+) -> AsyncIterator[StreamEvent]:
+    """Ejecuta el grafo y entrega los resultados de la reclamación a medida que se conocen.
+
+    Args:
+        graph_input: Entrada del grafo; por defecto el pedido estándar de la reclamación
+        config: Configuración de la corrida (rutas de los PDF, `pipeline_mode`, ...)
+        graph: Grafo a ejecutar; por defecto `react_agent.graph.graph`
+
+    Yields:
+        StreamEvent: `resultado_parcial`, `resumen_token` y al final `resumen_final`.
+        Cada evento incluye `elapsed_s`, los segundos desde el inicio de la corrida.
+    """
+    if graph is None:
+        from react_agent.graph import graph
+    if graph_input is None:
+        from react_agent.batch import DEFAULT_REQUEST
+
+        graph_input = {"messages": [("user", DEFAULT_REQUEST)]}
+
+    start = time.perf_counter()
+    final_text = ""
+    async for namespace, mode, payload in graph.astream(
+        graph_input,
+        config,
+        stream_mode=["custom", "messages", "values"],
+        subgraphs=True,
+    ):
+        if (
+            mode == "custom"
+            and isinstance(payload, dict)
+            and payload.get("type") == "resultado_parcial"
+        ):
+            yield {**payload, "elapsed_s": time.perf_counter() - start}  # type: ignore[misc]
+        elif mode == "messages":
+            message, metadata = payload
+            text = _chunk_text(message)
+            if text and _is_summary_chunk(namespace, metadata):
+                yield {
+                    "type": "resumen_token",
+                    "texto": text,
+                    "elapsed_s": time.perf_counter() - start,
+                }
+        elif mode == "values" and not namespace and payload.get("messages"):
+            final_text = _chunk_text(payload["messages"][-1]) or final_text
+    yield {
+        "type": "resumen_final",
+        "texto": final_text,
+        "elapsed_s": time.perf_counter() - start,
+    }
@@ -0,0 +1,163 @@
+"""Extracción local desde la capa de texto del PDF.
+
+Muchos documentos emitidos digitalmente (como los certificados tipo
+`CER_DEFUNCION.pdf`) traen una capa de texto. Antes de rasterizar y llamar al
+modelo multimodal se intenta leer el campo de la capa de texto de cada página
+(`react_agent.pages`) y validarlo con los analizadores de este módulo; solo si
+la confianza es baja se recurre al modelo.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from react_agent.instrumentation import get_metrics
+
+MESES = {
+    "ENE": 1,
+    "FEB": 2,
+    "MAR": 3,
+    "ABR": 4,
+    "MAY": 5,
+    "JUN": 6,
+    "JUL": 7,
+    "AGO": 8,
+    "SEP": 9,
+    "OCT": 10,
+    "NOV": 11,
+    "DIC": 12,
+}
+
+
+@dataclass(frozen=True)
+class FieldMatch:
+    """Valor extraído de la capa de texto con su nivel de confianza (0 a 1)."""
+
+    value: str
+    confidence: float
+
+
+def normalize_text(text: str) -> str:
+    """Pasa a mayúsculas y elimina tildes para comparar con patrones simples."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).upper()
+
+
+# -------------------------------
+# Analizadores
+# -------------------------------
+_CEDULA_NUMBER = re.compile(r"(?<![\d.])(\d{1,3}(?:\.\d{3}){1,3}|\d{6,10})(?![\d.])")
+_CEDULA_KEYWORD = re.compile(
+    r"(NUIP|NUMERO|NO\.|C\.C\.?|CEDULA(?: DE CIUDADANIA)?)\s*:?\s*$"
+)
+
+
+def parse_cedula(text: str) -> Optional[FieldMatch]:
+    """Busca un número de cédula colombiana (6 a 10 dígitos, con o sin puntos).
+
+    La confianza es alta si el número va precedido de una etiqueta como
+    "NÚMERO", "NUIP" o "C.C."; media si es el único candidato del texto.
+    """
+    normalized = normalize_text(text)
+    candidates: List[str] = []
+    for match in _CEDULA_NUMBER.finditer(normalized):
+        digits = match.group(1).replace(".", "")
+        if not 6 <= len(digits) <= 10:
+            continue
+        prefix = normalized[max(0, match.start() - 30) : match.start()]
+        if _CEDULA_KEYWORD.search(prefix):
+            return FieldMatch(digits, 0.95)
+        candidates.append(digits)
+
+    unique = set(candidates)
+    if len(unique) == 1:
+        return FieldMatch(unique.pop(), 0.6)
+    return None
+
+
+_FECHA_ANCHOR = re.compile(r"FECHA\s+DE\s+LA\s+DEFUNCION")
+_FECHA_VALUE = re.compile(
+    r"(?:ANO\s*:?\s*)?((?:19|20)\d{2})\s*(?:MES\s*:?\s*)?("
+    + "|".join(MESES)
+    + r")\.?\s*(?:DIA\s*:?\s*)?(\d{1,2})(?!\d)"
+)
+
+
+def parse_fecha_defuncion(text: str, window: int = 200) -> Optional[FieldMatch]:
+    """Extrae la "Fecha de la defunción" y la devuelve en formato `AAAA-MM-DD`.
+
+    Solo se consideran los valores que aparecen después del título "Fecha de la
+    defunción" (se ignoran otras fechas como la de inscripción). El mes de tres
+    letras se convierte a su número y la fecha se valida con el calendario.
+    """
+    normalized = normalize_text(text)
+    anchor = _FECHA_ANCHOR.search(normalized)
+    if anchor is None:
+        return None
+    # Las etiquetas "Año Mes Día" pueden ir entre el título y los valores
+    segment = normalized[anchor.end() : anchor.end() + window]
+    segment = re.sub(r"\bANO\b|\bMES\b|\bDIA\b", " ", segment)
+    match = _FECHA_VALUE.search(segment)
+    if match is None:
+        return None
+    year, month, day = int(match.group(1)), MESES[match.group(2)], int(match.group(3))
+    try:
+        value = date(year, month, day)
+    except ValueError:
+        return None
+    return FieldMatch(value.isoformat(), 0.95)
+
+
+PARSERS: Dict[str, Callable[[str], Optional[FieldMatch]]] = {
+    "cedula": parse_cedula,
+    "defuncion": parse_fecha_defuncion,
+}
+
+
+# -------------------------------
+# Métricas
+# -------------------------------
+@dataclass
+class FastPathStats:
+    """Conteo de extracciones resueltas localmente y enviadas al modelo."""
+
+    fast_path: int = 0
+    fallback: int = 0
+
+    @property
+    def fast_path_rate(self) -> float:
+        """Proporción de extracciones resueltas sin llamar al modelo."""
+        total = self.fast_path + self.fallback
+        return self.fast_path / total if total else 0.0
+
+
+_stats: Dict[str, FastPathStats] = {}
+
+
+def fast_path_stats() -> Dict[str, Dict[str, float]]:
+    """Devuelve, por tipo de documento, cuántas extracciones usaron el camino rápido."""
+    return {
+        doc_type: {
+            "fast_path": s.fast_path,
+            "fallback": s.fallback,
+            "fast_path_rate": s.fast_path_rate,
+        }
+        for doc_type, s in _stats.items()
+    }
+
+
+def record_fallback(doc_type: str) -> None:
+    """Registra que la extracción tuvo que recurrir al modelo multimodal."""
+    _stats.setdefault(doc_type, FastPathStats()).fallback += 1
+
+
+def record_fast_path(doc_type: str) -> None:
+    """Registra que la extracción se resolvió desde la capa de texto."""
+    _stats.setdefault(doc_type, FastPathStats()).fast_path += 1
+
+
+get_metrics().register_collector("text_fast_path", fast_path_stats)
@@ -6,314 +6,553 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from typing import Any, Callable, List, Optional, cast
-
-from langchain_tavily import TavilySearch  # type: ignore[import-not-found]
+import asyncio
+import re
+from contextlib import aclosing
+from functools import partial
+from operator import itemgetter
+from typing import Annotated, Any, Awaitable, Dict, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.prebuilt import InjectedState
+from langgraph.types import Command, Send
 
+from react_agent.balances import get_balance_store
+from react_agent.chat_utils import get_prompt_registry, get_vertex_model
 from react_agent.configuration import Configuration
-from langchain_core.tools import tool
-from typing import Annotated
-from langgraph.prebuilt import InjectedState
-from langgraph.types import Command
-from langchain_core.tools import InjectedToolCallId
-from react_agent.state import State
+from react_agent.context import get_context_policy, scope_messages
+from react_agent.deadlines import deadline_bound, hedged
+from react_agent.memo import memoized
+from react_agent.pages import ANSWER_CHECKS, FECHA_RE, DocumentPages
+from react_agent.render_pool import get_render_pool
+from react_agent.rendering import document_digest, image_settings
+from react_agent.rules import evaluate_record
+from react_agent.scheduler import current_priority, estimate_tokens, get_scheduler
+from react_agent.search import get_search_client
+from react_agent.state import RegistroSaldo, State, Veredicto, claim_fields
+from react_agent.streaming import publica
+from react_agent.text_extraction import PARSERS, record_fallback, record_fast_path
+
 
 async def search(query: str) -> Optional[dict[str, Any]]:
     """Search for general web results.
 
     This function performs a search using the Tavily search engine, which is designed
     to provide comprehensive, accurate, and trusted results. It's particularly useful
-    for answering questions about current events.
+    for answering questions about current events. The client is shared by the
+    process and results are cached (see `react_agent.search`).
     """
     configuration = Configuration.from_context()
-    wrapped = TavilySearch(max_results=configuration.max_search_results)
-    return cast(dict[str, Any], await wrapped.ainvoke({"query": query}))
+    return await get_search_client().search(query, configuration.max_search_results)
+
 
-@tool("web_search", description="Una función de búsqueda simple que retorna un string fijo.")
+@tool(
+    "web_search",
+    description="Una función de búsqueda simple que retorna un string fijo.",
+)
 async def web_search(query: str) -> str:
-    """
-    Una función de búsqueda simple que retorna un string fijo.
-    
+    """Una función de búsqueda simple que retorna un string fijo.
+
     Args:
         query: El texto de búsqueda
-        
+
     Returns:
         str: Retorna siempre "probando"
     """
     return "probando"
 
+
 # @tool("cedula_tool", description="Una función que retorna un número de cédula")
 # async def cedula_tool() -> str:
 #     """
 #     Una función que retorna un número de cédula fijo.
-    
+
 #     Returns:
 #         str: Retorna un número de cédula predefinido
 #     """
 #     return "el número de cedula es 1032323323"
 
 
-from langchain_google_vertexai import ChatVertexAI
-from langchain_core.messages import HumanMessage
-import asyncio
+VERTEX_PROJECT = "analitica-poc-gcp"
+VERTEX_LOCATION = "us-central1"
 
-import asyncio
+# Prompts de extracción: se leen y se hashean una sola vez del registro de prompts.
+# El texto va antes de la imagen en el mensaje, así el prefijo es siempre el mismo.
+CEDULA = get_prompt_registry().get("extraccion_cedula")
+FECHA_DEFUNCION = get_prompt_registry().get("extraccion_defuncion")
+CEDULA_PROMPT = CEDULA.text
+FECHA_DEFUNCION_PROMPT = FECHA_DEFUNCION.text
 
-@tool("cedula_tool", description="Una función que retorna un número de cédula")
-async def cedula_tool(state: Annotated[State, InjectedState]) -> str:
-    import fitz  # PyMuPDF
-    import base64
-    from PIL import Image
-    import io
-
-    def process_pdf():
-        pdf_document = fitz.open(f"/home/jssaa/proyectos/react-agent/src/doc_pruebas/Cedula_seb.pdf")
-        page = pdf_document[0]
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG")
-        imag_cedula = base64.b64encode(buffer.getvalue()).decode()
-        pdf_document.close()
-        return imag_cedula
-
-    imag_cedula = await asyncio.to_thread(process_pdf)
-
-    # El resto de tu código (prompt, modelo, etc.) también puede tener partes bloqueantes.
-    # Si usas model.invoke (que es síncrono), también debes envolverlo:
-    from langchain_google_vertexai import ChatVertexAI
-    from langchain_core.messages import HumanMessage
-
-    prompt = """
-    Contexto:
-    Eres un modelo de IA multimodal especializado en extraer el número de cédula de una imagen.
-    Instrucciones:
-    1. Analiza la imagen y extrae el número de cédula.
-    2. Devuelve el número de cédula.
-    Formato de salida:
-    Devuelve un único string que contenga el número de cédula.
-    """
 
-    model = ChatVertexAI(
-        model_name="gemini-2.5-flash-preview-04-17",
-        project="analitica-poc-gcp",
-        location="us-central1",
-        credentials_path="/home/jssaa/proyectos/react-agent/src/creds/credentials.json"
+async def extraer_de_imagen(imagen: str, prompt: str, doc_type: str) -> Any:
+    """Consulta el modelo multimodal de extracción con una página ya rasterizada.
+
+    El cliente de Vertex AI es compartido por todo el proceso y se invoca con
+    `ainvoke`, por lo que las llamadas concurrentes no consumen hilos del
+    executor por defecto y la llamada se puede cancelar al vencer el plazo.
+    Con `hedge_extractions` se lanza una solicitud de respaldo cuando la
+    primera tarda más que el cuantil `hedge_quantile` de las recientes.
+
+    Args:
+        imagen: Página codificada en base64 (JPEG)
+        prompt: Instrucciones de extracción
+        doc_type: Tipo de documento
+
+    Returns:
+        La respuesta del modelo
+    """
+    configuration = Configuration.from_context()
+    model = get_vertex_model(
+        project=VERTEX_PROJECT,
+        model_name=configuration.extraction_model,
+        location=VERTEX_LOCATION,
     )
 
     image_message = HumanMessage(
         content=[
-            { "type": "text", "text": prompt },
+            {"type": "text", "text": prompt},
             {
                 "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{imag_cedula}"
-                }
-            }
+                "image_url": {"url": f"data:image/jpeg;base64,{imagen}"},
+            },
         ]
     )
+    key = f"google_vertexai/{configuration.extraction_model}"
+
+    # Pasa por el planificador compartido: cuota de Vertex AI, concurrencia
+    # adaptativa, prioridad de la corrida, reintentos ante 429 y plazo
+    def request() -> Awaitable[Any]:
+        return get_scheduler().call(
+            key,
+            lambda: model.ainvoke([image_message]),
+            tokens=estimate_tokens(prompt, images=1, output_tokens=64),
+            priority=current_priority(),
+            usage=lambda response: (
+                getattr(response, "usage_metadata", None) or {}
+            ).get("total_tokens", 0),
+        )
+
+    if configuration.hedge_extractions:
+        # La extracción es idempotente: si tarda más que el p95 se lanza una segunda
+        return await hedged(
+            request, f"{key}/{doc_type}", quantile=configuration.hedge_quantile
+        )
+    return await request()
 
-    # Si model.invoke es síncrono, también debes hacer esto:
-    def call_model():
-        return model.invoke([image_message])
 
-    response = await asyncio.to_thread(call_model)
+async def extraer_de_pdf(pdf_path: str, prompt: str, doc_type: str) -> str:
+    """Extrae el campo de un documento de varias páginas, página a página.
 
-    # Si la respuesta es un objeto, extrae el texto:
-    if hasattr(response, "content"):
-        return response.content
-    return str(f"El número de cédula es: {response}")
+    Recorre las páginas candidatas de `DocumentPages` (abre el documento una
+    sola vez): en cada una intenta primero la capa de texto y, si no alcanza,
+    la rasteriza y consulta el modelo multimodal. Se detiene en cuanto tiene el
+    campo o tras enviar `max_pages_sent` páginas al modelo.
 
+    Args:
+        pdf_path: Ruta al documento PDF
+        prompt: Instrucciones de extracción
+        doc_type: Tipo de documento (`cedula` o `defuncion`), define las
+            palabras clave, el analizador y el perfil de preparación de imagen
 
-@tool("registraduria_tool", description="Una función que consulta el estado de una persona en la registraduría.")
-async def registraduria_tool() -> str:
+    Returns:
+        El valor extraído o la última respuesta del modelo
     """
-    Una función que consulta el estado de una persona en la registraduría.
-    
+    configuration = Configuration.from_context()
+    settings = image_settings(doc_type, configuration.image_preparation.get(doc_type))
+    parser = PARSERS[doc_type]
+    encontrado = ANSWER_CHECKS[doc_type]
+
+    # El render puede ir a un pool de procesos para no competir por el GIL;
+    # la primera vez el pool arranca en caliente, fuera del event loop
+    pool = None
+    if configuration.render_backend == "process":
+        pool = await asyncio.to_thread(get_render_pool)
+    documento = await asyncio.to_thread(DocumentPages, pdf_path, doc_type)
+    reporte = documento.report
+    respuesta: Optional[str] = None
+    try:
+        async with aclosing(documento.acandidates()) as candidatas:
+            async for candidata in candidatas:
+                if configuration.text_fast_path and candidata.text:
+                    match = parser(candidata.text)
+                    if (
+                        match is not None
+                        and match.confidence
+                        >= configuration.text_fast_path_min_confidence
+                    ):
+                        reporte.found_on, reporte.source = candidata.index, "texto"
+                        record_fast_path(doc_type)
+                        return match.value
+                if reporte.pages_sent >= configuration.max_pages_sent:
+                    break
+
+                # El render y la codificación JPEG pasan por la caché de rasterización
+                imagen = await documento.arender(candidata.index, settings, pool)
+                reporte.pages_sent += 1
+                response = await extraer_de_imagen(imagen, prompt, doc_type)
+                respuesta = (
+                    response.content if hasattr(response, "content") else str(response)
+                )
+                if encontrado(respuesta):
+                    reporte.found_on, reporte.source = candidata.index, "modelo"
+                    break
+    finally:
+        await documento.aclose()
+
+    # Solo cuenta como recurso al modelo si se le envió al menos una página
+    if configuration.text_fast_path and reporte.pages_sent:
+        record_fallback(doc_type)
+    if respuesta is None:
+        return f"No se encontró el dato en ninguna de las {reporte.page_count} páginas del documento"
+    return respuesta
+
+
+@publica("cedula")
+@deadline_bound("cedula_tool")
+async def obtener_cedula() -> str:
+    """Extrae el número de cédula del documento de identidad."""
+    configuration = Configuration.from_context()
+    pdf_path = configuration.cedula_pdf_path
+
+    async def compute() -> str:
+        return await extraer_de_pdf(pdf_path, CEDULA_PROMPT, "cedula")
+
+    return await memoized(
+        "cedula_tool",
+        partial(document_digest, pdf_path),
+        CEDULA.key,
+        configuration.extraction_model,
+        compute,
+        # Un "No se encontró el dato" puede ser transitorio: no se memoiza
+        cacheable=ANSWER_CHECKS["cedula"],
+    )
+
+
+def normalizar_cedula(texto: str) -> str:
+    """Deja solo los dígitos de la cédula (p. ej. '1.032.323.323' -> '1032323323').
+
+    Si el texto no contiene un número de cédula plausible se devuelve sin cambios.
+    """
+    digitos = re.sub(r"\D", "", texto)
+    return digitos if 6 <= len(digitos) <= 12 else texto.strip()
+
+
+def cedula_valida(texto: str) -> Optional[str]:
+    """Devuelve la cédula normalizada, o None si el texto no contiene una (p. ej. un error)."""
+    cedula = normalizar_cedula(texto)
+    return cedula if cedula.isdigit() else None
+
+
+def fecha_valida(texto: str) -> Optional[str]:
+    """Devuelve la fecha AAAA-MM-DD del texto, o None si no contiene una (p. ej. un error)."""
+    fecha = FECHA_RE.search(texto)
+    return fecha.group(0) if fecha else None
+
+
+def _resultado(
+    tool_name: str, tool_call_id: str, texto: str, **campos: Any
+) -> Command[Any]:
+    """Responde al tool_call con `texto` y escribe los campos conocidos en el estado.
+
+    Los campos en None (p. ej. si la consulta falló) no se escriben, así que
+    no borran un valor obtenido antes.
+    """
+    update: Dict[str, Any] = {
+        name: value for name, value in campos.items() if value is not None
+    }
+    update["messages"] = [
+        ToolMessage(content=texto, name=tool_name, tool_call_id=tool_call_id)
+    ]
+    return Command(update=update)
+
+
+@tool("cedula_tool", description="Una función que retorna un número de cédula")
+async def cedula_tool(tool_call_id: Annotated[str, InjectedToolCallId]) -> Command[Any]:
+    """Una función que extrae el número de cédula del documento de identidad.
+
+    Returns:
+        Command: El texto extraído como respuesta y, si es una cédula válida,
+            el número normalizado en `cedula`
+    """
+    texto = await obtener_cedula()
+    return _resultado("cedula_tool", tool_call_id, texto, cedula=cedula_valida(texto))
+
+
+@publica("estado_registraduria")
+@deadline_bound("registraduria_tool")
+async def consultar_registraduria() -> str:
+    """Consulta el estado de la persona en la registraduría."""
+
+    async def compute() -> str:
+        return "fallecido"
+
+    # La consulta aún no recibe parámetros, así que la llave es vacía
+    return await memoized("registraduria_tool", "", "", "registraduria", compute)
+
+
+@tool(
+    "registraduria_tool",
+    description="Una función que consulta el estado de una persona en la registraduría.",
+)
+async def registraduria_tool(
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command[Any]:
+    """Una función que consulta el estado de una persona en la registraduría.
+
     Returns:
-        str: Retorna el estado de la persona
+        Command: El estado de la persona, como respuesta y en `estado_registraduria`
     """
-    return "fallecido"
+    estado = await consultar_registraduria()
+    return _resultado(
+        "registraduria_tool", tool_call_id, estado, estado_registraduria=estado
+    )
 
 
 # @tool("fecha_defuncion_tool", description="Una función que retorna la fecha de defunción.")
 # async def fecha_defuncion_tool() -> str:
 #     """
 #     Una función que retorna la fecha de defunción.
-    
+
 #     Returns:
 #         str: Retorna una fecha de defunción predefinida
 #     """
 #     return "12 de enero de 2025"
 
 
-@tool("fecha_defuncion_tool", description="Una función que retorna la fecha de defunción.")
-async def fecha_defuncion_tool() -> str:
-    import fitz  # PyMuPDF
-    import base64
-    from PIL import Image
-    import io
-
-    def process_pdf():
-        pdf_document = fitz.open("/home/jssaa/proyectos/react-agent/src/doc_pruebas/CER_DEFUNCION.pdf")
-        page = pdf_document[0]
-        pix = page.get_pixmap()
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG")
-        imag_cedula = base64.b64encode(buffer.getvalue()).decode()
-        pdf_document.close()
-        return imag_cedula
-
-    imag_cedula = await asyncio.to_thread(process_pdf)
-
-    # El resto de tu código (prompt, modelo, etc.) también puede tener partes bloqueantes.
-    # Si usas model.invoke (que es síncrono), también debes envolverlo:
-    from langchain_google_vertexai import ChatVertexAI
-    from langchain_core.messages import HumanMessage
-
-    prompt = """
-    # CONTEXTO
-    Eres un sistema experto de IA especializado en la extracción de datos (OCR) de certificados oficiales de Colombia. Tu única tarea es identificar y extraer la "Fecha de la defunción".
-
-    # INSTRUCCIONES CLAVE
-    1.  **Enfócate en el título**: Busca en la imagen el texto exacto **"Fecha de la defunción"**.
-    2.  **Extrae la fecha asociada**: Justo debajo o al lado de ese título, encontrarás los campos para "Año", "Mes" y "Día". Extrae los valores de esos campos específicos.
-    3.  **IGNORA OTRAS FECHAS**: El documento contiene otras fechas, como la "Fecha de inscripción". Debes ignorar explícitamente todas las demás fechas y centrarte únicamente en la que está asociada a "Fecha de la defunción".
-    4.  **Conversión del Mes**: El mes está escrito con tres letras (ej: 'DIC'). Conviértelo a su valor numérico de dos dígitos (ej: 'DIC' es '12', 'ENE' es '01').
-    5.  **Validación**: El año debe ser un número de 4 dígitos.
-
-    # FORMATO DE SALIDA
-    Devuelve **únicamente** un string con la fecha en formato `AAAA-MM-DD`. No agregues texto, explicaciones ni ninguna otra palabra.
-
-    Ejemplo de salida esperada:
-    2023-12-10
-    """
-
-    model = ChatVertexAI(
-        model_name="gemini-2.5-flash-preview-04-17",
-        project="analitica-poc-gcp",
-        location="us-central1",
-        credentials_path="/home/jssaa/proyectos/react-agent/src/creds/credentials.json"
+@publica("fecha_defuncion")
+@deadline_bound("fecha_defuncion_tool")
+async def obtener_fecha_defuncion() -> str:
+    """Extrae la fecha de defunción del certificado de defunción."""
+    configuration = Configuration.from_context()
+    pdf_path = configuration.defuncion_pdf_path
+
+    async def compute() -> str:
+        return await extraer_de_pdf(pdf_path, FECHA_DEFUNCION_PROMPT, "defuncion")
+
+    return await memoized(
+        "fecha_defuncion_tool",
+        partial(document_digest, pdf_path),
+        FECHA_DEFUNCION.key,
+        configuration.extraction_model,
+        compute,
+        cacheable=ANSWER_CHECKS["defuncion"],
     )
 
-    image_message = HumanMessage(
-        content=[
-            { "type": "text", "text": prompt },
-            {
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{imag_cedula}"
-                }
-            }
-        ]
+
+@tool(
+    "fecha_defuncion_tool", description="Una función que retorna la fecha de defunción."
+)
+async def fecha_defuncion_tool(
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command[Any]:
+    """Una función que extrae la fecha de defunción del certificado de defunción.
+
+    Returns:
+        Command: El texto extraído como respuesta y, si contiene una fecha
+            AAAA-MM-DD, la fecha en `fecha_defuncion`
+    """
+    texto = await obtener_fecha_defuncion()
+    return _resultado(
+        "fecha_defuncion_tool", tool_call_id, texto, fecha_defuncion=fecha_valida(texto)
     )
 
-    # Si model.invoke es síncrono, también debes hacer esto:
-    def call_model():
-        return model.invoke([image_message])
 
-    response = await asyncio.to_thread(call_model)
+def describir_saldo(registro: RegistroSaldo) -> str:
+    """Describe el producto y el saldo de la persona en una línea para el LLM."""
+    from datetime import datetime
+
+    fecha_desembolso = registro["fecha_desembolso"]
+    # Formatear la fecha si es necesario (convertir de DD/MM/YYYY a formato legible)
+    try:
+        fecha_obj = datetime.strptime(fecha_desembolso, "%d/%m/%Y")
+        fecha_formateada = fecha_obj.strftime("%d de %B de %Y")
+        # Convertir mes en inglés a español
+        meses = {
+            "January": "enero",
+            "February": "febrero",
+            "March": "marzo",
+            "April": "abril",
+            "May": "mayo",
+            "June": "junio",
+            "July": "julio",
+            "August": "agosto",
+            "September": "septiembre",
+            "October": "octubre",
+            "November": "noviembre",
+            "December": "diciembre",
+        }
+        for ing, esp in meses.items():
+            fecha_formateada = fecha_formateada.replace(ing, esp)
+    except Exception:
+        fecha_formateada = fecha_desembolso  # Si no se puede formatear, usar original
+
+    return f"el saldo de la persona es {registro['saldo']}, fecha de desembolso {fecha_formateada}, monto de desembolso {registro['monto_desembolso']} y nombre del producto {registro['producto']}"
+
+
+@publica("saldo", texto=itemgetter(0))
+@deadline_bound("saldo_tool")
+async def buscar_saldo(cedula: str) -> Tuple[str, Optional[RegistroSaldo]]:
+    """Consulta el saldo de una persona usando su número de cédula.
+
+    Args:
+        cedula: El número de cédula de la persona
+
+    Returns:
+        tuple: La descripción del saldo, fecha y monto de desembolso y nombre del
+            producto (o el error), y el registro estructurado (None si falló)
+    """
+    try:
+        # Consulta indexada (en memoria o en SQLite); solo recarga si el archivo cambió
+        csv_path = Configuration.from_context().saldos_csv_path
+        encontrado = await get_balance_store(csv_path).alookup(cedula)
+        registro = RegistroSaldo(
+            cedula=encontrado.cedula,
+            producto=encontrado.producto,
+            saldo=encontrado.saldo,
+            fecha_desembolso=encontrado.fecha_desembolso,
+            monto_desembolso=encontrado.monto_desembolso,
+        )
+        return describir_saldo(registro), registro
+    except FileNotFoundError as e:
+        return f"Error: {str(e)}", None
+    except ValueError as e:
+        return str(e), None
+    except Exception as e:
+        return f"Error al consultar la información: {str(e)}", None
+
+
+@tool(
+    "saldo_tool",
+    description="Una función que consulta un producto del usuario, su saldo, fecha de desembolso y monto de desembolso. Si no se indica la cédula usa la ya extraída.",
+)
+async def saldo_tool(
+    state: Annotated[State, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    cedula: Optional[str] = None,
+) -> Command[Any]:
+    """Una función que consulta el saldo de una persona usando su número de cédula.
 
-    # Si la respuesta es un objeto, extrae el texto:
-    if hasattr(response, "content"):
-        return response.content
-    return str(f"La fecha de defunción es: {response}")
+    Args:
+        cedula: El número de cédula de la persona; por defecto la del estado
 
-@tool("saldo_tool", description="Una función que consulta un producto del usuario, su saldo, fecha de desembolso y monto de desembolso.")
-async def saldo_tool(cedula: str) -> str:
+    Returns:
+        Command: El saldo, fecha y monto de desembolso y nombre del producto,
+            como respuesta y en `saldo`
     """
-    Una función que consulta el saldo de una persona usando su número de cédula.
-    
+    texto, registro = await buscar_saldo(
+        normalizar_cedula(cedula or state.cedula or "")
+    )
+    return _resultado("saldo_tool", tool_call_id, texto, saldo=registro)
+
+
+@publica("elegibilidad", texto=itemgetter(0))
+@deadline_bound("elegibilidad_tool")
+async def evaluar_elegibilidad(
+    cedula: str, fecha_siniestro: str
+) -> Tuple[str, Optional[Veredicto]]:
+    """Evalúa las reglas de Póliza Express con el motor de reglas determinista.
+
     Args:
         cedula: El número de cédula de la persona
-    
+        fecha_siniestro: La fecha de defunción en formato AAAA-MM-DD
+
     Returns:
-        str: Retorna el saldo, fecha y monto de desembolso, y nombre del producto
+        tuple: Si aplica, qué regla se cumplió o la razón del descarte (o el
+            error), y el veredicto estructurado (None si falló)
     """
-    import pandas as pd
-    import os
-    from datetime import datetime
-    
-    def process_csv():
-        """Función interna para procesar el CSV de forma síncrona"""
-        # Ruta al archivo CSV
-        csv_path = "/home/jssaa/proyectos/react-agent/src/doc_pruebas/data_saldos.csv"
-        
-        # Verificar si el archivo existe
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError("No se pudo encontrar el archivo de datos de saldos")
-        
-        # Leer el archivo CSV
-        df = pd.read_csv(csv_path)
-        
-        # Filtrar por número de cédula
-        person_data = df[df['Cedula'].astype(str) == str(cedula)]
-        
-        if person_data.empty:
-            raise ValueError(f"No se encontró información para la cédula {cedula}")
-        
-        # Obtener los datos de la primera fila (asumiendo una cédula por persona)
-        row = person_data.iloc[0]
-        
-        saldo = row['Saldo']
-        producto = row['Producto']
-        fecha_desembolso = row['fecha desembolso']
-        monto_desembolso = row['Mondo desembolso']  # Note: hay un typo en el CSV original
-        
-        return saldo, producto, fecha_desembolso, monto_desembolso
-    
     try:
-        # Ejecutar la operación bloqueante en un hilo separado
-        saldo, producto, fecha_desembolso, monto_desembolso = await asyncio.to_thread(process_csv)
-        
-        # Formatear la fecha si es necesario (convertir de DD/MM/YYYY a formato legible)
-        try:
-            fecha_obj = datetime.strptime(fecha_desembolso, '%d/%m/%Y')
-            fecha_formateada = fecha_obj.strftime('%d de %B de %Y')
-            # Convertir mes en inglés a español
-            meses = {
-                'January': 'enero', 'February': 'febrero', 'March': 'marzo',
-                'April': 'abril', 'May': 'mayo', 'June': 'junio',
-                'July': 'julio', 'August': 'agosto', 'September': 'septiembre',
-                'October': 'octubre', 'November': 'noviembre', 'December': 'diciembre'
-            }
-            for ing, esp in meses.items():
-                fecha_formateada = fecha_formateada.replace(ing, esp)
-        except:
-            fecha_formateada = fecha_desembolso  # Si no se puede formatear, usar original
-        
-        return f"el saldo de la persona es {saldo}, fecha de desembolso {fecha_formateada}, monto de desembolso {monto_desembolso} y nombre del producto {producto}"
-        
+        csv_path = Configuration.from_context().saldos_csv_path
+        registro = await get_balance_store(csv_path).alookup(cedula)
+        resultado = evaluate_record(registro, fecha_siniestro.strip())
+        texto = resultado.texto()
+        return texto, Veredicto(
+            aplica=resultado.aplica,
+            regla=resultado.regla,
+            motivo=resultado.motivo,
+            texto=texto,
+        )
     except FileNotFoundError as e:
-        return f"Error: {str(e)}"
+        return f"Error: {str(e)}", None
     except ValueError as e:
-        return str(e)
+        return str(e), None
     except Exception as e:
-        return f"Error al consultar la información: {str(e)}"
+        return f"Error al evaluar la elegibilidad: {str(e)}", None
+
+
+@tool(
+    "elegibilidad_tool",
+    description="Una función que evalúa si una persona aplica a Póliza Express a partir de su cédula y la fecha de defunción (AAAA-MM-DD). Si no se indican usa las ya extraídas.",
+)
+async def elegibilidad_tool(
+    state: Annotated[State, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    cedula: Optional[str] = None,
+    fecha_siniestro: Optional[str] = None,
+) -> Command[Any]:
+    """Una función que evalúa si una persona aplica a Póliza Express.
+
+    Args:
+        cedula: El número de cédula de la persona; por defecto la del estado
+        fecha_siniestro: La fecha de defunción (AAAA-MM-DD); por defecto la del estado
+
+    Returns:
+        Command: Si aplica y qué regla se cumplió (o la razón del descarte),
+            como respuesta y en `elegibilidad`
+    """
+    texto, veredicto = await evaluar_elegibilidad(
+        normalizar_cedula(cedula or state.cedula or ""),
+        fecha_siniestro or state.fecha_defuncion or "",
+    )
+    return _resultado("elegibilidad_tool", tool_call_id, texto, elegibilidad=veredicto)
 
 
 def create_handoff_tool(agent_name: str):
     @tool(f"transfer_to_{agent_name}", description=f"Transferir al agente {agent_name}")
     def handoff(
         state: Annotated[State, InjectedState],
-        tool_call_id: Annotated[str, InjectedToolCallId]
-    ) -> Command:
-
-        tool_msg = {
-            "role": "tool",
-            "content": f"Transferido a {agent_name}",
-            "name": f"transfer_to_{agent_name}",
-            "tool_call_id": tool_call_id,
-        }
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ) -> Command[Any]:
+
+        # El supervisor puede transferir a varios agentes en el mismo turno. Cada
+        # handoff responde a todas las transferencias de ese turno con ids
+        # estables, así las ramas paralelas comparten el mismo prefijo de
+        # historial y al unirse quedan deduplicadas y en orden válido.
+        last = state.messages[-1]
+        tool_calls = getattr(last, "tool_calls", None) or [
+            {"name": f"transfer_to_{agent_name}", "id": tool_call_id}
+        ]
+        tool_msgs = [
+            ToolMessage(
+                content=f"Transferido a {call['name'].removeprefix('transfer_to_')}",
+                name=call["name"],
+                tool_call_id=call["id"],
+                id=f"handoff-{call['id']}",
+            )
+            for call in tool_calls
+            if call["name"] in HANDOFF_TOOL_NAMES
+        ]
+        # El agente recibe solo el contexto que necesita según su política y los
+        # campos ya extraídos; no se copia el historial completo en cada transferencia.
+        scoped = scope_messages(state.messages, get_context_policy(agent_name))
+        scoped.extend(tool_msgs)
         return Command(
-            goto=agent_name,
-            update={"messages": state.messages + [tool_msg]   },
-            graph=Command.PARENT
+            goto=[Send(agent_name, {"messages": scoped, **claim_fields(state)})],
+            graph=Command.PARENT,
         )
+
     return handoff
 
+
+HANDOFF_AGENTS = [
+    "cedula_agent",
+    "registraduria_agent",
+    "defuncion_agent",
+    "saldo_agent",
+]
+HANDOFF_TOOL_NAMES = {f"transfer_to_{agent}" for agent in HANDOFF_AGENTS}
+
 transfer_to_cedula = create_handoff_tool("cedula_agent")
 transfer_to_registraduria = create_handoff_tool("registraduria_agent")
 transfer_to_defuncion = create_handoff_tool("defuncion_agent")
-transfer_to_saldo = create_handoff_tool("saldo_agent")
\ No newline at end of file
+transfer_to_saldo = create_handoff_tool("saldo_agent")
@@ -1,5 +1,8 @@
 """Utility & helper functions."""
 
+import re
+from typing import Any, cast
+
 from langchain.chat_models import init_chat_model
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage
@@ -17,11 +20,15 @@ def get_message_text(msg: BaseMessage) -> str:
         return "".join(txts).strip()
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
     Args:
-        fully_specified_name (str): String in the format 'provider/model'.
+        fully_specified_name (str): String in the format 'provider/model'
+            (or 'provider:model').
+        **kwargs: Extra model parameters (e.g. `max_retries`).
     """
-    provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider)
+    provider, model = re.split(r"[/:]", fully_specified_name, maxsplit=1)
+    return cast(
+        BaseChatModel, init_chat_model(model, model_provider=provider, **kwargs)
+    )
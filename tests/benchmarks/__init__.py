@@ -0,0 +1 @@
+"""Benchmarks de rendimiento; se ejecutan como scripts, no con pytest."""
@@ -0,0 +1,195 @@
+"""Benchmark de extremo a extremo del grafo, sin red.
+
+Reemplaza los modelos de Azure OpenAI y Vertex AI por modelos falsos con
+latencia simulada (ver `fakes.py`), genera reclamaciones con PDFs escaneados y
+un `data_saldos.csv` sintético, y ejecuta el grafo con el procesador por lotes.
+Reporta reclamaciones por segundo, latencia por reclamación, latencia por
+nodo/herramienta/modelo, tokens cacheados por agente y memoria máxima.
+
+Uso:
+    python -m tests.benchmarks.bench_graph --claims 50 --concurrency 8 --rows 100000
+    python -m tests.benchmarks.bench_graph --mode deterministic --tracemalloc
+    python -m tests.benchmarks.bench_graph --checkpoint   # costo de los checkpoints en SQLite
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from react_agent.instrumentation import get_metrics
+from react_agent.pages import page_stats
+from tests.benchmarks.bench_saldos import write_dataset
+from tests.benchmarks.fakes import install_fake_models, write_claims
+
+
+def run(
+    claims: int = 20,
+    concurrency: int = 4,
+    rows: int = 10_000,
+    model_latency_s: float = 0.05,
+    vision_latency_s: float = 0.2,
+    mode: str = "supervisor",
+    trace_memory: bool = False,
+    checkpoint: bool = False,
+    agent_models: Optional[Dict[str, str]] = None,
+    model_latencies: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """Ejecuta el benchmark y devuelve las métricas.
+
+    `agent_models` se pasa como `Configuration.agent_models` y
+    `model_latencies` fija la latencia simulada de cada modelo.
+    """
+    from react_agent.batch import run_batch
+    from react_agent.checkpoint import SQLiteCheckpointSaver
+    from react_agent.graph import builder, graph
+    from react_agent.instrumentation import instrument
+
+    install_fake_models(model_latency_s, vision_latency_s, rows, model_latencies)
+    get_metrics().reset()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saver = None
+        if checkpoint:
+            saver = SQLiteCheckpointSaver(os.path.join(tmp, "checkpoints.sqlite"))
+            graph = instrument(builder.compile(checkpointer=saver))
+        csv_path = os.path.join(tmp, "data_saldos.csv")
+        write_dataset(csv_path, rows)
+        claim_list = write_claims(os.path.join(tmp, "claims"), claims)
+        output = os.path.join(tmp, "resultados.jsonl")
+
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        report = asyncio.run(
+            run_batch(
+                claim_list,
+                output,
+                concurrency=concurrency,
+                timeout=None,
+                configurable={
+                    "saldos_csv_path": csv_path,
+                    "pipeline_mode": mode,
+                    "agent_models": agent_models or {},
+                },
+                graph=graph,
+            )
+        )
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "mode": mode,
+        "claims": report.processed,
+        "ok": report.ok,
+        "errors": report.errors,
+        "claims_per_s": report.processed / elapsed if elapsed else 0.0,
+        "p50_s": report.percentile(50),
+        "p95_s": report.percentile(95),
+        "tracemalloc_peak_mb": peak / 2**20 if peak is not None else None,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "checkpoint": saver.checkpoint_stats() if saver else None,
+        "pages": page_stats(),
+        "metrics": get_metrics().summary(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument(
+        "--rows", type=int, default=10_000, help="Filas del CSV de saldos"
+    )
+    parser.add_argument(
+        "--model-latency", type=float, default=0.05, help="Segundos por llamada de chat"
+    )
+    parser.add_argument(
+        "--vision-latency", type=float, default=0.2, help="Segundos por extracción"
+    )
+    parser.add_argument(
+        "--mode", choices=["supervisor", "deterministic"], default="supervisor"
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="Medir el pico del heap de Python"
+    )
+    parser.add_argument(
+        "--checkpoint", action="store_true", help="Usar el checkpointer SQLite"
+    )
+    parser.add_argument("--json", help="Archivo donde guardar el resultado completo")
+    args = parser.parse_args()
+
+    result = run(
+        claims=args.claims,
+        concurrency=args.concurrency,
+        rows=args.rows,
+        model_latency_s=args.model_latency,
+        vision_latency_s=args.vision_latency,
+        mode=args.mode,
+        trace_memory=args.tracemalloc,
+        checkpoint=args.checkpoint,
+    )
+
+    sys.stdout.write(
+        f"modo={result['mode']} reclamaciones={result['claims']} ok={result['ok']} "
+        f"errores={result['errors']} rendimiento={result['claims_per_s']:.2f}/s "
+        f"p50={result['p50_s']:.2f}s p95={result['p95_s']:.2f}s "
+        f"rss_max={result['max_rss_mb']:.0f}MB"
+        + (
+            f" heap_pico={result['tracemalloc_peak_mb']:.1f}MB"
+            if result["tracemalloc_peak_mb"] is not None
+            else ""
+        )
+        + "\n"
+    )
+    if result["checkpoint"]:
+        c = result["checkpoint"]
+        sys.stdout.write(
+            f"checkpoints={c['checkpoints']} escrituras={c['writes']} "
+            f"blobs={c['blobs_written']} (omitidos {c['blobs_skipped']}) "
+            f"bytes={c['bytes_written'] / 2**20:.2f}MB media={c['mean_write_ms']:.2f}ms "
+            f"total={c['write_seconds']:.2f}s\n"
+        )
+    for doc_type, p in result["pages"].items():
+        sys.stdout.write(
+            f"{doc_type}: documentos={p['documents']} páginas={p['pages']} "
+            f"clasificadas={p['classified']} renderizadas={p['rendered']} "
+            f"enviadas={p['sent']} encontrado={p['found']}\n"
+        )
+    sys.stdout.write(
+        f"\n{'tipo':<6} {'nombre':<40} {'llamadas':>8} {'media (ms)':>11} {'p95 (ms)':>9} {'cola (ms)':>10}\n"
+    )
+    for kind, series in result["metrics"].items():
+        for name, m in sorted(series.items(), key=lambda item: -item[1]["total_s"]):
+            sys.stdout.write(
+                f"{kind:<6} {name:<40} {m['calls']:>8} {m['mean_s'] * 1e3:>11.1f} "
+                f"{m['p95_s'] * 1e3:>9.1f} {m['queue_mean_s'] * 1e3:>10.1f}\n"
+            )
+
+    agents = result["metrics"].get("agent", {})
+    if agents:
+        sys.stdout.write(
+            f"\n{'agente':<40} {'tokens entrada':>15} {'cacheados':>10} {'proporción':>11}\n"
+        )
+        for name, m in sorted(agents.items()):
+            sys.stdout.write(
+                f"{name:<40} {m['tokens_in']:>15} {m['tokens_cached']:>10} {m['cached_ratio']:>11.1%}\n"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+    if result["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
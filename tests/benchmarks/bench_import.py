@@ -0,0 +1,72 @@
+"""Mide el tiempo de arranque en frío de `import react_agent.graph`.
+
+Cada repetición corre en un proceso nuevo. El script termina con código 1 si
+la mediana supera `--max-seconds` o si la importación carga alguna de las
+dependencias pesadas que deben cargarse solo en el primer uso.
+
+Uso:
+    python -m tests.benchmarks.bench_import --runs 5 --max-seconds 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Dependencias que no deben cargarse al importar el grafo
+HEAVY_MODULES = [
+    "langchain_google_vertexai",
+    "vertexai",
+    "google.cloud.aiplatform",
+    "langchain_openai",
+    "langchain_tavily",
+    "fitz",
+    "PIL",
+    "pandas",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import react_agent.graph
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {modules!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module_names=HEAVY_MODULES) -> dict:
+    """Importa `react_agent.graph` en un proceso nuevo y devuelve tiempo y módulos pesados cargados."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=list(module_names))],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    samples = [measure_import() for _ in range(args.runs)]
+    seconds = [s["seconds"] for s in samples]
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+    median = statistics.median(seconds)
+
+    sys.stdout.write(
+        f"import react_agent.graph: mediana {median:.2f}s, mín {min(seconds):.2f}s, máx {max(seconds):.2f}s\n"
+    )
+    if loaded:
+        sys.stdout.write(
+            f"dependencias pesadas cargadas al importar: {', '.join(loaded)}\n"
+        )
+    if loaded or median > args.max_seconds:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compara el rendimiento del render de páginas en hilos contra el pool de procesos.
+
+Renderiza páginas escaneadas sintéticas con el perfil de la cédula (render de
+PyMuPDF, codificación JPEG y base64, sin la caché de rasterización) con N
+renders concurrentes: en la ruta de hilos (`render_pdf_page_base64` en un
+`ThreadPoolExecutor`, como `asyncio.to_thread`) y en un `RenderPool` de N
+procesos. Con el GIL la ruta de hilos no escala con los núcleos; el pool sí.
+
+Uso:
+    python -m tests.benchmarks.bench_render --pages 64 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from react_agent.render_pool import RenderPool, available_cpus
+from react_agent.rendering import RenderSettings, image_settings, render_pdf_page_base64
+from tests.benchmarks.fakes import write_claims
+
+
+def pages_per_second(
+    render: Callable[[str, RenderSettings], str],
+    paths: List[str],
+    settings: RenderSettings,
+    concurrency: int,
+) -> float:
+    """Renderiza todos los `paths` con `concurrency` llamadas simultáneas."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda path: render(path, settings), paths))
+        return len(paths) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=64, help="Páginas por medición")
+    parser.add_argument("--documents", type=int, default=8, help="Documentos distintos")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, available_cpus()}),
+        help="Renders concurrentes (hilos o procesos)",
+    )
+    args = parser.parse_args()
+    settings = image_settings("cedula")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        claims = write_claims(os.path.join(tmp, "claims"), args.documents)
+        documents = [claim.cedula_pdf_path for claim in claims]
+        paths = [documents[i % len(documents)] for i in range(args.pages)]
+
+        sys.stdout.write(
+            f"núcleos disponibles={available_cpus()} páginas={args.pages}\n\n"
+        )
+        sys.stdout.write(
+            f"{'workers':>8} {'hilos (pág/s)':>14} {'procesos (pág/s)':>17} {'vs hilos':>9} {'escala':>7}\n"
+        )
+        baseline = None
+        for workers in args.workers:
+            threads = pages_per_second(render_pdf_page_base64, paths, settings, workers)
+            with RenderPool(workers=workers) as pool:
+                pool.warm_up()
+                pages_per_second(
+                    pool.render, documents, settings, workers
+                )  # abre los documentos
+                processes = pages_per_second(pool.render, paths, settings, 2 * workers)
+            baseline = baseline or processes
+            sys.stdout.write(
+                f"{workers:>8} {threads:>14.1f} {processes:>17.1f} "
+                f"{processes / threads:>8.2f}x {processes / baseline:>6.2f}x\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Compara la consulta de saldos original (CSV completo por llamada) con los almacenes.
+
+`BalanceStore` indexa el CSV en memoria; `SQLiteBalanceStore` consulta la base
+que genera `ingest_csv`. La columna de memoria es el crecimiento de la memoria
+anónima del proceso (RssAnon) al cargar y consultar cada almacén: las páginas
+de la base mapeadas en memoria son caché del sistema y no cuentan.
+
+Uso:
+    python -m tests.benchmarks.bench_saldos --rows 10000 1000000 10000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from react_agent.balances import BalanceStore, SQLiteBalanceStore, ingest_csv
+
+PRODUCTOS = [
+    "TARJETA DE CRÉDITO",
+    "Móvil Consumo Fijo",
+    "Móvil Consumo Libranza",
+    "Libre Inversión",
+]
+
+
+def write_dataset(path: str, rows: int, seed: int = 7) -> None:
+    """Genera un `data_saldos.csv` sintético con cédulas únicas."""
+    rng = np.random.default_rng(seed)
+    chunk = 1_000_000
+    for start in range(0, rows, chunk):
+        size = min(chunk, rows - start)
+        cedulas = np.arange(1_000_000_000 + start, 1_000_000_000 + start + size)
+        df = pd.DataFrame(
+            {
+                "Cedula": cedulas,
+                "Saldo": rng.integers(1_000_000, 300_000_000, size),
+                "Producto": rng.choice(PRODUCTOS, size),
+                "fecha desembolso": "15/03/2021",
+                "Mondo desembolso": rng.integers(1_000_000, 80_000_000, size),
+            }
+        )
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+
+def rss_anon_mb() -> float:
+    """Memoria anónima residente del proceso en MB (solo Linux)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def timed_lookups(store, cedulas) -> list:
+    lookups = []
+    for cedula in cedulas:
+        start = time.perf_counter()
+        store.lookup(cedula)
+        lookups.append(time.perf_counter() - start)
+    return lookups
+
+
+def legacy_lookup(path: str, cedula: str) -> None:
+    """Replica la ruta original de `saldo_tool`."""
+    df = pd.read_csv(path)
+    person_data = df[df["Cedula"].astype(str) == str(cedula)]
+    person_data.iloc[0]
+
+
+def bench(rows: int, legacy_iterations: int, store_iterations: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data_saldos.csv")
+        write_dataset(path, rows)
+        cedulas = [
+            str(1_000_000_000 + random.randrange(rows)) for _ in range(store_iterations)
+        ]
+
+        # SQLite primero, para que la memoria de las otras rutas no se mezcle
+        db_path = os.path.join(tmp, "data_saldos.sqlite")
+        start = time.perf_counter()
+        ingest_csv(path, db_path)
+        ingest_seconds = time.perf_counter() - start
+        before = rss_anon_mb()
+        sqlite_lookups = timed_lookups(SQLiteBalanceStore(db_path), cedulas)
+        sqlite_mb = rss_anon_mb() - before
+
+        before = rss_anon_mb()
+        store = BalanceStore(path)
+        start = time.perf_counter()
+        store.load()
+        load_seconds = time.perf_counter() - start
+        lookups = timed_lookups(store, cedulas)
+        store_mb = rss_anon_mb() - before
+
+        legacy = []
+        for cedula in cedulas[:legacy_iterations]:
+            start = time.perf_counter()
+            legacy_lookup(path, cedula)
+            legacy.append(time.perf_counter() - start)
+
+    return {
+        "rows": rows,
+        "legacy_ms": statistics.median(legacy) * 1e3,
+        "store_load_s": load_seconds,
+        "store_lookup_us": statistics.median(lookups) * 1e6,
+        "store_mb": store_mb,
+        "sqlite_ingest_s": ingest_seconds,
+        "sqlite_lookup_us": statistics.median(sqlite_lookups) * 1e6,
+        "sqlite_p99_us": sorted(sqlite_lookups)[int(0.99 * len(sqlite_lookups))] * 1e6,
+        "sqlite_mb": sqlite_mb,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000]
+    )
+    parser.add_argument("--legacy-iterations", type=int, default=3)
+    parser.add_argument("--store-iterations", type=int, default=10_000)
+    args = parser.parse_args()
+
+    sys.stdout.write(
+        f"{'filas':>12} {'original (ms)':>14} | {'carga (s)':>10} {'consulta (µs)':>14} "
+        f"{'MB':>7} | {'ingesta (s)':>11} {'sqlite (µs)':>12} {'p99 (µs)':>9} {'MB':>7}\n"
+    )
+    for rows in args.rows:
+        r = bench(rows, args.legacy_iterations, args.store_iterations)
+        sys.stdout.write(
+            f"{r['rows']:>12,} {r['legacy_ms']:>14.1f} | {r['store_load_s']:>10.2f} "
+            f"{r['store_lookup_us']:>14.2f} {r['store_mb']:>7.1f} | {r['sqlite_ingest_s']:>11.2f} "
+            f"{r['sqlite_lookup_us']:>12.2f} {r['sqlite_p99_us']:>9.1f} {r['sqlite_mb']:>7.1f}\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
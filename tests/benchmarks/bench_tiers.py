@@ -0,0 +1,114 @@
+"""Compara latencia y costo del grafo según el nivel de modelo de cada agente.
+
+Ejecuta el benchmark de extremo a extremo (`bench_graph`, sin red) con varias
+asignaciones de `Configuration.agent_models` y calcula el costo a partir de los
+tokens que registra la instrumentación por modelo. Las latencias por llamada
+son simuladas y los precios son los de lista (USD por millón de tokens); ambos
+se pueden ajustar por línea de comandos.
+
+Uso:
+    python -m tests.benchmarks.bench_tiers --claims 20 --concurrency 4
+    python -m tests.benchmarks.bench_tiers --latency azure_openai/gpt-4.1=1.5 --price azure_openai/gpt-4.1=2,8
+"""
+
+import argparse
+import sys
+from typing import Dict, Tuple
+
+from react_agent.configuration import Configuration
+from tests.benchmarks.bench_graph import run
+
+DEFAULT_MODEL = Configuration().model
+FAST_MODEL = Configuration().fast_model
+
+# Latencia simulada por llamada, en segundos
+LATENCIES: Dict[str, float] = {
+    "azure_openai/gpt-4.1": 1.2,
+    "azure_openai/gpt-4.1-mini": 0.6,
+    "azure_openai/gpt-4.1-nano": 0.35,
+}
+
+# USD por millón de tokens de entrada y de salida
+PRICES: Dict[str, Tuple[float, float]] = {
+    "azure_openai/gpt-4.1": (2.00, 8.00),
+    "azure_openai/gpt-4.1-mini": (0.40, 1.60),
+    "azure_openai/gpt-4.1-nano": (0.10, 0.40),
+}
+
+ROUTING_AGENTS = ("cedula_agent", "registraduria_agent", "defuncion_agent")
+ALL_AGENTS = ("supervisor", *ROUTING_AGENTS, "saldo_agent")
+
+SCENARIOS: Dict[str, Dict[str, str]] = {
+    "todo default": {},
+    "enrutamiento fast": {agent: "fast" for agent in ROUTING_AGENTS},
+    "todo fast": {agent: "fast" for agent in ALL_AGENTS},
+}
+
+
+def cost_usd(model_metrics: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Costo por modelo a partir de los tokens registrados (los modelos sin precio cuestan 0)."""
+    costs = {}
+    for model, m in model_metrics.items():
+        price_in, price_out = PRICES.get(model, (0.0, 0.0))
+        costs[model] = (m["tokens_in"] * price_in + m["tokens_out"] * price_out) / 1e6
+    return costs
+
+
+def _pair(text: str) -> Tuple[str, str]:
+    model, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"se esperaba MODELO=VALOR: {text}")
+    return model, value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument(
+        "--rows", type=int, default=10_000, help="Filas del CSV de saldos"
+    )
+    parser.add_argument(
+        "--vision-latency", type=float, default=0.2, help="Segundos por extracción"
+    )
+    parser.add_argument(
+        "--latency", type=_pair, action="append", default=[], help="MODELO=SEGUNDOS"
+    )
+    parser.add_argument(
+        "--price", type=_pair, action="append", default=[], help="MODELO=ENTRADA,SALIDA"
+    )
+    args = parser.parse_args()
+
+    LATENCIES.update({model: float(value) for model, value in args.latency})
+    for model, value in args.price:
+        price_in, price_out = value.split(",")
+        PRICES[model] = (float(price_in), float(price_out))
+
+    sys.stdout.write(f"default={DEFAULT_MODEL} fast={FAST_MODEL}\n\n")
+    sys.stdout.write(
+        f"{'escenario':<20} {'recl/s':>7} {'p50 (s)':>8} {'p95 (s)':>8} "
+        f"{'tokens':>9} {'USD/recl':>10} {'ahorro':>7}\n"
+    )
+    baseline = None
+    for scenario, agent_models in SCENARIOS.items():
+        result = run(
+            claims=args.claims,
+            concurrency=args.concurrency,
+            rows=args.rows,
+            vision_latency_s=args.vision_latency,
+            agent_models=agent_models,
+            model_latencies=LATENCIES,
+        )
+        models = result["metrics"].get("model", {})
+        tokens = sum(m["tokens_in"] + m["tokens_out"] for m in models.values())
+        per_claim = sum(cost_usd(models).values()) / max(1, result["claims"])
+        baseline = per_claim if baseline is None else baseline
+        saving = 1 - per_claim / baseline if baseline else 0.0
+        sys.stdout.write(
+            f"{scenario:<20} {result['claims_per_s']:>7.2f} {result['p50_s']:>8.2f} "
+            f"{result['p95_s']:>8.2f} {tokens:>9} {per_claim:>10.5f} {saving:>6.0%}\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
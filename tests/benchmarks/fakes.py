@@ -0,0 +1,365 @@
+"""Modelos falsos y datos sintéticos para medir el grafo sin red.
+
+- `ScriptedChatModel`: modelo de chat determinista con latencia simulada; una
+  política decide la respuesta a partir de los mensajes recibidos. Simula la
+  caché de prompts del proveedor (`PrefixCache`) y reporta los tokens cacheados.
+- Políticas para el supervisor, cada agente especializado y el modelo
+  multimodal de extracción (que deriva la cédula del hash de la imagen para
+  que siempre exista en el `data_saldos.csv` sintético).
+- Generación de reclamaciones con PDFs escaneados (solo imagen, sin capa de
+  texto), de modo que se ejercita el render y la llamada al modelo multimodal.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent.batch import Claim
+from react_agent.utils import get_message_text
+
+CEDULA_BASE = 1_000_000_000
+
+Policy = Callable[[Sequence[BaseMessage]], AIMessage]
+
+
+class RateLimitError(Exception):
+    """Error de cuota (429) del proveedor falso."""
+
+    status_code = 429
+
+
+class ThrottledEndpoint:
+    """Proveedor falso con cuota: rechaza con 429 las llamadas por encima de
+    `max_concurrency` simultáneas o de `rpm` por minuto."""
+
+    def __init__(self, max_concurrency: int, rpm: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.in_flight = 0
+        self.peak = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._starts: List[float] = []
+
+    def enter(self) -> None:
+        now = time.monotonic()
+        self._starts = [t for t in self._starts if now - t < 60]
+        if self.in_flight >= self.max_concurrency or (
+            self.rpm is not None and len(self._starts) >= self.rpm
+        ):
+            self.rejected += 1
+            raise RateLimitError("429 Too Many Requests")
+        self._starts.append(now)
+        self.in_flight += 1
+        self.accepted += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    def exit(self) -> None:
+        self.in_flight -= 1
+
+
+class PrefixCache:
+    """Caché de prompts simulada con las reglas de Azure OpenAI.
+
+    Solo se cachean prompts de al menos `min_tokens` tokens; los tokens
+    cacheados son los del prefijo de mensajes más largo ya visto en una llamada
+    anterior, en bloques de `block` tokens.
+    """
+
+    def __init__(self, min_tokens: int = 1024, block: int = 128):
+        self.min_tokens = min_tokens
+        self.block = block
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, messages: Sequence[BaseMessage]) -> int:
+        """Registra el prompt y devuelve cuántos de sus tokens salen de la caché."""
+        digest = hashlib.sha256()
+        tokens = cached = 0
+        prefixes = []
+        for message in messages:
+            digest.update(
+                repr(
+                    (
+                        message.type,
+                        message.content,
+                        getattr(message, "tool_calls", None),
+                    )
+                ).encode()
+            )
+            tokens += count_tokens_approximately([message])
+            prefixes.append((digest.hexdigest(), tokens))
+        with self._lock:
+            for key, prefix_tokens in prefixes:
+                if key in self._seen:
+                    cached = prefix_tokens
+            self._seen.update(key for key, _ in prefixes)
+        if tokens < self.min_tokens:
+            return 0
+        return cached // self.block * self.block
+
+
+# Una caché por nombre de modelo, como un despliegue del proveedor
+_prefix_caches: Dict[str, PrefixCache] = {}
+
+
+def prefix_cache(model_name: str) -> PrefixCache:
+    """Devuelve la caché de prompts simulada del modelo `model_name`."""
+    return _prefix_caches.setdefault(model_name, PrefixCache())
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Modelo de chat falso: responde con `policy(messages)` tras `latency_s` segundos.
+
+    Con `endpoint`, cada llamada además respeta la cuota de un `ThrottledEndpoint`.
+    """
+
+    policy: Policy
+    latency_s: float = 0.0
+    model_name: str = "scripted-fake"
+    endpoint: Optional[Any] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        message = self.policy(messages)
+        tokens_in = count_tokens_approximately(messages)
+        tokens_out = count_tokens_approximately([message])
+        message.usage_metadata = {
+            "input_tokens": tokens_in,
+            "output_tokens": tokens_out,
+            "total_tokens": tokens_in + tokens_out,
+            "input_token_details": {
+                "cache_read": prefix_cache(self.model_name).lookup(messages)
+            },
+        }
+        message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency_s)
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.endpoint is None:
+            await asyncio.sleep(self.latency_s)
+            return self._result(messages)
+        self.endpoint.enter()
+        try:
+            await asyncio.sleep(self.latency_s)
+            return self._result(messages)
+        finally:
+            self.endpoint.exit()
+
+
+# -------------------------------
+# Políticas
+# -------------------------------
+def _call(
+    name: str, args: Optional[dict] = None, call_id: Optional[str] = None
+) -> dict:
+    return {"name": name, "args": args or {}, "id": call_id or f"call-{name}"}
+
+
+def _tool_results(messages: Sequence[BaseMessage]) -> dict:
+    return {m.name: get_message_text(m) for m in messages if isinstance(m, ToolMessage)}
+
+
+def _agent_answers(messages: Sequence[BaseMessage]) -> dict:
+    return {
+        m.name: get_message_text(m)
+        for m in messages
+        if isinstance(m, AIMessage) and m.name and not m.tool_calls
+    }
+
+
+def supervisor_policy(messages: Sequence[BaseMessage]) -> AIMessage:
+    """Pide cédula, registraduría y defunción en paralelo, luego el saldo y responde."""
+    requested = {
+        name.removeprefix("transfer_to_")
+        for name in _tool_results(messages)
+        if name.startswith("transfer_to_")
+    }
+    answers = _agent_answers(messages)
+    if not requested:
+        return AIMessage(
+            content="",
+            tool_calls=[
+                _call("transfer_to_cedula_agent"),
+                _call("transfer_to_registraduria_agent"),
+                _call("transfer_to_defuncion_agent"),
+            ],
+        )
+    if "saldo_agent" not in requested and "cedula_agent" in answers:
+        return AIMessage(content="", tool_calls=[_call("transfer_to_saldo_agent")])
+    resumen = "; ".join(f"{name}: {text}" for name, text in sorted(answers.items()))
+    return AIMessage(content=f"Resumen de la reclamación. {resumen}")
+
+
+def _single_tool_policy(tool_name: str) -> Policy:
+    def policy(messages: Sequence[BaseMessage]) -> AIMessage:
+        results = _tool_results(messages)
+        if tool_name in results:
+            return AIMessage(content=results[tool_name])
+        return AIMessage(content="", tool_calls=[_call(tool_name)])
+
+    return policy
+
+
+def saldo_policy(messages: Sequence[BaseMessage]) -> AIMessage:
+    """Consulta el saldo, evalúa las reglas y responde con el resultado.
+
+    La cédula y la fecha de defunción vienen en los campos del estado, así que
+    las herramientas se llaman sin argumentos.
+    """
+    results = _tool_results(messages)
+    if "saldo_tool" not in results:
+        return AIMessage(content="", tool_calls=[_call("saldo_tool")])
+    if "elegibilidad_tool" not in results:
+        return AIMessage(content="", tool_calls=[_call("elegibilidad_tool")])
+    return AIMessage(content=results["elegibilidad_tool"])
+
+
+AGENT_POLICIES = {
+    "supervisor": supervisor_policy,
+    "cedula_agent": _single_tool_policy("cedula_tool"),
+    "registraduria_agent": _single_tool_policy("registraduria_tool"),
+    "defuncion_agent": _single_tool_policy("fecha_defuncion_tool"),
+    "saldo_agent": saldo_policy,
+}
+
+
+def extraction_policy(rows: int) -> Policy:
+    """Modelo multimodal falso: deriva una cédula existente o una fecha del hash de la imagen."""
+
+    def policy(messages: Sequence[BaseMessage]) -> AIMessage:
+        content = messages[-1].content
+        prompt = content[0]["text"] if isinstance(content, list) else str(content)
+        image = content[1]["image_url"]["url"] if isinstance(content, list) else ""
+        digest = int(hashlib.sha256(image.encode("ascii")).hexdigest()[:8], 16)
+        if "cédula" in prompt:
+            return AIMessage(content=str(CEDULA_BASE + digest % rows))
+        return AIMessage(
+            content=f"20{20 + digest % 5}-{1 + digest % 12:02d}-{1 + digest % 28:02d}"
+        )
+
+    return policy
+
+
+def install_fake_models(
+    model_latency_s: float,
+    vision_latency_s: float,
+    rows: int,
+    model_latencies: Optional[Dict[str, float]] = None,
+) -> None:
+    """Reemplaza los modelos de Azure OpenAI y Vertex AI por modelos falsos.
+
+    Cada agente recibe un modelo falso con el nombre del modelo que le asigna
+    la configuración y la latencia de `model_latencies[modelo]` (o
+    `model_latency_s` si el modelo no aparece).
+    """
+    from react_agent import nodes, pipeline
+    from react_agent.chat_utils import set_vertex_model_factory
+
+    latencies = model_latencies or {}
+    nodes.set_model_factory(
+        lambda name, model: ScriptedChatModel(
+            policy=AGENT_POLICIES[name],
+            latency_s=latencies.get(model, model_latency_s),
+            model_name=model,
+        )
+    )
+    vision = ScriptedChatModel(
+        policy=extraction_policy(rows),
+        latency_s=vision_latency_s,
+        model_name="fake-vision",
+    )
+    set_vertex_model_factory(lambda model_name: vision)
+    summary = ScriptedChatModel(
+        policy=lambda messages: AIMessage(content="Resumen de la reclamación."),
+        latency_s=model_latency_s,
+        model_name="fake-summary",
+    )
+    pipeline._summary_model = lambda: summary
+
+
+# -------------------------------
+# Documentos sintéticos
+# -------------------------------
+def _scanned_pdf(path: Path, lines: List[str], dpi: int = 110) -> None:
+    """Escribe un PDF de una página que solo contiene una imagen (sin capa de texto)."""
+    import fitz  # PyMuPDF
+
+    source = fitz.open()
+    page = source.new_page(width=612, height=792)
+    for i, line in enumerate(lines):
+        page.insert_text((72, 90 + 22 * i), line, fontsize=14)
+    page.draw_rect(fitz.Rect(60, 60, 552, 120 + 22 * len(lines)), width=1.5)
+    pix = page.get_pixmap(dpi=dpi)
+    source.close()
+
+    scanned = fitz.open()
+    out = scanned.new_page(width=612, height=792)
+    out.insert_image(out.rect, pixmap=pix)
+    scanned.save(str(path), deflate=True)
+    scanned.close()
+
+
+def write_claims(root: str, count: int) -> List[Claim]:
+    """Genera `count` reclamaciones con cédula y certificado de defunción escaneados."""
+    claims = []
+    for i in range(count):
+        folder = Path(root) / f"claim_{i:05d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        cedula = folder / "cedula.pdf"
+        defuncion = folder / "defuncion.pdf"
+        _scanned_pdf(
+            cedula,
+            [
+                "REPUBLICA DE COLOMBIA",
+                "CEDULA DE CIUDADANIA",
+                f"NUMERO {CEDULA_BASE + i:,}".replace(",", "."),
+            ],
+        )
+        _scanned_pdf(
+            defuncion,
+            [
+                "REGISTRO CIVIL DE DEFUNCION",
+                f"Indicativo serial {i:08d}",
+                "Fecha de la defuncion",
+                f"Ano 2023  Mes DIC  Dia {1 + i % 28:02d}",
+            ],
+        )
+        claims.append(Claim(folder.name, str(cedula), str(defuncion)))
+    return claims
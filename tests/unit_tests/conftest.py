@@ -0,0 +1,13 @@
+import pytest
+
+from react_agent import nodes, pipeline
+from react_agent.chat_utils import set_vertex_model_factory
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Restaura los modelos reales al terminar una prueba que instala modelos falsos."""
+    monkeypatch.setattr(pipeline, "_summary_model", pipeline._summary_model)
+    yield
+    nodes.set_model_factory(None)
+    set_vertex_model_factory(None)
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+import pytest
+
+from react_agent.balances import (
+    BalanceStore,
+    SQLiteBalanceStore,
+    get_balance_store,
+    ingest_csv,
+)
+
+CSV = """Cedula,Saldo,Producto,fecha desembolso,Mondo desembolso
+1032323323,1500000,TARJETA DE CRÉDITO,15/03/2021,2000000
+79000001,42000000,Móvil Consumo Fijo,01/02/2020,30000000
+1032323323,9,DUPLICADO,01/01/2000,9
+"""
+
+
+def test_balance_store_lookup(tmp_path) -> None:
+    path = tmp_path / "data_saldos.csv"
+    path.write_text(CSV, encoding="utf-8")
+    store = BalanceStore(str(path))
+
+    record = store.lookup("1032323323")
+    assert record.producto == "TARJETA DE CRÉDITO"
+    assert record.saldo == 1500000
+    assert store.lookup(" 79000001 ").monto_desembolso == 30000000
+    assert len(store) == 2
+
+    with pytest.raises(ValueError):
+        store.lookup("123")
+
+
+def test_balance_store_reloads_only_on_content_change(tmp_path) -> None:
+    path = tmp_path / "data_saldos.csv"
+    path.write_text(CSV, encoding="utf-8")
+    store = BalanceStore(str(path), stat_interval_s=0)
+    store.lookup("79000001")
+
+    # Misma información, nueva fecha de modificación: no recarga
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    store.lookup("79000001")
+    assert store.loads == 1
+
+    path.write_text(CSV.replace("42000000", "1"), encoding="utf-8")
+    assert asyncio.run(store.alookup("79000001")).saldo == 1
+    assert store.loads == 2
+
+
+def test_balance_store_checks_the_file_at_most_once_per_interval(
+    tmp_path, monkeypatch
+) -> None:
+    path = tmp_path / "data_saldos.csv"
+    path.write_text(CSV, encoding="utf-8")
+    store = BalanceStore(str(path), stat_interval_s=60)
+    store.lookup("79000001")
+
+    stats = []
+    real_stat = os.stat
+    monkeypatch.setattr(
+        os, "stat", lambda *a, **kw: stats.append(a) or real_stat(*a, **kw)
+    )
+    path.write_text(CSV.replace("42000000", "1"), encoding="utf-8")
+    for _ in range(100):
+        assert asyncio.run(store.alookup("79000001")).saldo == 42000000
+    # Dentro del intervalo no se vuelve a revisar el archivo
+    assert stats == [] and store.loads == 1
+
+    store.stat_interval_s = 0
+    assert store.lookup("79000001").saldo == 1
+
+
+def test_balance_store_missing_file(tmp_path) -> None:
+    store = BalanceStore(str(tmp_path / "no_existe.csv"))
+    with pytest.raises(FileNotFoundError):
+        store.lookup("1")
+
+
+def test_sqlite_store_matches_the_csv_store(tmp_path) -> None:
+    csv_path = tmp_path / "data_saldos.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    db_path = str(tmp_path / "data_saldos.sqlite")
+    assert ingest_csv(str(csv_path), db_path, chunksize=1) == 2
+
+    store = get_balance_store(db_path)
+    assert isinstance(store, SQLiteBalanceStore)
+    store.stat_interval_s = 0
+    assert store.lookup("1032323323") == BalanceStore(str(csv_path)).lookup(
+        "1032323323"
+    )
+    assert asyncio.run(store.alookup(" 79000001 ")).saldo == 42000000
+    assert len(store) == 2
+    with pytest.raises(ValueError):
+        store.lookup("123")
+
+    # Una nueva ingesta reemplaza la base y el almacén la vuelve a abrir
+    csv_path.write_text(CSV.replace("42000000", "1"), encoding="utf-8")
+    ingest_csv(str(csv_path), db_path)
+    assert store.lookup("79000001").saldo == 1
+    assert store.loads == 2
+
+    with pytest.raises(FileNotFoundError):
+        SQLiteBalanceStore(str(tmp_path / "no_existe.sqlite")).lookup("1")
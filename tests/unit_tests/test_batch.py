@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from react_agent.batch import BatchReport, claims_from_directory, run_batch
+
+
+class FakeGraph:
+    def __init__(self, slow=()):
+        self.calls = []
+        self.slow = set(slow)
+
+    async def ainvoke(self, input, config):
+        claim = config["configurable"]["cedula_pdf_path"]
+        self.calls.append(claim)
+        if any(s in claim for s in self.slow):
+            await asyncio.sleep(1)
+        return {"messages": [AIMessage(content=f"ok {claim}")]}
+
+
+def _claims_dir(tmp_path, n):
+    root = tmp_path / "claims"
+    for i in range(n):
+        folder = root / f"r{i}"
+        folder.mkdir(parents=True)
+        (folder / "Cedula.pdf").write_bytes(b"%PDF")
+        (folder / "CER_DEFUNCION.pdf").write_bytes(b"%PDF")
+    (root / "incompleta").mkdir()
+    return root
+
+
+def test_run_batch_streams_results_and_resumes(tmp_path) -> None:
+    claims = claims_from_directory(str(_claims_dir(tmp_path, 3)))
+    assert [c.claim_id for c in claims] == ["r0", "r1", "r2"]
+    output = tmp_path / "out.jsonl"
+
+    graph = FakeGraph(slow=("r1",))
+    report = asyncio.run(
+        run_batch(claims, str(output), concurrency=2, timeout=0.2, graph=graph)
+    )
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert {r["claim_id"]: r["status"] for r in records} == {
+        "r0": "ok",
+        "r1": "timeout",
+        "r2": "ok",
+    }
+    assert (report.ok, report.timeouts) == (2, 1)
+
+    graph = FakeGraph()
+    report = asyncio.run(run_batch(claims, str(output), graph=graph))
+    assert report.skipped == 3 and graph.calls == []
+
+    report = asyncio.run(run_batch(claims, str(output), retry_errors=True, graph=graph))
+    assert report.skipped == 2 and len(graph.calls) == 1
+
+
+def test_batch_report_percentiles() -> None:
+    report = BatchReport(
+        latencies=[float(i) for i in range(1, 101)], elapsed_s=60, ok=100
+    )
+    assert report.percentile(50) == 50
+    assert report.percentile(95) == 95
+    assert report.claims_per_minute == 100
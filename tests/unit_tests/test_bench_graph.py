@@ -0,0 +1,18 @@
+import pytest
+
+from tests.benchmarks.bench_graph import run
+
+
+@pytest.mark.parametrize("mode", ["supervisor", "deterministic"])
+def test_graph_benchmark_runs_offline(fake_models, mode: str) -> None:
+    result = run(
+        claims=2,
+        concurrency=2,
+        rows=200,
+        model_latency_s=0,
+        vision_latency_s=0,
+        mode=mode,
+    )
+    assert (result["ok"], result["errors"]) == (2, 0)
+    assert result["metrics"]["node"]
+    assert result["claims_per_s"] > 0
@@ -0,0 +1,112 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.graph import StateGraph
+
+from react_agent import nodes
+from react_agent.batch import run_batch
+from react_agent.chat_utils import set_vertex_model_factory
+from react_agent.checkpoint import SQLiteCheckpointSaver
+from react_agent.graph import builder
+from tests.benchmarks import fakes
+from tests.benchmarks.bench_saldos import write_dataset
+
+
+class _State(TypedDict):
+    documento: str
+    pasos: Annotated[list, operator.add]
+
+
+def _flaky_graph(saver, calls, fail):
+    def extraer(state):
+        calls.append("extraer")
+        return {"pasos": ["extraer"]}
+
+    def saldo(state):
+        calls.append("saldo")
+        if fail:
+            fail.pop()
+            raise RuntimeError("saldo caído")
+        return {"pasos": ["saldo"]}
+
+    g = StateGraph(_State)
+    g.add_node("extraer", extraer)
+    g.add_node("saldo", saldo)
+    g.add_edge("__start__", "extraer")
+    g.add_edge("extraer", "saldo")
+    return g.compile(checkpointer=saver)
+
+
+def test_failed_run_resumes_from_last_completed_node(tmp_path) -> None:
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    calls: list = []
+    graph = _flaky_graph(saver, calls, fail=[True])
+    config = {"configurable": {"thread_id": "r1"}}
+
+    try:
+        graph.invoke({"documento": "x" * 10_000, "pasos": []}, config)
+    except RuntimeError:
+        pass
+    assert graph.get_state(config).next == ("saldo",)
+
+    # Un proceso nuevo sobre la misma base reanuda sin repetir la extracción
+    graph = _flaky_graph(SQLiteCheckpointSaver(saver.path), calls, fail=[])
+    result = graph.invoke(None, config)
+    assert result["pasos"] == ["extraer", "saldo"]
+    assert calls == ["extraer", "saldo", "saldo"]
+
+    # El documento se guarda como entrada y como canal, nunca en cada paso
+    stats = saver.checkpoint_stats()
+    assert stats["checkpoints"] >= 2
+    assert stats["blobs_skipped"] >= 1
+    assert stats["bytes_written"] < 2 * 10_000 + 2_000
+
+    assert len(list(saver.list(config))) >= 3
+    saver.delete_thread("r1")
+    assert saver.get_tuple(config) is None
+
+
+def test_batch_retry_does_not_repeat_extractions(tmp_path, fake_models) -> None:
+    fakes.install_fake_models(0, 0, rows=200)
+    vision_calls = []
+    extraction = fakes.extraction_policy(200)
+    vision = fakes.ScriptedChatModel(
+        policy=lambda m: vision_calls.append(1) or extraction(m)
+    )
+    set_vertex_model_factory(lambda model_name: vision)
+    saldo_down = [True]
+
+    def saldo(messages):
+        if saldo_down:
+            raise RuntimeError("servicio de saldos caído")
+        return fakes.saldo_policy(messages)
+
+    policies = {**fakes.AGENT_POLICIES, "saldo_agent": saldo}
+    nodes.set_model_factory(
+        lambda name, _: fakes.ScriptedChatModel(policy=policies[name])
+    )
+
+    csv_path = str(tmp_path / "data_saldos.csv")
+    write_dataset(csv_path, 200)
+    claims = fakes.write_claims(str(tmp_path / "claims"), 1)
+    output = str(tmp_path / "resultados.jsonl")
+    graph = builder.compile(
+        checkpointer=SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    )
+    configurable = {"saldos_csv_path": csv_path}
+
+    report = asyncio.run(
+        run_batch(claims, output, configurable=configurable, graph=graph)
+    )
+    assert report.errors == 1
+    assert len(vision_calls) == 2
+
+    saldo_down.clear()
+    report = asyncio.run(
+        run_batch(
+            claims, output, configurable=configurable, retry_errors=True, graph=graph
+        )
+    )
+    assert report.ok == 1
+    assert len(vision_calls) == 2
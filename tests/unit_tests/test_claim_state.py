@@ -0,0 +1,64 @@
+import asyncio
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from react_agent import nodes
+from react_agent.graph import graph
+from react_agent.state import CLAIM_FIELDS
+from tests.benchmarks.bench_saldos import write_dataset
+from tests.benchmarks.fakes import (
+    AGENT_POLICIES,
+    CEDULA_BASE,
+    ScriptedChatModel,
+    install_fake_models,
+    write_claims,
+)
+
+
+def test_tools_write_claim_fields_and_saldo_agent_gets_them(
+    tmp_path, fake_models
+) -> None:
+    install_fake_models(model_latency_s=0, vision_latency_s=0, rows=200)
+    saldo_inputs = []
+
+    def saldo_policy(messages):
+        saldo_inputs.append(messages)
+        return AGENT_POLICIES["saldo_agent"](messages)
+
+    def factory(name, model):
+        policy = saldo_policy if name == "saldo_agent" else AGENT_POLICIES[name]
+        return ScriptedChatModel(policy=policy, model_name=model)
+
+    nodes.set_model_factory(factory)
+    csv_path = tmp_path / "data_saldos.csv"
+    write_dataset(str(csv_path), 200)
+    (claim,) = write_claims(str(tmp_path / "claims"), 1)
+    config = {
+        "configurable": {
+            "saldos_csv_path": str(csv_path),
+            "cedula_pdf_path": claim.cedula_pdf_path,
+            "defuncion_pdf_path": claim.defuncion_pdf_path,
+        }
+    }
+
+    result = asyncio.run(
+        graph.ainvoke({"messages": [("user", "procesa la reclamación")]}, config)
+    )
+
+    assert all(result.get(name) is not None for name in CLAIM_FIELDS)
+    assert 0 <= int(result["cedula"]) - CEDULA_BASE < 200
+    assert result["saldo"]["cedula"] == result["cedula"]
+    assert result["elegibilidad"]["texto"].startswith("Aplica a Póliza Express")
+
+    # El agente de saldo recibe los campos, no los mensajes de los otros agentes
+    first = saldo_inputs[0]
+    fields = [
+        m
+        for m in first
+        if isinstance(m, HumanMessage)
+        and m.content.startswith("Datos de la reclamación")
+    ]
+    assert fields and result["cedula"] in fields[0].content
+    assert not any(
+        isinstance(m, ToolMessage) and m.name == "cedula_tool" for m in first
+    )
@@ -3,3 +3,15 @@ from react_agent.configuration import Configuration
 
 def test_configuration_empty() -> None:
     Configuration.from_context()
+
+
+def test_model_for_resolves_tiers_and_explicit_models() -> None:
+    config = Configuration(
+        agent_models={
+            "registraduria_agent": "fast",
+            "saldo_agent": "openai/gpt-4.1-nano",
+        }
+    )
+    assert config.model_for("supervisor") == config.model
+    assert config.model_for("registraduria_agent") == config.fast_model
+    assert config.model_for("saldo_agent") == "openai/gpt-4.1-nano"
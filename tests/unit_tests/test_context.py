@@ -0,0 +1,92 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from react_agent.context import (
+    CONTEXT_POLICIES,
+    ContextPolicy,
+    make_pre_model_hook,
+    scope_messages,
+    trim_messages_to_budget,
+)
+
+
+def _history():
+    return [
+        HumanMessage(content="procesa la reclamación"),
+        AIMessage(
+            content="",
+            name="supervisor",
+            tool_calls=[{"name": "transfer_to_cedula_agent", "args": {}, "id": "t1"}],
+        ),
+        ToolMessage(
+            content="Transferido a cedula_agent",
+            name="transfer_to_cedula_agent",
+            tool_call_id="t1",
+        ),
+        AIMessage(
+            content="",
+            name="cedula_agent",
+            tool_calls=[{"name": "cedula_tool", "args": {}, "id": "t2"}],
+        ),
+        ToolMessage(content="1032323323", name="cedula_tool", tool_call_id="t2"),
+        AIMessage(content="La cédula es 1032323323", name="cedula_agent"),
+        AIMessage(content="estado: fallecido " * 50, name="registraduria_agent"),
+        AIMessage(
+            content="",
+            name="supervisor",
+            tool_calls=[{"name": "transfer_to_saldo_agent", "args": {}, "id": "t3"}],
+        ),
+    ]
+
+
+def test_scope_messages_for_saldo_agent() -> None:
+    history = _history()
+    scoped = scope_messages(
+        history, ContextPolicy(sources=("cedula_agent", "cedula_tool"))
+    )
+    assert scoped == [history[0], history[4], history[5], history[7]]
+
+
+def test_scope_messages_without_sources_keeps_user_and_handoff_turn() -> None:
+    history = _history()
+    assert scope_messages(history, ContextPolicy()) == [history[0], history[7]]
+
+
+def test_trim_respects_tool_pairs_and_summarizes() -> None:
+    history = _history()
+    trimmed = trim_messages_to_budget(
+        history, ContextPolicy(sources=("*",), max_tokens=60)
+    )
+    assert isinstance(trimmed[0], HumanMessage)
+    assert "1032323323" in trimmed[0].content
+    # Ningún ToolMessage queda huérfano de su AIMessage con tool_calls
+    for i, message in enumerate(trimmed):
+        if isinstance(message, ToolMessage):
+            assert isinstance(trimmed[i - 1], (AIMessage, ToolMessage))
+    assert trimmed[-1] is history[-1]
+
+
+def test_trim_is_noop_within_budget() -> None:
+    history = _history()
+    assert (
+        trim_messages_to_budget(history, ContextPolicy(max_tokens=100_000)) == history
+    )
+
+
+def test_pre_model_hook_keeps_a_single_leading_system_message(monkeypatch) -> None:
+    policy = ContextPolicy(
+        sources=("*",), max_tokens=60, fields=("cedula", "fecha_defuncion")
+    )
+    monkeypatch.setitem(CONTEXT_POLICIES, "supervisor", policy)
+    state = {
+        "messages": _history(),
+        "cedula": "1032323323",
+        "fecha_defuncion": "2025-01-12",
+    }
+
+    # create_react_agent antepone el prompt estático a lo que entrega el hook
+    hooked = make_pre_model_hook("supervisor")(state)["llm_input_messages"]
+    messages = [SystemMessage(content="prompt del supervisor"), *hooked]
+
+    assert [m for m in messages if isinstance(m, SystemMessage)] == [messages[0]]
+    assert "Resumen del contexto anterior" in messages[1].content
+    assert "2025-01-12" in messages[-1].content
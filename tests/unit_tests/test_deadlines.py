@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from react_agent.batch import BatchReport, run_batch
+from react_agent.deadlines import (
+    DeadlineExceeded,
+    LatencyTracker,
+    hedged,
+    with_deadline,
+)
+from react_agent.graph import graph
+from react_agent.scheduler import ModelLimits, Scheduler
+from tests.benchmarks import fakes
+from tests.benchmarks.bench_saldos import write_dataset
+
+
+def _within(deadline_s: float, coro_fn):
+    """Ejecuta `coro_fn` dentro de una corrida con plazo de `deadline_s` segundos."""
+    runnable = RunnableLambda(lambda _: None, afunc=lambda _: coro_fn())
+    config = {"configurable": {"deadline": time.time() + deadline_s}}
+    return asyncio.run(runnable.ainvoke(None, config))
+
+
+def test_with_deadline_bounds_the_call_and_frees_the_slot() -> None:
+    scheduler = Scheduler({"fake": ModelLimits(max_concurrency=1)})
+
+    async def slow():
+        await asyncio.sleep(5)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        _within(0.05, lambda: scheduler.call("fake/model", slow))
+    assert time.perf_counter() - start < 1
+    assert scheduler.stats()["fake/model"]["in_flight"] == 0
+
+    # Sin plazo la llamada no se acota
+    assert asyncio.run(with_deadline(asyncio.sleep(0, result="ok"), "x")) == "ok"
+
+
+def test_graph_run_stops_at_the_claim_deadline(tmp_path, fake_models) -> None:
+    fakes.install_fake_models(0, vision_latency_s=5, rows=200)
+    csv_path = str(tmp_path / "data_saldos.csv")
+    write_dataset(csv_path, 200)
+    claim = fakes.write_claims(str(tmp_path / "claims"), 1)[0]
+    config = {
+        "configurable": {
+            "saldos_csv_path": csv_path,
+            "cedula_pdf_path": claim.cedula_pdf_path,
+            "defuncion_pdf_path": claim.defuncion_pdf_path,
+            "pipeline_mode": "deterministic",
+            "deadline": time.time() + 0.3,
+        }
+    }
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(
+            graph.ainvoke({"messages": [("user", "Procesa la reclamación.")]}, config)
+        )
+    assert time.perf_counter() - start < 2
+
+
+def test_batch_passes_its_timeout_as_the_deadline(tmp_path) -> None:
+    seen = []
+
+    class Graph:
+        async def ainvoke(self, input, config):
+            seen.append(config["configurable"]["deadline"])
+            raise DeadlineExceeded("saldo_tool: el plazo de la reclamación venció")
+
+    claims = fakes.write_claims(str(tmp_path / "claims"), 1)
+    report = asyncio.run(
+        run_batch(claims, str(tmp_path / "out.jsonl"), timeout=30, graph=Graph())
+    )
+    assert isinstance(report, BatchReport) and report.timeouts == 1
+    assert 25 < seen[0] - time.time() <= 30
+
+
+def test_hedging_cuts_the_latency_tail() -> None:
+    calls = []
+
+    async def extraction():
+        calls.append(1)
+        # Una de cada 20 solicitudes es un atípico 25 veces más lento
+        await asyncio.sleep(0.25 if len(calls) % 20 == 0 else 0.01)
+        return "ok"
+
+    async def run(hedge: bool):
+        tracker = LatencyTracker()
+        latencies = []
+        for _ in range(100):
+            start = time.perf_counter()
+            if hedge:
+                await hedged(extraction, "vision", quantile=0.9, tracker=tracker)
+            else:
+                await extraction()
+            latencies.append(time.perf_counter() - start)
+        return sorted(latencies), tracker
+
+    plain, _ = asyncio.run(run(hedge=False))
+    calls.clear()
+    fast, tracker = asyncio.run(run(hedge=True))
+    assert plain[98] >= 0.25
+    assert fast[98] < 0.1
+    assert tracker.stats()["vision"]["hedge_wins"] >= 1
+    # Solo se duplican las solicitudes lentas
+    assert len(calls) < 110
+
+
+def test_hedged_uses_the_backup_when_the_first_request_fails() -> None:
+    tracker = LatencyTracker()
+    for _ in range(20):
+        tracker.observe("vision", 0.01)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("503")
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    assert asyncio.run(hedged(flaky, "vision", tracker=tracker)) == "ok"
+    assert len(attempts) == 2
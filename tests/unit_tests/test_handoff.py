@@ -0,0 +1,43 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.types import Command, Send
+
+from react_agent.graph import supervisor_routing
+from react_agent.state import State
+from react_agent.tools import transfer_to_cedula
+
+
+def _supervisor_turn():
+    return AIMessage(
+        content="",
+        id="ai-1",
+        tool_calls=[
+            {"name": "transfer_to_cedula_agent", "args": {}, "id": "c1"},
+            {"name": "transfer_to_defuncion_agent", "args": {}, "id": "c2"},
+        ],
+    )
+
+
+def test_handoff_answers_every_parallel_transfer() -> None:
+    messages = [HumanMessage(content="hola", id="h1"), _supervisor_turn()]
+    command = transfer_to_cedula.invoke(
+        {
+            "type": "tool_call",
+            "name": "transfer_to_cedula_agent",
+            "args": {"state": {"messages": messages}},
+            "id": "c1",
+        }
+    )
+
+    assert isinstance(command, Command)
+    assert command.graph == Command.PARENT
+    (send,) = command.goto
+    assert isinstance(send, Send) and send.node == "cedula_agent"
+    tool_msgs = send.arg["messages"][2:]
+    assert [m.tool_call_id for m in tool_msgs] == ["c1", "c2"]
+    assert [m.id for m in tool_msgs] == ["handoff-c1", "handoff-c2"]
+
+
+def test_supervisor_routing_keeps_all_tool_calls() -> None:
+    state = State(messages=[_supervisor_turn()])
+    assert supervisor_routing(state) == ["cedula_agent", "defuncion_agent"]
+    assert supervisor_routing(State(messages=[AIMessage(content="fin")])) == "__end__"
@@ -0,0 +1,12 @@
+import os
+
+from tests.benchmarks.bench_import import measure_import
+
+# Presupuesto holgado para máquinas de CI lentas; se puede ajustar por entorno
+IMPORT_BUDGET_S = float(os.getenv("IMPORT_BUDGET_S", "5"))
+
+
+def test_graph_import_is_lazy() -> None:
+    result = measure_import()
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_S
@@ -0,0 +1,121 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.prebuilt import create_react_agent
+
+from react_agent.instrumentation import (
+    InstrumentationHandler,
+    MetricsRegistry,
+    instrument,
+    timed,
+)
+
+
+class _ToolCallingFake(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@tool
+async def lookup(cedula: str) -> str:
+    """Consulta de prueba."""
+    return f"saldo de {cedula}"
+
+
+@tool
+async def broken() -> str:
+    """Herramienta que falla."""
+    raise ValueError("fallo")
+
+
+def _agent():
+    model = _ToolCallingFake(
+        messages=iter(
+            [
+                AIMessage(
+                    content="",
+                    tool_calls=[
+                        {"name": "lookup", "args": {"cedula": "1"}, "id": "t1"},
+                        {"name": "broken", "args": {}, "id": "t2"},
+                    ],
+                    usage_metadata={
+                        "input_tokens": 10,
+                        "output_tokens": 3,
+                        "total_tokens": 13,
+                    },
+                ),
+                AIMessage(
+                    content="listo",
+                    usage_metadata={
+                        "input_tokens": 20,
+                        "output_tokens": 2,
+                        "total_tokens": 22,
+                        "input_token_details": {"cache_read": 10},
+                    },
+                ),
+            ]
+        )
+    )
+    return create_react_agent(model, tools=[lookup, broken], name="saldo_agent")
+
+
+def test_handler_records_nodes_tools_and_tokens() -> None:
+    registry = MetricsRegistry()
+    graph = instrument(_agent(), InstrumentationHandler(registry))
+    asyncio.run(graph.ainvoke({"messages": [("user", "hola")]}))
+
+    summary = registry.summary()
+    assert summary["node"]["agent"]["calls"] == 2
+    assert summary["node"]["tools"]["calls"] >= 1
+    assert summary["tool"]["lookup"]["errors"] == 0
+    assert summary["tool"]["broken"]["errors"] == 1
+    model = next(iter(summary["model"].values()))
+    assert (model["tokens_in"], model["tokens_out"]) == (30, 5)
+    # Las llamadas al modelo también se acumulan por nodo, con los tokens cacheados
+    agent = summary["agent"]["agent"]
+    assert (agent["calls"], agent["tokens_cached"], agent["cached_ratio"]) == (
+        2,
+        10,
+        round(10 / 30, 4),
+    )
+    assert summary["node"]["tools"]["queue_mean_s"] >= 0
+
+
+def test_timed_and_prometheus_export(monkeypatch) -> None:
+    registry = MetricsRegistry()
+    monkeypatch.setattr("react_agent.instrumentation.get_metrics", lambda: registry)
+    with timed("cpu", "pdf_render"):
+        pass
+
+    text = registry.to_prometheus()
+    assert 'react_agent_duration_seconds_count{kind="cpu",name="pdf_render"} 1' in text
+    assert (
+        'react_agent_duration_seconds_bucket{kind="cpu",name="pdf_render",le="+Inf"} 1'
+        in text
+    )
+    assert registry.summary()["cpu"]["pdf_render"]["calls"] == 1
+
+
+def test_registered_component_stats_are_exported() -> None:
+    registry = MetricsRegistry()
+    registry.register_collector(
+        "memo", lambda: {"cedula_tool": {"hits": 3, "hit_ratio": 0.75}}
+    )
+
+    assert registry.summary()["memo"]["cedula_tool"]["hits"] == 3
+    text = registry.to_prometheus()
+    assert (
+        'react_agent_component{kind="memo",name="cedula_tool",stat="hit_ratio"} 0.75'
+        in text
+    )
+
+
+def test_shared_registry_exports_memo_cache_and_scheduler_stats() -> None:
+    from react_agent import memo, rendering, scheduler  # noqa: F401
+    from react_agent.instrumentation import get_metrics
+
+    collected = get_metrics().collected()
+    assert {"memo", "raster_cache", "scheduler_lane"} <= set(collected)
+    assert "hit_ratio" in collected["raster_cache"]["shared"]
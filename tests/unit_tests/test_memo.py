@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from react_agent import memo
+from react_agent.memo import InMemoryMemoBackend, SQLiteMemoBackend, ToolMemo, memo_key
+
+
+def test_in_memory_backend_ttl_and_lru() -> None:
+    backend = InMemoryMemoBackend(max_entries=2)
+    backend.set("a", "1", 0.5, ttl_s=60)
+    backend.set("b", "2", 0.5, ttl_s=60)
+    backend.get("a")
+    backend.set("c", "3", 0.5, ttl_s=60)
+    assert backend.get("b") is None  # expulsado por LRU
+    assert backend.get("a") == ("1", 0.5)
+
+    backend.set("d", "4", 0.5, ttl_s=0.01)
+    time.sleep(0.02)
+    assert backend.get("d") is None
+
+
+def test_sqlite_backend_persists_and_evicts(tmp_path) -> None:
+    path = str(tmp_path / "memo.sqlite")
+    backend = SQLiteMemoBackend(path, max_entries=2)
+    for key in ("a", "b", "c"):
+        backend.set(key, key.upper(), 1.0, ttl_s=60)
+        time.sleep(0.001)
+    reopened = SQLiteMemoBackend(path, max_entries=2)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == ("C", 1.0)
+
+
+def test_tool_memo_metrics() -> None:
+    tool_memo = ToolMemo(InMemoryMemoBackend())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "1032323323"
+
+    key = memo_key("cedula_tool", "sha", "v1", "gemini")
+
+    async def run():
+        await tool_memo.aget_or_compute("cedula_tool", key, compute)
+        return await tool_memo.aget_or_compute("cedula_tool", key, compute)
+
+    assert asyncio.run(run()) == "1032323323"
+    assert len(calls) == 1
+    stats = tool_memo.stats()["cedula_tool"]
+    assert stats["hit_ratio"] == 0.5
+    assert stats["saved_seconds"] >= 0.01
+
+
+def test_memoized_is_per_tool_opt_in(monkeypatch) -> None:
+    monkeypatch.setattr(memo, "_tool_memo", ToolMemo(InMemoryMemoBackend()))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return "ok"
+
+    async def call(_):
+        return await memo.memoized(
+            "cedula_tool", lambda: "sha", "prompt", "gemini", compute
+        )
+
+    runnable = RunnableLambda(call)
+    asyncio.run(runnable.ainvoke(None))
+    asyncio.run(runnable.ainvoke(None))
+    assert len(calls) == 2
+
+    config = {"configurable": {"memoized_tools": ["cedula_tool"]}}
+    asyncio.run(runnable.ainvoke(None, config))
+    asyncio.run(runnable.ainvoke(None, config))
+    assert len(calls) == 3
+
+
+def test_rejected_results_are_not_memoized() -> None:
+    tool_memo = ToolMemo(InMemoryMemoBackend())
+    answers = iter(
+        [
+            "No se encontró el dato en ninguna de las 1 páginas del documento",
+            "2023-12-10",
+        ]
+    )
+
+    async def compute():
+        return next(answers)
+
+    key = memo_key("fecha_defuncion_tool", "sha", "v1", "gemini")
+
+    async def run():
+        results = []
+        for _ in range(3):
+            results.append(
+                await tool_memo.aget_or_compute(
+                    "fecha_defuncion_tool", key, compute, str.isascii
+                )
+            )
+        return results
+
+    assert asyncio.run(run())[1:] == ["2023-12-10", "2023-12-10"]
+    assert tool_memo.stats()["fecha_defuncion_tool"]["misses"] == 2
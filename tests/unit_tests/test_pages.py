@@ -0,0 +1,135 @@
+import asyncio
+
+import fitz
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from react_agent.chat_utils import set_vertex_model_factory
+from react_agent.pages import DocumentPages, page_reports
+from react_agent.tools import CEDULA_PROMPT, FECHA_DEFUNCION_PROMPT, extraer_de_pdf
+from tests.benchmarks.fakes import ScriptedChatModel
+
+CARTA = [
+    "Bogota, 3 de marzo de 2025",
+    "Senores aseguradora: adjunto los documentos solicitados.",
+]
+
+
+def _multipage_pdf(path, pages):
+    """Cada página es ("texto", líneas), ("escaneada", líneas) o ("blanco", [])."""
+    doc = fitz.open()
+    for kind, lines in pages:
+        page = doc.new_page(width=612, height=792)
+        if kind == "texto":
+            for i, line in enumerate(lines):
+                page.insert_text((72, 90 + 22 * i), line)
+        elif kind == "escaneada":
+            source = fitz.open()
+            drawn = source.new_page(width=612, height=792)
+            for i, line in enumerate(lines):
+                drawn.insert_text((72, 90 + 22 * i), line, fontsize=14)
+            page.insert_image(page.rect, pixmap=drawn.get_pixmap(dpi=72))
+            source.close()
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def _extract(pdf_path, prompt, doc_type, answers):
+    calls = []
+
+    def policy(messages):
+        calls.append(1)
+        return AIMessage(content=answers[min(len(calls), len(answers)) - 1])
+
+    set_vertex_model_factory(lambda model_name: ScriptedChatModel(policy=policy))
+    runnable = RunnableLambda(
+        lambda _: None, afunc=lambda _: extraer_de_pdf(pdf_path, prompt, doc_type)
+    )
+    value = asyncio.run(runnable.ainvoke(None))
+    report = next(r for r in reversed(page_reports()) if r["pdf_path"] == pdf_path)
+    return value, report, len(calls)
+
+
+def test_candidates_skip_blank_and_unrelated_pages(tmp_path) -> None:
+    pdf = _multipage_pdf(
+        tmp_path / "expediente.pdf",
+        [
+            ("texto", CARTA),
+            ("blanco", []),
+            ("escaneada", ["CEDULA DE CIUDADANIA", "NUMERO 79.000.001"]),
+        ],
+    )
+    with DocumentPages(pdf, "cedula") as document:
+        candidates = [(c.index, c.reason) for c in document.candidates()]
+    assert candidates == [(2, "miniatura"), (0, "resto")]
+
+
+def test_only_the_page_with_the_field_is_sent(tmp_path, fake_models) -> None:
+    pdf = _multipage_pdf(
+        tmp_path / "cedula.pdf",
+        [
+            ("texto", CARTA),
+            ("blanco", []),
+            ("escaneada", ["CEDULA DE CIUDADANIA", "NUMERO 79.000.001"]),
+            ("escaneada", ["REVERSO", "INDICE DERECHO"]),
+        ],
+    )
+    value, report, calls = _extract(pdf, CEDULA_PROMPT, "cedula", ["79000001"])
+    assert value == "79000001" and calls == 1
+    assert report["page_count"] == 4
+    assert (report["pages_rendered"], report["pages_sent"], report["found_on"]) == (
+        1,
+        1,
+        2,
+    )
+
+
+def test_text_layer_page_is_found_without_rendering(tmp_path, fake_models) -> None:
+    pdf = _multipage_pdf(
+        tmp_path / "defuncion.pdf",
+        [
+            ("texto", CARTA),
+            (
+                "texto",
+                [
+                    "REGISTRO CIVIL DE DEFUNCION",
+                    "Fecha de la defuncion",
+                    "Ano Mes Dia",
+                    "2023 DIC 10",
+                ],
+            ),
+        ],
+    )
+    value, report, calls = _extract(
+        pdf, FECHA_DEFUNCION_PROMPT, "defuncion", ["2024-01-01"]
+    )
+    assert value == "2023-12-10" and calls == 0
+    assert (report["pages_rendered"], report["source"], report["found_on"]) == (
+        0,
+        "texto",
+        1,
+    )
+
+
+def test_search_moves_on_until_the_model_finds_the_field(tmp_path, fake_models) -> None:
+    pdf = _multipage_pdf(
+        tmp_path / "defuncion_escaneada.pdf",
+        [
+            ("escaneada", ["NOTARIA 12 DEL CIRCULO DE BOGOTA"]),
+            ("escaneada", ["Fecha de la defuncion", "2023 DIC 10"]),
+            ("escaneada", ["ANEXOS"]),
+        ],
+    )
+    value, report, calls = _extract(
+        pdf,
+        FECHA_DEFUNCION_PROMPT,
+        "defuncion",
+        ["No encuentro la fecha", "2023-12-10"],
+    )
+    assert value == "2023-12-10" and calls == 2
+    assert (report["pages_sent"], report["found_on"], report["source"]) == (
+        2,
+        1,
+        "modelo",
+    )
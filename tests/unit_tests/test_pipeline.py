@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from react_agent import pipeline
+from react_agent.graph import graph
+from react_agent.state import State
+from react_agent.tools import cedula_valida, fecha_valida, normalizar_cedula
+
+
+def _fake_steps(monkeypatch):
+    calls = []
+
+    async def obtener_cedula():
+        calls.append("cedula")
+        return "1.032.323.323"
+
+    async def consultar_registraduria():
+        calls.append("registraduria")
+        return "fallecido"
+
+    async def obtener_fecha_defuncion():
+        calls.append("defuncion")
+        return "2025-01-12\n"
+
+    async def buscar_saldo(cedula):
+        calls.append(("saldo", cedula))
+        registro = {
+            "cedula": cedula,
+            "producto": "TARJETA DE CRÉDITO",
+            "saldo": "1500000",
+            "fecha_desembolso": "15/03/2022",
+            "monto_desembolso": "5000000",
+        }
+        return "el saldo de la persona es 1500000", registro
+
+    async def evaluar_elegibilidad(cedula, fecha_siniestro):
+        calls.append(("elegibilidad", cedula, fecha_siniestro))
+        texto = "Aplica a Póliza Express: Sí. Regla 1"
+        return texto, {"aplica": True, "regla": 1, "motivo": "regla_1", "texto": texto}
+
+    monkeypatch.setattr(pipeline, "obtener_cedula", obtener_cedula)
+    monkeypatch.setattr(pipeline, "consultar_registraduria", consultar_registraduria)
+    monkeypatch.setattr(pipeline, "obtener_fecha_defuncion", obtener_fecha_defuncion)
+    monkeypatch.setattr(pipeline, "buscar_saldo", buscar_saldo)
+    monkeypatch.setattr(pipeline, "evaluar_elegibilidad", evaluar_elegibilidad)
+    return calls
+
+
+def test_normalizar_cedula() -> None:
+    assert normalizar_cedula("C.C. 1.032.323.323") == "1032323323"
+    assert normalizar_cedula(" sin número ") == "sin número"
+    assert cedula_valida("C.C. 1.032.323.323") == "1032323323"
+    assert cedula_valida("No se encontró el dato en ninguna de las 2 páginas") is None
+
+
+def test_failed_cedula_is_not_stored(monkeypatch) -> None:
+    async def obtener_cedula():
+        return "No se encontró el dato en ninguna de las 2 páginas del documento"
+
+    monkeypatch.setattr(pipeline, "obtener_cedula", obtener_cedula)
+    update = asyncio.run(pipeline.paso_cedula(State()))
+
+    assert update["cedula"] is None
+    assert "No se encontró el dato" in update["messages"][0].content
+
+
+def test_failed_fecha_defuncion_is_not_stored(monkeypatch) -> None:
+    async def obtener_fecha_defuncion():
+        return "No se encontró el dato en ninguna de las 3 páginas del documento"
+
+    monkeypatch.setattr(pipeline, "obtener_fecha_defuncion", obtener_fecha_defuncion)
+    update = asyncio.run(pipeline.paso_defuncion(State()))
+
+    assert update["fecha_defuncion"] is None
+    assert "No se encontró el dato" in update["messages"][0].content
+    assert fecha_valida("La fecha es 2025-01-12.") == "2025-01-12"
+
+
+def test_deterministic_mode_runs_fixed_sequence(monkeypatch) -> None:
+    calls = _fake_steps(monkeypatch)
+    model = GenericFakeChatModel(
+        messages=iter([AIMessage(content="Aplica a Póliza Express: Sí")])
+    )
+    monkeypatch.setattr(pipeline, "_summary_model", lambda: model)
+
+    res = asyncio.run(
+        graph.ainvoke(
+            {"messages": [("user", "procesa la reclamación")]},
+            {"configurable": {"pipeline_mode": "deterministic"}},
+        )
+    )
+
+    assert ("saldo", "1032323323") in calls
+    assert ("elegibilidad", "1032323323", "2025-01-12") in calls
+    assert {"cedula", "registraduria", "defuncion"} <= set(calls)
+    assert res["messages"][-1].content == "Aplica a Póliza Express: Sí"
+    # Los campos de la reclamación quedan en el estado del grafo principal
+    assert res["cedula"] == "1032323323" and res["fecha_defuncion"] == "2025-01-12"
+    assert res["saldo"]["producto"] == "TARJETA DE CRÉDITO"
+    assert res["elegibilidad"]["aplica"] is True
+
+
+def test_deterministic_mode_fans_out_independent_steps(monkeypatch) -> None:
+    async def lento(*args):
+        await asyncio.sleep(0.2)
+        return "1032323323"
+
+    async def lento_saldo(cedula):
+        return await lento(), None
+
+    for name in (
+        "obtener_cedula",
+        "consultar_registraduria",
+        "obtener_fecha_defuncion",
+    ):
+        monkeypatch.setattr(pipeline, name, lento)
+    monkeypatch.setattr(pipeline, "buscar_saldo", lento_saldo)
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="ok")]))
+    monkeypatch.setattr(pipeline, "_summary_model", lambda: model)
+
+    start = time.perf_counter()
+    asyncio.run(pipeline.pipeline_graph.ainvoke({"messages": [("user", "hola")]}))
+    # cédula -> saldo es la rama más larga (2 pasos); en serie serían 4
+    assert time.perf_counter() - start < 0.6
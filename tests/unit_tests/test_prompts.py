@@ -0,0 +1,60 @@
+import pytest
+
+from react_agent import nodes, prompts, tools
+from react_agent.chat_utils import (
+    PromptRegistry,
+    get_prompt_registry,
+    parse_prompt_pins,
+)
+
+
+def _registry(tmp_path, pins=None):
+    (tmp_path / "reglas.v1.txt").write_text("Regla 1\n", encoding="utf-8")
+    (tmp_path / "agente.v1.txt").write_text(
+        "Versión uno\n\n@incluir reglas\n", encoding="utf-8"
+    )
+    (tmp_path / "agente.v2.txt").write_text(
+        "Versión dos\n\n@incluir reglas\n", encoding="utf-8"
+    )
+    return PromptRegistry(tmp_path, pins=pins)
+
+
+def test_registry_resolves_latest_version_and_includes(tmp_path) -> None:
+    registry = _registry(tmp_path)
+    prompt = registry.get("agente")
+    assert (prompt.version, prompt.text) == (2, "Versión dos\n\nRegla 1")
+    assert prompt.key == f"agente@v2:{prompt.digest}"
+    # Se lee y se hashea una sola vez
+    assert registry.get("agente") is prompt
+    assert registry.loaded() == {
+        "agente": prompt.key,
+        "reglas": registry.get("reglas").key,
+    }
+
+
+def test_registry_pins_and_unknown_prompts(tmp_path) -> None:
+    registry = _registry(tmp_path, pins={"agente": 1})
+    assert registry.text("agente") == "Versión uno\n\nRegla 1"
+    assert registry.get("agente", 2).digest != registry.get("agente").digest
+    with pytest.raises(KeyError):
+        registry.get("agente", 3)
+    with pytest.raises(KeyError):
+        registry.get("no_existe")
+
+
+def test_prompt_pins_name_the_malformed_entry() -> None:
+    assert parse_prompt_pins(" supervisor=2, saldo_agent=1,") == {
+        "supervisor": 2,
+        "saldo_agent": 1,
+    }
+    with pytest.raises(ValueError, match="'saldo_agent=v2'"):
+        parse_prompt_pins("supervisor=2,saldo_agent=v2")
+
+
+def test_agents_and_tools_use_the_packaged_prompts() -> None:
+    registry = get_prompt_registry()
+    assert nodes.AGENT_SPECS["saldo_agent"]["prompt"] == registry.text("saldo_agent")
+    assert prompts.REGLAS_POLIZA_EXPRESS in nodes.AGENT_SPECS["saldo_agent"]["prompt"]
+    assert prompts.REGLAS_POLIZA_EXPRESS in prompts.PIPELINE_SUMMARY_PROMPT
+    assert tools.CEDULA_PROMPT == registry.text("extraccion_cedula")
+    assert "@incluir" not in "".join(registry.text(name) for name in registry.names())
@@ -0,0 +1,80 @@
+import asyncio
+import base64
+
+import fitz
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from react_agent import render_pool
+from react_agent.chat_utils import set_vertex_model_factory
+from react_agent.render_pool import RenderPool
+from react_agent.rendering import IMAGE_PROFILES, RenderSettings, render_pdf_page_base64
+from react_agent.tools import CEDULA_PROMPT, extraer_de_pdf
+from tests.benchmarks.fakes import ScriptedChatModel
+
+
+def _make_pdf(path, pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"CEDULA DE CIUDADANIA pagina {i}")
+        page.draw_rect(fitz.Rect(60, 60, 400, 200), width=1.5)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with RenderPool(workers=1) as pool:
+        pool.warm_up()
+        yield pool
+
+
+def test_pool_renders_the_same_image_through_shared_memory(tmp_path, pool) -> None:
+    pdf = _make_pdf(tmp_path / "doc.pdf")
+    settings = IMAGE_PROFILES["cedula"]
+    assert pool.render(pdf, settings) == render_pdf_page_base64(pdf, settings)
+
+    second = RenderSettings(page=1, dpi=80)
+    image = asyncio.run(pool.arender(pdf, second))
+    assert base64.b64decode(image)[:2] == b"\xff\xd8"  # JPEG
+    stats = pool.stats()
+    assert (
+        stats["renders"] == 2
+        and stats["pickled_bytes"] == 0
+        and stats["shared_bytes"] > 0
+    )
+
+
+def test_pool_falls_back_to_pickle_when_the_image_does_not_fit(tmp_path) -> None:
+    pdf = _make_pdf(tmp_path / "doc.pdf", pages=1)
+    settings = IMAGE_PROFILES["cedula"]
+    with RenderPool(workers=1, slot_bytes=1024) as pool:
+        assert pool.render(pdf, settings) == render_pdf_page_base64(pdf, settings)
+        assert pool.stats()["pickled_bytes"] > 0
+
+
+def test_extraction_uses_the_process_backend(
+    tmp_path, fake_models, monkeypatch
+) -> None:
+    monkeypatch.setenv("REACT_AGENT_RENDER_WORKERS", "1")
+    monkeypatch.setattr(render_pool, "_pool", None)
+    set_vertex_model_factory(
+        lambda model_name: ScriptedChatModel(
+            policy=lambda messages: AIMessage(content="79000001")
+        )
+    )
+    pdf = _make_pdf(tmp_path / "cedula.pdf", pages=1)
+    config = {"configurable": {"render_backend": "process", "text_fast_path": False}}
+    runnable = RunnableLambda(
+        lambda _: None, afunc=lambda _: extraer_de_pdf(pdf, CEDULA_PROMPT, "cedula")
+    )
+
+    assert asyncio.run(runnable.ainvoke(None, config)) == "79000001"
+    pool = render_pool.get_render_pool()
+    try:
+        assert pool.stats()["renders"] == 1
+    finally:
+        pool.close()
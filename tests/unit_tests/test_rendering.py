@@ -0,0 +1,139 @@
+import base64
+import shutil
+
+import fitz
+import pytest
+
+from react_agent.rendering import (
+    RasterCache,
+    RenderSettings,
+    image_settings,
+    render_pdf_page_base64,
+)
+
+
+def _make_pdf(path, text="Cedula 1032323323"):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_raster_cache_memory_hit(tmp_path) -> None:
+    pdf = _make_pdf(tmp_path / "doc.pdf")
+    cache = RasterCache(max_entries=2)
+    calls = []
+
+    def render(path, settings):
+        calls.append(path)
+        return "img"
+
+    assert cache.get_or_render(pdf, RenderSettings(), render) == "img"
+    assert cache.get_or_render(pdf, RenderSettings(), render) == "img"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_raster_cache_key_depends_on_content_and_settings(tmp_path) -> None:
+    a = _make_pdf(tmp_path / "a.pdf", "uno")
+    b = str(tmp_path / "b.pdf")
+    shutil.copyfile(a, b)
+    c = _make_pdf(tmp_path / "c.pdf", "dos")
+    cache = RasterCache()
+    assert cache.key_for(a, RenderSettings()) == cache.key_for(b, RenderSettings())
+    assert cache.key_for(a, RenderSettings()) != cache.key_for(c, RenderSettings())
+    assert cache.key_for(a, RenderSettings()) != cache.key_for(
+        a, RenderSettings(page=1)
+    )
+
+
+def test_raster_cache_disk_tier_and_eviction(tmp_path) -> None:
+    pdfs = [_make_pdf(tmp_path / f"{i}.pdf", f"doc {i}") for i in range(3)]
+    disk = tmp_path / "cache"
+    cache = RasterCache(max_entries=1, disk_dir=str(disk), disk_max_bytes=250)
+
+    for pdf in pdfs:
+        cache.get_or_render(pdf, RenderSettings(), lambda p, s: "x" * 100)
+    assert sum(f.stat().st_size for f in disk.glob("*.b64")) <= 250
+
+    cold = RasterCache(disk_dir=str(disk), disk_max_bytes=250)
+    cold.get_or_render(pdfs[-1], RenderSettings(), lambda p, s: "y")
+    assert cold.stats()["disk_hits"] == 1
+
+
+def test_raster_cache_bounds_digests_and_tracks_disk_size(
+    tmp_path, monkeypatch
+) -> None:
+    pdfs = [_make_pdf(tmp_path / f"{i}.pdf", f"doc {i}") for i in range(4)]
+    disk = tmp_path / "cache"
+    cache = RasterCache(
+        max_entries=1, disk_dir=str(disk), disk_max_bytes=250, max_digests=2
+    )
+
+    # Después del recorrido inicial, escribir en disco no vuelve a listar el directorio
+    monkeypatch.setattr(
+        type(disk), "glob", lambda *a: pytest.fail("glob en cada escritura")
+    )
+    for pdf in pdfs:
+        cache.get_or_render(pdf, RenderSettings(), lambda p, s: "x" * 100)
+
+    stats = cache.stats()
+    assert len(cache._digests) == 2
+    assert stats["disk_bytes"] == sum(f.stat().st_size for f in disk.iterdir()) <= 250
+
+
+def test_render_pdf_page_base64(tmp_path) -> None:
+    pdf = _make_pdf(tmp_path / "doc.pdf")
+    cache = RasterCache()
+    image = cache.get_or_render(pdf, RenderSettings())
+    assert image.startswith("/9j/")  # JPEG en base64
+
+
+def _certificate(path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Fecha de inscripcion 2024 ENE 05")
+    page.insert_text((72, 400), "Fecha de la defunción")
+    page.insert_text((72, 420), "2023 DIC 10")
+    for y in range(450, 800, 12):
+        page.insert_text((72, y), "texto de relleno " * 6)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def _decoded_size(image):
+    return len(base64.b64decode(image))
+
+
+def test_image_preparation_clip_and_grayscale(tmp_path) -> None:
+    pdf = _certificate(tmp_path / "cert.pdf")
+    full = render_pdf_page_base64(pdf, RenderSettings(dpi=100))
+    clipped = render_pdf_page_base64(
+        pdf, RenderSettings(dpi=100, grayscale=True, anchor="Fecha de la defunción")
+    )
+    assert _decoded_size(clipped) < _decoded_size(full) / 2
+
+    pix = fitz.Pixmap(base64.b64decode(clipped))
+    assert pix.n == 1  # escala de grises
+    assert pix.height < pix.width
+
+
+def test_image_preparation_respects_byte_budget(tmp_path) -> None:
+    pdf = _certificate(tmp_path / "cert.pdf")
+    unbounded = render_pdf_page_base64(pdf, RenderSettings(dpi=200))
+    image = render_pdf_page_base64(pdf, RenderSettings(dpi=200, max_bytes=60_000))
+    assert _decoded_size(unbounded) > 60_000
+    assert _decoded_size(image) <= 60_000
+
+
+def test_image_settings_profiles_and_overrides() -> None:
+    settings = image_settings("defuncion", {"dpi": 150, "clip": [0, 0, 1, 0.5]})
+    assert (
+        settings.grayscale and settings.dpi == 150 and settings.clip == (0, 0, 1, 0.5)
+    )
+    assert settings.cache_key() != RenderSettings().cache_key()
@@ -0,0 +1,131 @@
+import asyncio
+
+import pandas as pd
+
+from react_agent import tools
+from react_agent.rules import evaluate_claim, score_batch
+
+
+def test_regla_1_tarjeta() -> None:
+    r = evaluate_claim("TARJETA DE CRÉDITO", "1.500.000", "01/01/2024", 0, "2025-01-12")
+    assert r.aplica and r.regla == 1
+    r = evaluate_claim("Tarjeta de credito", 250_000_000, "01/01/2024", 0, "2025-01-12")
+    assert not r.aplica and r.motivo == "saldo_tarjeta"
+
+
+def test_regla_2_credito_con_plan() -> None:
+    r = evaluate_claim(
+        "CRÉDITO",
+        10_000_000,
+        "01/01/2024",
+        "30.000.000",
+        "2024-06-01",
+        plan="Móvil Consumo Fijo",
+    )
+    assert r.aplica and r.regla == 2
+    r = evaluate_claim(
+        "CRÉDITO",
+        10_000_000,
+        "01/05/2024",
+        30_000_000,
+        "2024-06-01",
+        plan="Móvil Consumo Fijo",
+    )
+    assert r.motivo == "dias_credito"
+
+
+def test_regla_3_y_vigencia() -> None:
+    r = evaluate_claim("CRÉDITO", 10_000_000, "01/01/2020", 0, "2025-01-12")
+    assert r.aplica and r.regla == 3 and not r.vigencia_verificada
+    r = evaluate_claim(
+        "CRÉDITO", 10_000_000, "01/01/2020", 0, "2025-01-12", fin_vigencia="31/12/2024"
+    )
+    assert not r.aplica and r.motivo == "fuera_vigencia"
+    assert (
+        evaluate_claim("CRÉDITO", 1, "01/01/2020", 0, "sin fecha").motivo
+        == "sin_siniestro"
+    )
+
+
+def test_score_batch_matches_scalar() -> None:
+    df = pd.DataFrame(
+        {
+            "Cedula": ["1", "2", "3", "4", "5", "6"],
+            "Saldo": [
+                "1.500.000",
+                "250000000",
+                "10000000",
+                "10000000",
+                "60000000",
+                None,
+            ],
+            "Producto": [
+                "TARJETA DE CRÉDITO",
+                "TARJETA DE CRÉDITO",
+                "CRÉDITO",
+                "CRÉDITO",
+                "HIPOTECARIO",
+                "HIPOTECARIO",
+            ],
+            "fecha desembolso": [
+                "01/01/2024",
+                "01/01/2024",
+                "01/01/2024",
+                "01/01/2020",
+                "01/01/2020",
+                "01/01/2020",
+            ],
+            "Mondo desembolso": ["0", "0", "30.000.000", "0", "0", "0"],
+            "Plan": [None, None, "Móvil Vehículo Particular", None, None, None],
+            "Fecha siniestro": [
+                "2025-01-12",
+                "2025-01-12",
+                "2024-06-01",
+                "2025-01-12",
+                "2025-01-12",
+                "2025-01-12",
+            ],
+        }
+    )
+    batch = score_batch(df)
+    for i, row in df.iterrows():
+        r = evaluate_claim(
+            row["Producto"],
+            row["Saldo"],
+            row["fecha desembolso"],
+            row["Mondo desembolso"],
+            row["Fecha siniestro"],
+            plan=row["Plan"],
+        )
+        assert batch.loc[i, "aplica"] == r.aplica
+        assert batch.loc[i, "motivo"] == r.motivo
+        assert batch.loc[i, "dias_desde_desembolso"] == r.dias_desde_desembolso
+    assert list(batch["regla"].fillna(0)) == [1, 0, 2, 3, 0, 0]
+
+
+def test_elegibilidad_tool_uses_balances(tmp_path) -> None:
+    csv = tmp_path / "saldos.csv"
+    csv.write_text(
+        "Cedula,Saldo,Producto,fecha desembolso,Mondo desembolso\n"
+        "1032323323,1500000,TARJETA DE CRÉDITO,15/03/2022,5000000\n",
+        encoding="utf-8",
+    )
+    config = {"configurable": {"saldos_csv_path": str(csv)}}
+    call = {
+        "type": "tool_call",
+        "name": "elegibilidad_tool",
+        "id": "e1",
+        # Sin argumentos la herramienta usa la cédula y la fecha del estado
+        "args": {
+            "state": {
+                "messages": [],
+                "cedula": "1032323323",
+                "fecha_defuncion": "2025-01-12",
+            }
+        },
+    }
+    command = asyncio.run(tools.elegibilidad_tool.ainvoke(call, config))
+    (message,) = command.update["messages"]
+    assert message.content.startswith("Aplica a Póliza Express: Sí. Regla 1")
+    assert command.update["elegibilidad"]["aplica"] is True
+    assert command.update["elegibilidad"]["regla"] == 1
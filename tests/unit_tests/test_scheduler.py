@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from react_agent.scheduler import (
+    AIMDLimiter,
+    ModelLimits,
+    Scheduler,
+    TokenBucket,
+    is_rate_limit_error,
+    scheduled,
+    set_scheduler,
+)
+from tests.benchmarks.fakes import RateLimitError, ScriptedChatModel, ThrottledEndpoint
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler(
+        {"fake": ModelLimits(max_concurrency=16, max_retries=20, retry_base_s=0.005)}
+    )
+    set_scheduler(scheduler)
+    yield scheduler
+    set_scheduler(None)
+
+
+def test_aimd_backs_off_against_a_throttling_provider(scheduler) -> None:
+    endpoint = ThrottledEndpoint(max_concurrency=4)
+    model = scheduled(
+        ScriptedChatModel(
+            policy=lambda messages: AIMessage(content="ok"),
+            latency_s=0.01,
+            endpoint=endpoint,
+        ),
+        "fake/model",
+    )
+
+    async def run():
+        return await asyncio.gather(*(model.ainvoke("hola") for _ in range(80)))
+
+    results = asyncio.run(run())
+    stats = scheduler.stats()["fake/model"]
+    assert [r.content for r in results] == ["ok"] * 80
+    assert endpoint.accepted == 80 and endpoint.rejected > 0
+    assert stats["throttled"] > 0 and stats["limit"] < 16
+    # Tras reducir la concurrencia la mayoría de las llamadas no se rechaza
+    assert endpoint.rejected < endpoint.accepted
+
+
+def test_interactive_calls_overtake_batch_calls() -> None:
+    limiter = AIMDLimiter(ModelLimits(max_concurrency=1))
+    order = []
+
+    async def call(name: str, priority: int) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        limiter.release()
+
+    async def run():
+        await limiter.acquire(0)  # una llamada en curso satura el límite
+        tasks = [asyncio.create_task(call(f"lote-{i}", 1)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("interactiva", 0)))
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["interactiva", "lote-0", "lote-1", "lote-2"]
+
+
+def test_token_bucket_enforces_the_rate() -> None:
+    bucket = TokenBucket(rate_per_min=600, capacity=2)  # 10 por segundo
+    assert bucket.try_consume(1) == 0 and bucket.try_consume(1) == 0
+    start = time.perf_counter()
+    asyncio.run(bucket.acquire(1))
+    assert time.perf_counter() - start >= 0.05
+    bucket.adjust(5)  # el uso real superó lo reservado
+    assert bucket.try_consume(1) > 0.4
+
+
+def test_rate_limit_errors_are_recognized() -> None:
+    from google.api_core.exceptions import ResourceExhausted
+
+    assert is_rate_limit_error(RateLimitError("cuota"))
+    assert is_rate_limit_error(ResourceExhausted("quota exceeded"))
+    assert not is_rate_limit_error(ValueError("cédula inválida"))
+    # Un "429" en el mensaje (un id, un monto, una cédula) no es un error de cuota
+    assert not is_rate_limit_error(ValueError("saldo de 1429000 para la cédula 104290"))
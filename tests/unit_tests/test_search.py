@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from react_agent import search as search_module
+from react_agent.search import (
+    FakeSearchBackend,
+    SearchClient,
+    normalize_query,
+    set_search_client,
+)
+from react_agent.tools import search
+
+
+@pytest.fixture
+def fake_client():
+    client = SearchClient(FakeSearchBackend(latency_s=0.01))
+    set_search_client(client)
+    yield client
+    set_search_client(None)
+
+
+def test_cache_uses_normalized_query_and_max_results() -> None:
+    backend = FakeSearchBackend()
+    client = SearchClient(backend)
+
+    async def run():
+        first = await client.search("Póliza  Express", 3)
+        second = await client.search("  póliza express ", 3)
+        other = await client.search("póliza express", 5)
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+
+    assert normalize_query("  Póliza\tEXPRESS ") == "póliza express"
+    assert first is second
+    assert len(other["results"]) == 5
+    assert backend.queries == ["Póliza  Express", "póliza express"]
+    assert client.stats()["hits"] == 1
+
+
+def test_expired_entries_and_errors_are_not_reused() -> None:
+    class FailingOnce(FakeSearchBackend):
+        async def asearch(self, query, max_results):
+            if not self.queries:
+                self.queries.append(query)
+                raise RuntimeError("caído")
+            return await super().asearch(query, max_results)
+
+    backend = FailingOnce()
+    client = SearchClient(backend, ttl_s=0)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await client.search("saldo", 2)
+        await client.search("saldo", 2)
+        await client.search("saldo", 2)
+
+    asyncio.run(run())
+
+    assert client.stats()["backend_calls"] == 3
+    assert client.stats()["hits"] == 0
+
+
+def test_search_many_deduplicates_in_flight_queries() -> None:
+    backend = FakeSearchBackend(latency_s=0.05)
+    client = SearchClient(backend)
+    queries = ["defunción", "Defunción", "saldo", "defuncion"]
+
+    results = asyncio.run(client.search_many(queries, 2))
+
+    assert [r["query"] for r in results] == [
+        "defunción",
+        "defunción",
+        "saldo",
+        "defuncion",
+    ]
+    assert sorted(backend.queries) == ["defuncion", "defunción", "saldo"]
+    assert client.stats()["deduplicated"] == 1
+
+
+def test_search_uses_the_shared_client(fake_client) -> None:
+    first = asyncio.run(search("registraduría"))
+    second = asyncio.run(search("Registraduría"))
+
+    assert len(first["results"]) == 10
+    assert second is first
+    assert fake_client.backend.queries == ["registraduría"]
+    assert search_module.get_search_client() is fake_client
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from react_agent.graph import graph
+from react_agent.streaming import emit_partial, partial_result, stream_claim
+from tests.benchmarks import fakes
+from tests.benchmarks.bench_saldos import write_dataset
+
+
+def test_partial_result_extracts_typed_values() -> None:
+    assert (
+        partial_result("cedula", "El número de cédula es: 1.032.323.323")["valor"]
+        == "1032323323"
+    )
+    assert (
+        partial_result("fecha_defuncion", "La fecha es 2023-12-10.")["valor"]
+        == "2023-12-10"
+    )
+    emit_partial("cedula", "123")  # fuera del grafo no hace nada
+
+
+def _config(tmp_path, mode: str) -> dict:
+    csv_path = str(tmp_path / "data_saldos.csv")
+    write_dataset(csv_path, 200)
+    claim = fakes.write_claims(str(tmp_path / "claims"), 1)[0]
+    return {
+        "configurable": {
+            "saldos_csv_path": csv_path,
+            "pipeline_mode": mode,
+            "cedula_pdf_path": claim.cedula_pdf_path,
+            "defuncion_pdf_path": claim.defuncion_pdf_path,
+        }
+    }
+
+
+@pytest.mark.parametrize("mode", ["supervisor", "deterministic"])
+def test_partial_results_arrive_before_the_summary(
+    tmp_path, fake_models, mode: str
+) -> None:
+    fakes.install_fake_models(0, 0, rows=200)
+    config = _config(tmp_path, mode)
+
+    async def collect():
+        return [event async for event in stream_claim(config=config)]
+
+    events = asyncio.run(collect())
+    types = [event["type"] for event in events]
+    first_token = types.index("resumen_token")
+    campos = {
+        e["campo"] for e in events[:first_token] if e["type"] == "resultado_parcial"
+    }
+    assert {
+        "cedula",
+        "estado_registraduria",
+        "fecha_defuncion",
+        "elegibilidad",
+    } <= campos
+    assert events[-1]["type"] == "resumen_final" and events[-1]["texto"]
+
+
+def test_partial_results_use_the_custom_stream_mode(tmp_path, fake_models) -> None:
+    fakes.install_fake_models(0, 0, rows=200)
+    config = _config(tmp_path, "supervisor")
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in graph.astream(
+                {"messages": [("user", "Procesa la reclamación.")]},
+                config,
+                stream_mode="custom",
+            )
+        ]
+
+    assert {chunk["campo"] for chunk in asyncio.run(collect())} >= {
+        "cedula",
+        "fecha_defuncion",
+    }
@@ -0,0 +1,77 @@
+import asyncio
+
+import fitz
+from langchain_core.runnables import RunnableLambda
+
+from react_agent.instrumentation import get_metrics
+from react_agent.text_extraction import (
+    fast_path_stats,
+    parse_cedula,
+    parse_fecha_defuncion,
+)
+from react_agent.tools import FECHA_DEFUNCION_PROMPT, extraer_de_pdf
+
+
+def _make_pdf(path, lines):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((72, 72 + 20 * i), line)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_parse_cedula_with_label() -> None:
+    match = parse_cedula(
+        "REPUBLICA DE COLOMBIA\nNÚMERO 1.032.323.323\nFecha 12-ENE-1990"
+    )
+    assert match is not None
+    assert match.value == "1032323323"
+    assert match.confidence >= 0.9
+
+
+def test_parse_cedula_ambiguous_without_label() -> None:
+    assert parse_cedula("1032323323 y 79111222") is None
+    assert parse_cedula("1032323323").confidence < 0.9
+
+
+def test_parse_fecha_defuncion_ignores_other_dates() -> None:
+    text = (
+        "Fecha de inscripción\nAño Mes Día\n2024 ENE 05\n"
+        "Fecha de la defunción\nAño Mes Día\n2023 DIC 10\n"
+    )
+    match = parse_fecha_defuncion(text)
+    assert match is not None
+    assert match.value == "2023-12-10"
+
+
+def test_parse_fecha_defuncion_rejects_invalid_date() -> None:
+    assert parse_fecha_defuncion("Fecha de la defunción 2023 FEB 30") is None
+
+
+def _extraer(pdf_path):
+    runnable = RunnableLambda(
+        lambda _: None,
+        afunc=lambda _: extraer_de_pdf(pdf_path, FECHA_DEFUNCION_PROMPT, "defuncion"),
+    )
+    return asyncio.run(runnable.ainvoke(None))
+
+
+def test_fast_path_reads_the_text_layer(tmp_path) -> None:
+    with_text = _make_pdf(
+        tmp_path / "defuncion.pdf",
+        ["Fecha de la defuncion", "Ano Mes Dia", "2023 DIC 10"],
+    )
+    scanned = _make_pdf(tmp_path / "escaneado.pdf", [])
+    before = dict(fast_path_stats().get("defuncion", {"fast_path": 0, "fallback": 0}))
+
+    assert _extraer(with_text) == "2023-12-10"
+    # La página en blanco no es candidata: no hay llamada al modelo ni recurso a él
+    assert _extraer(scanned).startswith("No se encontró el dato")
+    stats = fast_path_stats()["defuncion"]
+    assert (stats["fast_path"], stats["fallback"]) == (
+        before["fast_path"] + 1,
+        before["fallback"],
+    )
+    assert get_metrics().summary()["text_fast_path"]["defuncion"] == stats
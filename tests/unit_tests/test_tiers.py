@@ -0,0 +1,31 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from react_agent import nodes
+from tests.benchmarks.fakes import ScriptedChatModel
+
+
+def test_agent_node_builds_the_agent_with_the_configured_model(fake_models) -> None:
+    built = []
+
+    def factory(name, model):
+        built.append((name, model))
+        return ScriptedChatModel(policy=lambda messages: AIMessage(content="ok"))
+
+    nodes.set_model_factory(factory)
+    node = nodes.agent_node("registraduria_agent")
+    state = {"messages": [("user", "hola")]}
+
+    for agent_models in (
+        {},
+        {"registraduria_agent": "fast"},
+        {"registraduria_agent": "fast"},
+    ):
+        config = {"configurable": {"agent_models": agent_models}}
+        asyncio.run(node.ainvoke(state, config))
+
+    assert built == [
+        ("registraduria_agent", "azure_openai/gpt-4.1"),
+        ("registraduria_agent", "azure_openai/gpt-4.1-mini"),
+    ]